@@ -35,6 +35,8 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    # Has to be the first middleware, so that it measures whole request.
+    'core.middleware.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,6 +45,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaStickinessMiddleware',
 )
 
 ROOT_URLCONF = 'ad_creator.urls'
@@ -89,6 +92,62 @@ DATABASES = {
 #     }
 # }
 
+# Replica of default database (e.g. PostgreSQL streaming replica), to which reads of GET views are
+# sent (see core.db_routers.ReplicaRouter). Add it to DATABASES and set its alias to enable it.
+# DATABASES['replica'] = dict(DATABASES['default'], HOST='replica.example.com')
+DATABASE_REPLICA = None
+
+# Time (in seconds) for which reads of client, which wrote, stay on default database. Data read
+# from replica is cached for this time only. Should exceed replication lag.
+DATABASE_REPLICA_LAG_WINDOW = 5
+
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/1.8/topics/cache/
+
+# Local-memory cache settings
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# File based cache settings (shared between processes)
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#         'LOCATION': root('cache'),
+#     }
+# }
+
+# Timeout (in seconds) of cached folder structure responses.
+FOLDER_TREE_CACHE_TIMEOUT = 10 * 60
+
+# Timeout (in seconds) of cached compressed API responses. They are cached under version (ETag)
+# of response, so timeout only bounds the size of cache.
+COMPRESSED_RESPONSE_CACHE_TIMEOUT = 10 * 60
+
+# Snapshot of active folders and ads (see commands dump_snapshot and serve_snapshot).
+SNAPSHOT_PATH = root('snapshot.json')
+
+# Number of folder structure responses cached by service worker in browser.
+SERVICE_WORKER_FOLDER_CACHE_SIZE = 200
+
+
+# REST API
+
+# Enables cursor pagination of list views also for clients which don't request it with query
+# parameters 'cursor' or 'page_size'. Enable once all clients are migrated to paginated responses.
+KEYSET_PAGINATION_REQUIRED = False
+
+# API responses smaller than this (in bytes) aren't compressed, because gain would be negligible.
+API_COMPRESSION_MIN_SIZE = 1024
+
+# Maximum number of ads in one request to bulk create/update API.
+BULK_ADS_MAX_ITEMS = 10000
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/1.8/topics/i18n/
@@ -113,6 +172,12 @@ STATICFILES_DIRS = (
     root('static'),
 )
 
+# Static files are collected with content hash in their names and precompressed (gzip and brotli,
+# if package brotli is installed) by command collectstatic.
+STATIC_ROOT = root('collected_static')
+
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
 TEMPLATE_DIRS = (
     root('templates/'),
 )
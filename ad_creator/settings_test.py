@@ -5,3 +5,12 @@ from .settings import *
 
 STATIC_ROOT = root('static')
 MEDIA_ROOT = root('media')
+
+# Static files aren't collected for tests, so there is no manifest of hashed names.
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+# Separate database (not replica of default one) for tests of reads from replica, so that tests can
+# tell from which database data was read. Tests enable reads from it with DATABASE_REPLICA.
+DATABASES['replica'] = dict(
+    DATABASES['default'], TEST={'NAME': 'test_%s_replica' % DATABASES['default']['NAME']}
+)
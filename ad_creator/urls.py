@@ -1,7 +1,10 @@
 from django.conf.urls import include, url
 from django.contrib import admin
 
+from core.views import metrics_view
+
 urlpatterns = [
     url(r'^admin/', include(admin.site.urls)),
+    url(r'^metrics$', metrics_view, name='metrics'),
     url(r'^', include('ads.urls')),
 ]
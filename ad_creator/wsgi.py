@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/1.8/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from core.staticfiles import StaticFilesMiddleware
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ad_creator.settings")
 
 application = get_wsgi_application()
+
+# Collected static files (see command collectstatic) are served with precompressed variants and
+# cache headers. In debug mode static files are served by runserver from STATICFILES_DIRS.
+if not settings.DEBUG:
+    application = StaticFilesMiddleware(application)
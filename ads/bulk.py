@@ -0,0 +1,127 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+
+from . import const
+from .cache import folder_tree_cache
+from .counters import add_to_counters
+from .models import Ad, Folder
+from .serializers import AdBulkSerializer
+from core import const as core_const
+from core.models import VersionConflict
+from core.utils import get_batch_size, in_batches
+
+
+def filter_pks(queryset, pks, *fields):
+    """
+    Returns dictionary, which maps given pks, which exist in queryset, to tuple of values of
+    'fields'. Uses one query per batch of pks.
+    """
+
+    pks, existing = set(pks), {}
+    for batch in in_batches(pks, get_batch_size(1, pks)):
+        existing.update(
+            (row[0], row[1:]) for row in queryset.filter(pk__in=batch).values_list('pk', *fields)
+        )
+
+    return existing
+
+
+def validate_ads(items):
+    """
+    Validates list of ads. Fields are validated per ad, while activity of folders and existence of
+    updated ads is checked for all ads at once. Ad can be updated only once per list, so all ads
+    with repeated pk are invalid. Updated ads, whose version changed in the meantime, are invalid
+    as well. Returns list of validated ads and list of errors
+    ({'index': index of ad in list, 'errors': errors}).
+    """
+
+    serializer = AdBulkSerializer()
+    validated, errors = [], []
+
+    for index, item in enumerate(items):
+        try:
+            validated.append((index, serializer.run_validation(item)))
+        except ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.detail})
+
+    active_folders = filter_pks(Folder.objects.active(), (ad['folder'] for _, ad in validated))
+    existing_ads = filter_pks(
+        Ad.objects.active(), (ad['pk'] for _, ad in validated if 'pk' in ad), 'folder_id',
+        'version'
+    )
+    pk_counts = Counter(ad['pk'] for _, ad in validated if 'pk' in ad)
+    valid = []
+
+    for index, ad in validated:
+        if pk_counts[ad.get('pk')] > 1:
+            errors.append({'index': index, 'errors': {'pk': [const.MSG_AD_REPEATED]}})
+        elif ad['folder'] not in active_folders:
+            errors.append({'index': index, 'errors': {
+                'folder': [const.MSG_AD_HAS_TO_BELONG_TO_FOLDER]
+            }})
+        elif 'pk' in ad and ad['pk'] not in existing_ads:
+            errors.append({'index': index, 'errors': {'pk': [const.MSG_AD_DOESNT_EXIST]}})
+        elif 'pk' in ad and ad['version'] != existing_ads[ad['pk']][1]:
+            errors.append({'index': index, 'errors': {
+                'version': [core_const.MSG_VERSION_CONFLICT]
+            }})
+        else:
+            if 'pk' in ad:
+                ad['old_folder'] = existing_ads[ad['pk']][0]
+            valid.append(ad)
+
+    errors.sort(key=lambda error: error['index'])
+
+    return valid, errors
+
+
+def write_ads(ads):
+    """
+    Creates new ads with bulk_create and updates existing ads with batched UPDATE statements.
+    Counters of affected folders are updated as well. Ads have to be validated with validate_ads().
+    Ads are updated only if they still have version sent by client, otherwise nothing is written
+    and VersionConflict is raised. Returns number of created and updated ads.
+    """
+
+    new_ads = [ad for ad in ads if 'pk' not in ad]
+    updated_ads = [ad for ad in ads if 'pk' in ad]
+    now = timezone.now()
+    ad_deltas = Counter(ad['folder'] for ad in new_ads)
+
+    for ad in updated_ads:
+        if ad['old_folder'] != ad['folder']:
+            ad_deltas[ad['old_folder']] -= 1
+            ad_deltas[ad['folder']] += 1
+
+    with transaction.atomic():
+        Ad.objects.bulk_create(
+            Ad(name=ad['name'], ad_url=ad['ad_url'], folder_id=ad['folder']) for ad in new_ads
+        )
+
+        # Every updated ad takes 2 parameters (pk and value) per field and version and 1 for pk
+        # filter.
+        for batch in in_batches(updated_ads, get_batch_size(9, updated_ads)):
+            num_updated = Ad.objects.filter(
+                pk__in=[ad['pk'] for ad in batch],
+                version=Case(*[When(pk=ad['pk'], then=Value(ad['version'])) for ad in batch],
+                             output_field=PositiveIntegerField())
+            ).update(
+                name=Case(*[When(pk=ad['pk'], then=Value(ad['name'])) for ad in batch]),
+                ad_url=Case(*[When(pk=ad['pk'], then=Value(ad['ad_url'])) for ad in batch]),
+                folder_id=Case(*[When(pk=ad['pk'], then=Value(ad['folder'])) for ad in batch]),
+                time_modified=now, version=F('version') + 1
+            )
+            # Some ad was changed since it was validated.
+            if num_updated != len(batch):
+                raise VersionConflict(core_const.MSG_VERSION_CONFLICT)
+
+        add_to_counters(ad_deltas=ad_deltas)
+
+    folder_tree_cache.invalidate()
+
+    return len(new_ads), len(updated_ads)
@@ -0,0 +1,13 @@
+from django.conf import settings
+
+from core.cache import GenerationCache
+
+
+# Cache of folder structure responses. Invalidated by any change of folders or ads.
+folder_tree_cache = GenerationCache('folder_tree', timeout=settings.FOLDER_TREE_CACHE_TIMEOUT)
+
+# Cache of compressed API responses, keyed by their ETag. Entries of old versions aren't used and
+# expire.
+compressed_response_cache = GenerationCache(
+    'compressed_responses', timeout=settings.COMPRESSED_RESPONSE_CACHE_TIMEOUT
+)
@@ -3,6 +3,24 @@ MSG_ONLY_ONE_ROOT_FOLDER = 'There can be only one root folder.'
 MSG_ROOT_FOLDER_CANT_DELETE = 'Root folder cannot be deleted.'
 MSG_ROOT_FOLDER_DOESNT_EXIST = 'Root folder does not exist. Please insert root folder.'
 MSG_FOLDER_CANT_BE_PARENT_TO_ITSELF = 'Folder cannot be parent to itself.'
+MSG_FOLDER_CANT_BE_MOVED_TO_DESCENDANT = 'Folder cannot be moved to one of its sub-folders.'
+MSG_PARENT_FOLDER_DOESNT_EXIST = 'Parent folder does not exist.'
+MSG_FOLDER_TREE_TOO_DEEP = 'Folder cannot be nested this deep.'
 
 # Ad messages
 MSG_AD_HAS_TO_BELONG_TO_FOLDER = 'Ad has to belong to active folder.'
+MSG_AD_DOESNT_EXIST = 'Active ad with this pk does not exist.'
+MSG_AD_REPEATED = 'Ad with this pk can be sent only once.'
+MSG_BULK_VERSION_REQUIRED = 'Version of ad is required for update.'
+MSG_BULK_EXPECTS_LIST = 'Expected a list of ads.'
+MSG_BULK_TOO_MANY_ITEMS = 'Too many ads. At most %s ads can be sent at once.'
+
+# Export messages
+MSG_INVALID_MODIFIED_SINCE = 'Invalid datetime. Use ISO 8601 format, e.g. 2015-06-01T12:00:00Z.'
+
+# Search messages
+MSG_SEARCH_QUERY_TOO_SHORT = 'Search query has to contain at least %s characters.'
+
+# Import messages
+MSG_INVALID_ROW = 'Invalid row.'
+MSG_INVALID_RECORD_TYPE = "Invalid record type '%s'. Use 'folder' or 'ad'."
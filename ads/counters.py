@@ -0,0 +1,108 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Case, Count, F, When
+from django.db.models import PositiveIntegerField
+from django.utils import timezone
+
+from .models import Ad, Folder
+from core.utils import get_batch_size, in_batches
+
+
+COUNTER_FIELDS = Folder.counter_fields
+
+
+def add_to_counters(child_deltas=None, ad_deltas=None):
+    """
+    Adds deltas of active sub-folders and ads (maps folder id to delta) to counters of folders and
+    total counters of their ancestors. Added sub-folders must not have active sub-folders or ads
+    (e.g. new folders). Paths of folders are read with one query and counters are updated with
+    batched UPDATE statements, so number of queries doesn't depend on number of folders.
+    """
+
+    child_deltas, ad_deltas = child_deltas or {}, ad_deltas or {}
+    folder_ids = set(child_deltas) | set(ad_deltas)
+    paths = {}
+
+    for batch in in_batches(folder_ids, get_batch_size(1, folder_ids)):
+        paths.update(Folder.objects.filter(pk__in=batch).values_list('pk', 'path'))
+
+    deltas = defaultdict(Counter)
+    for folder_id in folder_ids:
+        folder_deltas = {
+            'active_child_count': child_deltas.get(folder_id, 0),
+            'active_ad_count': ad_deltas.get(folder_id, 0),
+        }
+        deltas[folder_id].update(folder_deltas)
+        for pk in Folder.parse_path(paths[folder_id]) + [folder_id]:
+            deltas[pk].update({
+                'total_active_child_count': folder_deltas['active_child_count'],
+                'total_active_ad_count': folder_deltas['active_ad_count'],
+            })
+
+    update_counters({pk: values for pk, values in deltas.items() if any(values.values())},
+                    relative=True)
+
+
+def update_counters(counters, relative=False, folder_model=Folder):
+    """
+    Sets (or adds, if 'relative') counters of folders with batched UPDATE statements. 'counters'
+    maps folder id to dictionary of counter values.
+    """
+
+    now = timezone.now()
+    counters = list(counters.items())
+
+    # Every folder takes up to 2 parameters (pk and value) per counter and 1 for pk filter.
+    for batch in in_batches(counters, get_batch_size(2 * len(COUNTER_FIELDS) + 1, counters)):
+        updates = {}
+
+        for field in COUNTER_FIELDS:
+            whens = [
+                When(pk=pk, then=F(field) + values[field] if relative else values[field])
+                for pk, values in batch if values.get(field) or not relative
+            ]
+            if whens:
+                updates[field] = Case(
+                    *whens, default=F(field), output_field=PositiveIntegerField()
+                )
+
+        folder_model.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+            time_modified=now, **updates
+        )
+
+
+def repair_counters(folder_model=Folder, ad_model=Ad):
+    """
+    Recomputes counters of all folders from active folders and ads and writes counters which
+    differ. Ads are counted with one aggregate query. Returns number of repaired folders.
+    """
+
+    folders = list(folder_model.objects.order_by('-depth').values_list(
+        'pk', 'parent_id', 'is_active', *COUNTER_FIELDS
+    ))
+    ad_counts = dict(ad_model.objects.filter(is_active=True).values('folder').annotate(
+        count=Count('pk')
+    ).order_by().values_list('folder', 'count'))
+    counters = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+
+    # Folders are processed from the deepest level up, so that totals of sub-folders are known.
+    for pk, parent_id, is_active, *_ in folders:
+        folder_counters = counters[pk]
+        folder_counters['active_ad_count'] = ad_counts.get(pk, 0)
+        folder_counters['total_active_ad_count'] += folder_counters['active_ad_count']
+
+        if is_active and parent_id is not None:
+            parent_counters = counters[parent_id]
+            parent_counters['active_child_count'] += 1
+            parent_counters['total_active_child_count'] += (
+                1 + folder_counters['total_active_child_count']
+            )
+            parent_counters['total_active_ad_count'] += folder_counters['total_active_ad_count']
+
+    repaired = {
+        pk: counters[pk] for pk, _, _, *values in folders
+        if tuple(counters[pk][field] for field in COUNTER_FIELDS) != tuple(values)
+    }
+    update_counters(repaired, folder_model=folder_model)
+
+    return len(repaired)
@@ -0,0 +1,88 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Ad, Folder
+
+
+FOLDER_FIELDS = ('pk', 'name', 'parent', 'is_active', 'time_created', 'time_modified')
+AD_FIELDS = ('pk', 'name', 'ad_url', 'folder', 'is_active', 'time_created', 'time_modified')
+CHUNK_SIZE = 2000
+
+
+def parse_modified_since(value):
+    """
+    Parses ISO 8601 datetime. Datetime without time zone is interpreted in current time zone.
+    Raises ValueError if value is not valid datetime.
+    """
+
+    modified_since = parse_datetime(value)
+
+    if modified_since is None:
+        raise ValueError(value)
+    if settings.USE_TZ and timezone.is_naive(modified_since):
+        modified_since = timezone.make_aware(modified_since)
+
+    return modified_since
+
+
+def iter_chunked(queryset, fields, ordering, chunk_size=CHUNK_SIZE):
+    """
+    Yields rows of queryset as dictionaries. Rows are read in chunks with range condition on
+    'ordering' fields (the last one has to be unique), so only one chunk is held in memory.
+    """
+
+    position_filter = Q()
+
+    while True:
+        rows = list(
+            queryset.filter(position_filter).order_by(*ordering).values(*fields)[:chunk_size]
+        )
+        if not rows:
+            break
+
+        # Position is read before rows are yielded, because consumer may modify them.
+        last = {field: rows[-1][field] for field in ordering}
+        yield from rows
+
+        if len(rows) < chunk_size:
+            break
+
+        # Filter for rows after the last row, e.g. (depth > d) OR (depth = d AND pk > p).
+        position_filter = Q(**{'%s__gt' % ordering[-1]: last[ordering[-1]]})
+        for field in ordering[-2::-1]:
+            position_filter = Q(**{'%s__gt' % field: last[field]}) | (
+                Q(**{field: last[field]}) & position_filter
+            )
+
+
+def export_catalog(folder=None, modified_since=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields NDJSON lines (folders first, then ads) of all folders and ads, including inactive ones.
+    Folders are ordered from root down, so parent always precedes it's sub-folders. Export can be
+    limited to subtree of 'folder' and to records modified since 'modified_since'.
+    """
+
+    folders, ads = Folder.objects.all(), Ad.objects.all()
+
+    if folder is not None:
+        folders = folders.filter(Q(pk=folder.pk) | Q(path__startswith=folder.subtree_path))
+        ads = ads.filter(Q(folder=folder) | Q(folder__path__startswith=folder.subtree_path))
+    if modified_since is not None:
+        folders = folders.filter(time_modified__gte=modified_since)
+        ads = ads.filter(time_modified__gte=modified_since)
+
+    exported = (
+        ('folder', iter_chunked(folders, FOLDER_FIELDS + ('depth',), ('depth', 'pk'), chunk_size)),
+        ('ad', iter_chunked(ads, AD_FIELDS, ('pk',), chunk_size)),
+    )
+
+    for record_type, rows in exported:
+        for row in rows:
+            row.pop('depth', None)
+            row['type'] = record_type
+            yield json.dumps(row, cls=DjangoJSONEncoder, sort_keys=True) + '\n'
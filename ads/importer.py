@@ -0,0 +1,248 @@
+import csv
+import io
+import json
+from collections import Counter
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import const
+from .cache import folder_tree_cache
+from .counters import add_to_counters
+from .models import Ad, Folder
+from core.utils import get_batch_size, in_batches
+
+
+CHUNK_SIZE = 5000
+
+
+class ImportRow():
+    """Row of imported catalog. 'path' is tuple of names of folders from root down."""
+
+    def __init__(self, line, record_type, path, name, ad_url=None):
+        self.line = line
+        self.type = record_type
+        self.path = path
+        self.name = name
+        self.ad_url = ad_url
+
+    @property
+    def full_path(self):
+        """Path of folder represented by row."""
+
+        return self.path + (self.name,)
+
+
+class CatalogImporter():
+    """
+    Imports folders and ads from rows with columns 'type' (folder or ad), 'path' (names of folders
+    from root down to the parent folder of record, separated with '/'), 'name' and 'ad_url'.
+
+    Rows are processed in chunks. Folder paths are resolved to ids with one query per folder level
+    for whole chunk and resolved ids are remembered. Folders which already exist are reused. Records
+    are written without Model.save(), so validations are performed here in batches. Ads are written
+    with COPY on PostgreSQL and with bulk_create on other databases. Invalid rows are rejected and
+    reported in 'rejected' list as (line, reason).
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, use_copy=None):
+        self.chunk_size = chunk_size
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.num_rows = 0
+        self.num_folders = 0
+        self.num_existing_folders = 0
+        self.num_ads = 0
+        self.rejected = []
+        # Resolved active folders; maps path of folder to (pk, tree path, depth).
+        self._folders = {}
+        self._name_field = Folder._meta.get_field('name')
+        self._ad_name_field = Ad._meta.get_field('name')
+        self._ad_url_field = Ad._meta.get_field('ad_url')
+
+    def import_rows(self, rows):
+        """Imports rows (dictionaries with columns). Returns self."""
+
+        rows = iter(enumerate(rows, start=1))
+
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                self._import_chunk([row for row in map(self._parse_row, chunk) if row])
+
+        folder_tree_cache.invalidate()
+
+        return self
+
+    def _reject(self, row, reason):
+        self.rejected.append((row.line if isinstance(row, ImportRow) else row, reason))
+
+    def _parse_row(self, numbered_row):
+        """Returns ImportRow with validated field values or None if row is rejected."""
+
+        line, data = numbered_row
+        self.num_rows += 1
+
+        try:
+            record_type = data.get('type')
+            path = data.get('path') or ()
+            if isinstance(path, str):
+                path = path.split('/')
+            path = tuple(name.strip() for name in path if name.strip())
+
+            if record_type == 'folder':
+                return ImportRow(
+                    line, record_type, path, self._name_field.clean(data.get('name'), None)
+                )
+            elif record_type == 'ad':
+                if not path:
+                    raise ValidationError(const.MSG_AD_HAS_TO_BELONG_TO_FOLDER)
+                return ImportRow(
+                    line, record_type, path, self._ad_name_field.clean(data.get('name'), None),
+                    self._ad_url_field.clean(data.get('ad_url'), None)
+                )
+
+            raise ValidationError(const.MSG_INVALID_RECORD_TYPE % record_type)
+        except ValidationError as exc:
+            self._reject(line, ' '.join(exc.messages))
+        except (AttributeError, TypeError):
+            self._reject(line, const.MSG_INVALID_ROW)
+
+    def _import_chunk(self, rows):
+        folder_rows = [row for row in rows if row.type == 'folder']
+        # Number of created sub-folders and ads per folder, which are added to counters.
+        self._child_deltas, self._ad_deltas = Counter(), Counter()
+
+        # Folders are created level by level, so that parents exist before their sub-folders.
+        for depth in sorted({len(row.path) for row in folder_rows}):
+            self._create_folders([row for row in folder_rows if len(row.path) == depth])
+
+        ad_rows = [row for row in rows if row.type == 'ad']
+        self._resolve_paths(row.path for row in ad_rows)
+        ads = []
+
+        for row in ad_rows:
+            if row.path in self._folders:
+                ads.append((row.name, row.ad_url, self._folders[row.path][0]))
+                self._ad_deltas[self._folders[row.path][0]] += 1
+            else:
+                self._reject(row, const.MSG_AD_HAS_TO_BELONG_TO_FOLDER)
+
+        if self.use_copy:
+            self._copy_ads(ads)
+        else:
+            Ad.objects.bulk_create(
+                Ad(name=name, ad_url=ad_url, folder_id=folder_id) for name, ad_url, folder_id in ads
+            )
+        self.num_ads += len(ads)
+
+        add_to_counters(self._child_deltas, self._ad_deltas)
+
+    def _create_folders(self, rows):
+        """Creates folders on the same level, which don't exist yet."""
+
+        self._resolve_paths(row.full_path for row in rows)
+        root_exists = None
+        new_folders = {}
+
+        for row in rows:
+            if row.full_path in self._folders or row.full_path in new_folders:
+                self.num_existing_folders += 1
+            elif not row.path:
+                if root_exists is None:
+                    root_exists = Folder.objects.active().filter(parent=None).exists()
+                if root_exists:
+                    self._reject(row, const.MSG_ONLY_ONE_ROOT_FOLDER)
+                else:
+                    root_exists = True
+                    new_folders[row.full_path] = Folder(name=row.name, parent=None)
+            elif row.path in self._folders:
+                pk, path, depth = self._folders[row.path]
+                new_folders[row.full_path] = Folder(
+                    name=row.name, parent_id=pk, path='%s%s/' % (path, pk), depth=depth + 1
+                )
+                self._child_deltas[pk] += 1
+            else:
+                self._reject(row, const.MSG_PARENT_FOLDER_DOESNT_EXIST)
+
+        # Primary keys aren't returned by bulk_create, so new folders are resolved again.
+        Folder.objects.bulk_create(new_folders.values())
+        self._resolve_paths(new_folders)
+        self.num_folders += len(new_folders)
+
+    def _resolve_paths(self, paths):
+        """Resolves paths of active folders (and all their ancestors) with one query per level."""
+
+        pending = set()
+        for path in paths:
+            pending.update(path[:depth] for depth in range(1, len(path) + 1))
+        pending.difference_update(self._folders)
+
+        for depth in sorted({len(path) for path in pending}):
+            level = [path for path in pending if len(path) == depth and (
+                depth == 1 or path[:-1] in self._folders)]
+            if not level:
+                break
+
+            # Every path of level adds up to 2 query parameters (name and parent id).
+            for batch in in_batches(level, get_batch_size(2, level)):
+                self._resolve_level(batch, depth)
+
+    def _resolve_level(self, paths, depth):
+        folders = Folder.objects.active().filter(name__in={path[-1] for path in paths})
+        if depth == 1:
+            folders = folders.filter(parent=None)
+        else:
+            folders = folders.filter(parent_id__in={self._folders[path[:-1]][0] for path in paths})
+
+        # Folder with the lowest pk is used if parent has multiple sub-folders with same name.
+        found = {}
+        for pk, parent_id, name, path, folder_depth in folders.order_by('-pk').values_list(
+                'pk', 'parent_id', 'name', 'path', 'depth'):
+            found[(parent_id, name)] = (pk, path, folder_depth)
+
+        for path in paths:
+            parent_id = self._folders[path[:-1]][0] if depth > 1 else None
+            if (parent_id, path[-1]) in found:
+                self._folders[path] = found[(parent_id, path[-1])]
+
+    def _copy_ads(self, ads):
+        """Writes ads with PostgreSQL COPY."""
+
+        now = timezone.now().isoformat()
+        data = io.StringIO()
+        writer = csv.writer(data)
+
+        for name, ad_url, folder_id in ads:
+            writer.writerow((name, ad_url, folder_id, 't', now, now))
+        data.seek(0)
+
+        columns = ', '.join(
+            connection.ops.quote_name(Ad._meta.get_field(name).column)
+            for name in ('name', 'ad_url', 'folder', 'is_active', 'time_created', 'time_modified')
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                'COPY %s (%s) FROM STDIN WITH (FORMAT csv)' % (
+                    connection.ops.quote_name(Ad._meta.db_table), columns
+                ),
+                data
+            )
+
+
+def read_rows(input_file, file_format):
+    """Yields rows (dictionaries) of CSV file with header or NDJSON file."""
+
+    if file_format == 'csv':
+        yield from csv.DictReader(input_file)
+    else:
+        for line in input_file:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...snapshot import build_snapshot, write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes snapshot of active folders and ads, which is served by command serve_snapshot. '
+        'Snapshot file is replaced atomically.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', default=settings.SNAPSHOT_PATH,
+            help='Snapshot file. Defaults to setting SNAPSHOT_PATH.'
+        )
+
+    def handle(self, *args, **options):
+        snapshot = build_snapshot()
+        write_snapshot(snapshot, options['output'])
+
+        self.stdout.write('Wrote snapshot of %s folders and %s ads to %s.' % (
+            len(snapshot['folder_pk']), len(snapshot['ad_folder']), options['output']
+        ))
@@ -0,0 +1,39 @@
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...export import export_catalog, parse_modified_since
+from ...models import Folder
+
+
+class Command(BaseCommand):
+    help = 'Exports all folders and ads (including inactive ones) as NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', help='Output file. Export is written to standard output by default.'
+        )
+        parser.add_argument('--folder', type=int, help='Exports only subtree of folder with pk.')
+        parser.add_argument(
+            '--modified-since', help='Exports only records modified since ISO 8601 datetime.'
+        )
+
+    def handle(self, *args, **options):
+        folder = modified_since = None
+
+        if options['folder'] is not None:
+            try:
+                folder = Folder.objects.get(pk=options['folder'])
+            except Folder.DoesNotExist:
+                raise CommandError('Folder %s does not exist.' % options['folder'])
+        if options['modified_since'] is not None:
+            try:
+                modified_since = parse_modified_since(options['modified_since'])
+            except ValueError:
+                raise CommandError('Invalid datetime %s.' % options['modified_since'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.writelines(export_catalog(folder, modified_since))
+        else:
+            for line in export_catalog(folder, modified_since):
+                self.stdout.write(line, ending='')
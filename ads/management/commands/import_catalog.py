@@ -0,0 +1,59 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importer import CHUNK_SIZE, CatalogImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports folders and ads from CSV (with header) or NDJSON file with columns type (folder '
+        'or ad), path (names of folders from root down to parent folder, separated with /), name '
+        'and ad_url. Existing folders are reused.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Input file. Use - for standard input.')
+        parser.add_argument(
+            '--format', choices=('csv', 'ndjson'),
+            help='Format of input. Determined from file extension by default.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE, help='Number of rows per transaction.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_false', dest='use_copy', default=None,
+            help="Doesn't use COPY on PostgreSQL."
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or (
+            'csv' if options['input'].lower().endswith('.csv') else 'ndjson'
+        )
+        start = time.time()
+
+        try:
+            input_file = (sys.stdin if options['input'] == '-' else
+                          open(options['input'], encoding='utf-8', newline=''))
+        except OSError as exc:
+            raise CommandError(exc)
+
+        with input_file:
+            importer = CatalogImporter(options['chunk_size'], options['use_copy']).import_rows(
+                read_rows(input_file, file_format)
+            )
+
+        elapsed = time.time() - start
+
+        for line, reason in importer.rejected:
+            self.stderr.write('Rejected row %s: %s' % (line, reason))
+
+        self.stdout.write(
+            'Imported %s folders (%s already existed) and %s ads from %s rows in %.2f s '
+            '(%.0f rows/s). Rejected %s rows.' % (
+                importer.num_folders, importer.num_existing_folders, importer.num_ads,
+                importer.num_rows, elapsed, importer.num_rows / elapsed if elapsed else 0,
+                len(importer.rejected)
+            )
+        )
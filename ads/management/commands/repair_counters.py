@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...cache import folder_tree_cache
+from ...counters import repair_counters
+
+
+class Command(BaseCommand):
+    help = 'Recomputes counters of active sub-folders and ads of all folders.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            num_repaired = repair_counters()
+
+        if num_repaired:
+            folder_tree_cache.invalidate()
+
+        self.stdout.write('Repaired counters of %s folders.' % num_repaired)
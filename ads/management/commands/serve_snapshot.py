@@ -0,0 +1,42 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...snapshot_server import SnapshotServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs read-only HTTP server, which serves folder structures (/folder_ad/<pk>/) from '
+        'snapshot written by command dump_snapshot. Snapshot is reloaded when its file changes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument(
+            '--snapshot', default=settings.SNAPSHOT_PATH,
+            help='Snapshot file. Defaults to setting SNAPSHOT_PATH.'
+        )
+        parser.add_argument(
+            '--reload-interval', type=float, default=1.0,
+            help='Interval (in seconds) of checking snapshot file for changes.'
+        )
+
+    def handle(self, *args, **options):
+        server = SnapshotServer(options['snapshot'], options['reload_interval'])
+        loop = asyncio.get_event_loop()
+
+        try:
+            server.start(options['host'], options['port'])
+        except OSError as exc:
+            raise CommandError(exc)
+        if server.snapshot is None:
+            self.stderr.write('Snapshot %s does not exist yet.' % options['snapshot'])
+
+        self.stdout.write('Serving snapshot on http://%s:%s/' % (options['host'], options['port']))
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
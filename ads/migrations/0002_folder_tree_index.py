@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def build_tree_index(apps, schema_editor):
+    """Populates path and depth of existing folders level by level, starting with root folders."""
+
+    Folder = apps.get_model('ads', 'Folder')
+
+    level = list(Folder.objects.filter(parent=None).values_list('pk', 'path'))
+    depth = 0
+
+    while level:
+        depth += 1
+        for pk, path in level:
+            Folder.objects.filter(parent_id=pk).update(path='%s%s/' % (path, pk), depth=depth)
+        level = list(Folder.objects.filter(depth=depth).values_list('pk', 'path'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='folder',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of ancestor folders.'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='path',
+            field=models.CharField(max_length=2048, blank=True, db_index=True, default='', editable=False, help_text='Ids of all ancestor folders from root down, e.g. "1/5/". Empty for root folder.'),
+        ),
+        migrations.AlterField(
+            model_name='ad',
+            name='ad_url',
+            field=models.URLField(help_text='Url to the ad.'),
+        ),
+        migrations.AlterField(
+            model_name='ad',
+            name='folder',
+            field=models.ForeignKey(help_text='Folder to which ad belongs to.', related_name='ads', to='ads.Folder'),
+        ),
+        migrations.AlterField(
+            model_name='ad',
+            name='is_active',
+            field=models.BooleanField(default=True, help_text='Denotes if entity is active or inactive.'),
+        ),
+        migrations.AlterField(
+            model_name='ad',
+            name='name',
+            field=models.CharField(max_length=100, help_text='Name of the ad.'),
+        ),
+        migrations.AlterField(
+            model_name='ad',
+            name='time_created',
+            field=models.DateTimeField(help_text='Time when record was created.', auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='ad',
+            name='time_modified',
+            field=models.DateTimeField(help_text='Time when record was updated.', auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='folder',
+            name='is_active',
+            field=models.BooleanField(default=True, help_text='Denotes if entity is active or inactive.'),
+        ),
+        migrations.AlterField(
+            model_name='folder',
+            name='name',
+            field=models.CharField(max_length=100, help_text='Name of the folder.'),
+        ),
+        migrations.AlterField(
+            model_name='folder',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, help_text='Reference to parent folder.', related_name='children', to='ads.Folder'),
+        ),
+        migrations.AlterField(
+            model_name='folder',
+            name='time_created',
+            field=models.DateTimeField(help_text='Time when record was created.', auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='folder',
+            name='time_modified',
+            field=models.DateTimeField(help_text='Time when record was updated.', auto_now=True),
+        ),
+        migrations.RunPython(build_tree_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# (index name, table, columns) of indexes matching queries for active records. Column 'is_active'
+# is left out on PostgreSQL, where indexes are partial (WHERE is_active).
+INDEXES = (
+    # Active sub-folders of folder ordered by name
+    ('ads_folder_parent_active_name', 'ads_folder', ('parent_id', 'is_active', 'name')),
+    # Active ads of folder ordered by name
+    ('ads_ad_folder_active_name', 'ads_ad', ('folder_id', 'is_active', 'name')),
+    # Paginated lists of active folders and ads ordered by name and id
+    ('ads_folder_active_name_id', 'ads_folder', ('is_active', 'name', 'id')),
+    ('ads_ad_active_name_id', 'ads_ad', ('is_active', 'name', 'id')),
+)
+
+
+def create_indexes(apps, schema_editor):
+    """Creates composite indexes. On PostgreSQL indexes are partial and contain active rows only."""
+
+    quote_name = schema_editor.quote_name
+    is_postgresql = schema_editor.connection.vendor == 'postgresql'
+
+    for name, table, columns in INDEXES:
+        if is_postgresql:
+            columns = [column for column in columns if column != 'is_active']
+
+        schema_editor.execute('CREATE INDEX %s ON %s (%s)%s' % (
+            quote_name(name), quote_name(table), ', '.join(quote_name(c) for c in columns),
+            ' WHERE %s' % quote_name('is_active') if is_postgresql else ''
+        ))
+
+
+def drop_indexes(apps, schema_editor):
+    for name, _, _ in INDEXES:
+        schema_editor.execute('DROP INDEX %s' % schema_editor.quote_name(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0002_folder_tree_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
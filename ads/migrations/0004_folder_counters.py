@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.db import models, migrations
+from django.db.models import Count
+
+
+COUNTER_FIELDS = (
+    'active_child_count', 'active_ad_count', 'total_active_child_count', 'total_active_ad_count'
+)
+
+
+def add_counter_columns(apps, schema_editor):
+    """
+    Adds columns with ALTER TABLE ... ADD COLUMN. Schema editor rebuilds tables on SQLite, which
+    drops indexes created with SQL (see migration 0003).
+    """
+
+    quote_name = schema_editor.quote_name
+
+    for name in COUNTER_FIELDS:
+        field = models.PositiveIntegerField(default=0)
+        field.set_attributes_from_name(name)
+        db_parameters = field.db_parameters(connection=schema_editor.connection)
+
+        schema_editor.execute('ALTER TABLE %s ADD COLUMN %s %s DEFAULT 0 NOT NULL%s' % (
+            quote_name('ads_folder'), quote_name(name), db_parameters['type'],
+            ' CHECK (%s)' % db_parameters['check'] if db_parameters['check'] else ''
+        ))
+
+
+def drop_counter_columns(apps, schema_editor):
+    for name in COUNTER_FIELDS:
+        schema_editor.execute('ALTER TABLE %s DROP COLUMN %s' % (
+            schema_editor.quote_name('ads_folder'), schema_editor.quote_name(name)
+        ))
+
+
+def compute_counters(apps, schema_editor):
+    """
+    Computes counters of existing folders. Copy of ads.counters.repair_counters at the time of
+    migration, so that migration doesn't depend on current code.
+    """
+
+    Folder = apps.get_model('ads', 'Folder')
+    Ad = apps.get_model('ads', 'Ad')
+
+    folders = list(Folder.objects.order_by('-depth').values_list('pk', 'parent_id', 'is_active'))
+    ad_counts = dict(Ad.objects.filter(is_active=True).values('folder').annotate(
+        count=Count('pk')
+    ).order_by().values_list('folder', 'count'))
+    counters = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+
+    # Folders are processed from the deepest level up, so that totals of sub-folders are known.
+    for pk, parent_id, is_active in folders:
+        folder_counters = counters[pk]
+        folder_counters['active_ad_count'] = ad_counts.get(pk, 0)
+        folder_counters['total_active_ad_count'] += folder_counters['active_ad_count']
+
+        if is_active and parent_id is not None:
+            parent_counters = counters[parent_id]
+            parent_counters['active_child_count'] += 1
+            parent_counters['total_active_child_count'] += (
+                1 + folder_counters['total_active_child_count']
+            )
+            parent_counters['total_active_ad_count'] += folder_counters['total_active_ad_count']
+
+    # New columns are zero, so only folders with non-zero counters are written.
+    for pk, _, _ in folders:
+        if any(counters[pk].values()):
+            Folder.objects.filter(pk=pk).update(**counters[pk])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0003_active_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(add_counter_columns, drop_counter_columns),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='folder',
+                    name='active_ad_count',
+                    field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of active ads in folder.'),
+                ),
+                migrations.AddField(
+                    model_name='folder',
+                    name='active_child_count',
+                    field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of active sub-folders.'),
+                ),
+                migrations.AddField(
+                    model_name='folder',
+                    name='total_active_ad_count',
+                    field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of active ads in subtree.'),
+                ),
+                migrations.AddField(
+                    model_name='folder',
+                    name='total_active_child_count',
+                    field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of active folders in subtree.'),
+                ),
+            ],
+        ),
+        migrations.RunPython(compute_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import sqlite3
+
+from django.db import migrations
+
+
+# (index name, table, column) of trigram indexes for search. Indexes are partial (WHERE is_active)
+# and on UPPER(column), which is compared by icontains lookups on PostgreSQL.
+TRIGRAM_INDEXES = (
+    ('ads_folder_name_trgm', 'ads_folder', 'name'),
+    ('ads_ad_name_trgm', 'ads_ad', 'name'),
+    ('ads_ad_ad_url_trgm', 'ads_ad', 'ad_url'),
+)
+
+# (FTS5 table, indexed table, columns) of SQLite search tables. Rowid of search table is id of
+# record. Tables contain active records only and are kept in sync with triggers, so that bulk
+# updates are reflected as well.
+SEARCH_TABLES = (
+    ('ads_folder_search', 'ads_folder', ('name',)),
+    ('ads_ad_search', 'ads_ad', ('name', 'ad_url')),
+)
+
+SEARCH_TRIGGERS = (
+    ('insert', 'AFTER INSERT ON %(table)s WHEN NEW.is_active BEGIN '
+               'INSERT INTO %(search_table)s(rowid, %(columns)s) VALUES (NEW.id, %(new_columns)s); '
+               'END'),
+    ('update', 'AFTER UPDATE OF %(columns)s, is_active ON %(table)s BEGIN '
+               'DELETE FROM %(search_table)s WHERE rowid = OLD.id; '
+               'INSERT INTO %(search_table)s(rowid, %(columns)s) '
+               'SELECT NEW.id, %(new_columns)s WHERE NEW.is_active; END'),
+    ('delete', 'AFTER DELETE ON %(table)s BEGIN '
+               'DELETE FROM %(search_table)s WHERE rowid = OLD.id; END'),
+)
+
+
+def has_search_tables(connection):
+    """
+    Returns whether SQLite FTS5 search tables with trigram tokenizer are used on connection. Copy
+    of ads.search.has_search_tables at the time of migration, so that migration doesn't depend on
+    current code.
+    """
+
+    return connection.vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34)
+
+
+def create_search_indexes(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, column in TRIGRAM_INDEXES:
+            schema_editor.execute(
+                'CREATE INDEX %s ON %s USING gin (UPPER(%s::text) gin_trgm_ops) WHERE %s' % (
+                    quote_name(name), quote_name(table), quote_name(column), quote_name('is_active')
+                )
+            )
+
+    elif has_search_tables(schema_editor.connection):
+        for search_table, table, columns in SEARCH_TABLES:
+            values = {
+                'search_table': quote_name(search_table),
+                'table': quote_name(table),
+                'columns': ', '.join(quote_name(column) for column in columns),
+                'new_columns': ', '.join('NEW.%s' % quote_name(column) for column in columns),
+            }
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE %(search_table)s USING fts5(%(columns)s, tokenize='trigram')"
+                % values
+            )
+            schema_editor.execute(
+                'INSERT INTO %(search_table)s(rowid, %(columns)s) '
+                'SELECT id, %(columns)s FROM %(table)s WHERE is_active' % values
+            )
+            for event, statement in SEARCH_TRIGGERS:
+                schema_editor.execute('CREATE TRIGGER %s %s' % (
+                    quote_name('%s_%s' % (search_table, event)), statement % values
+                ))
+
+
+def drop_search_indexes(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, _, _ in TRIGRAM_INDEXES:
+            schema_editor.execute('DROP INDEX %s' % quote_name(name))
+
+    elif has_search_tables(schema_editor.connection):
+        for search_table, _, _ in SEARCH_TABLES:
+            for event, _ in SEARCH_TRIGGERS:
+                schema_editor.execute(
+                    'DROP TRIGGER %s' % quote_name('%s_%s' % (search_table, event))
+                )
+            schema_editor.execute('DROP TABLE %s' % quote_name(search_table))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0004_folder_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
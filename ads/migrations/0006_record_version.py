@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+TABLES = ('ads_folder', 'ads_ad')
+
+
+def get_version_field():
+    field = models.PositiveIntegerField(default=1)
+    field.set_attributes_from_name('version')
+    return field
+
+
+def add_version_columns(apps, schema_editor):
+    """
+    Adds columns with ALTER TABLE ... ADD COLUMN. Schema editor rebuilds tables on SQLite, which
+    drops indexes and triggers created with SQL (see migrations 0003 and 0005).
+    """
+
+    quote_name = schema_editor.quote_name
+    db_parameters = get_version_field().db_parameters(connection=schema_editor.connection)
+
+    for table in TABLES:
+        schema_editor.execute('ALTER TABLE %s ADD COLUMN %s %s DEFAULT 1 NOT NULL%s' % (
+            quote_name(table), quote_name('version'), db_parameters['type'],
+            ' CHECK (%s)' % db_parameters['check'] if db_parameters['check'] else ''
+        ))
+
+
+def drop_version_columns(apps, schema_editor):
+    for table in TABLES:
+        schema_editor.execute('ALTER TABLE %s DROP COLUMN %s' % (
+            schema_editor.quote_name(table), schema_editor.quote_name('version')
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0005_search_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(add_version_columns, drop_version_columns),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='folder',
+                    name='version',
+                    field=models.PositiveIntegerField(default=1, editable=False, help_text='Version of record. Increased by every update.'),
+                ),
+                migrations.AddField(
+                    model_name='ad',
+                    name='version',
+                    field=models.PositiveIntegerField(default=1, editable=False, help_text='Version of record. Increased by every update.'),
+                ),
+            ],
+        ),
+    ]
@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connection, models
+from django.db.models import Case, F, Max, Q, Value, When
+from django.db.models.functions import Concat, Length, Substr
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from . import const
+from .cache import folder_tree_cache
+from core.cache import atomic
 from core.models import IsActiveModel, BaseTimeModel
 
 
@@ -13,6 +20,35 @@ class Folder(IsActiveModel, BaseTimeModel):
         'self', null=True, blank=True, related_name='children',
         help_text='Reference to parent folder.'
     )
+    # Tree index (materialized path). Maintained by save(), never set directly. Length of path
+    # limits depth of tree (e.g. about 290 levels with 6-digit ids), which is validated by clean().
+    path = models.CharField(
+        max_length=2048, blank=True, default='', editable=False, db_index=True,
+        help_text='Ids of all ancestor folders from root down, e.g. "1/5/". Empty for root folder.'
+    )
+    depth = models.PositiveIntegerField(
+        default=0, editable=False, help_text='Number of ancestor folders.'
+    )
+    # Counters of active records. Maintained by save() of folders and ads, never set directly.
+    # Total counters include records in sub-folders, which are reachable through active folders.
+    active_child_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text='Number of active sub-folders.'
+    )
+    active_ad_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text='Number of active ads in folder.'
+    )
+    total_active_child_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text='Number of active folders in subtree.'
+    )
+    total_active_ad_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text='Number of active ads in subtree.'
+    )
+
+    tracked_fields = ('parent_id', 'path', 'is_active')
+    counter_fields = (
+        'active_child_count', 'active_ad_count', 'total_active_child_count', 'total_active_ad_count'
+    )
+    invalidated_caches = (folder_tree_cache,)
 
     class Meta:
         ordering = ('name',)
@@ -20,6 +56,73 @@ class Folder(IsActiveModel, BaseTimeModel):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Keeps tree index of folder and all of it's descendants in sync with folder parent and
+        counters of ancestors in sync with folder activity.
+        """
+
+        adding = self._state.adding
+        moved = not adding and self.has_changed('parent_id')
+        activity_changed = not adding and self.has_changed('is_active')
+        was_active = not adding and self.get_tracked_value('is_active')
+
+        if not adding and kwargs.get('update_fields') is None:
+            # Tree index and counters of instance may be stale (e.g. ancestor could have been moved
+            # in the meantime), so tree index is written only when folder is created or moved and
+            # counters are never written.
+            excluded_fields = self.counter_fields + (() if moved else ('path', 'depth'))
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in excluded_fields
+            ]
+
+        with atomic():
+            if adding:
+                self._set_tree_position()
+                result = super().save(*args, **kwargs)
+                if self.is_active:
+                    Folder.update_counters(self.ancestor_ids, active_children=1)
+                return result
+
+            if not moved and not activity_changed:
+                return super().save(*args, **kwargs)
+
+            # Current position and counters are read again, because values loaded with instance
+            # may be stale.
+            old_path, old_depth, num_children, num_ads = Folder.objects.select_for_update(
+            ).values_list('path', 'depth', 'total_active_child_count', 'total_active_ad_count').get(
+                pk=self.pk
+            )
+            old_subtree_path = '%s%s/' % (old_path, self.pk)
+            if moved:
+                self._set_tree_position()
+            result = super().save(*args, **kwargs)
+
+            if moved:
+                Folder.objects.filter(path__startswith=old_subtree_path).update(
+                    path=Concat(
+                        Value(self.subtree_path), Substr('path', len(old_subtree_path) + 1)
+                    ),
+                    depth=F('depth') + (self.depth - old_depth)
+                )
+
+            # Folder and it's active subtree is removed from counters of old ancestors and added
+            # to counters of new ancestors.
+            if was_active:
+                Folder.update_counters(
+                    Folder.parse_path(old_path), active_children=-1,
+                    total_active_children=-1 - num_children, total_active_ads=-num_ads
+                )
+            if self.is_active:
+                Folder.update_counters(
+                    self.ancestor_ids, active_children=1,
+                    total_active_children=1 + num_children, total_active_ads=num_ads
+                )
+            folder_tree_cache.invalidate()
+
+        return result
+
     def clean(self):
         """Additional model validations."""
 
@@ -27,6 +130,16 @@ class Folder(IsActiveModel, BaseTimeModel):
         if self.parent == self:
             raise ValidationError({'parent': const.MSG_FOLDER_CANT_BE_PARENT_TO_ITSELF})
 
+        # Validates if folder is moved to one of it's descendants.
+        if self.pk and self.parent is not None and self.parent.path.startswith(
+                '%s%s/' % (self.get_tracked_value('path'), self.pk)):
+            raise ValidationError({'parent': const.MSG_FOLDER_CANT_BE_MOVED_TO_DESCENDANT})
+
+        # Validates if paths of folder and it's subtree fit into tree index on create or move.
+        if self.parent is not None and (self._state.adding or self.has_changed('parent_id')):
+            if self._get_longest_subtree_path() > self._meta.get_field('path').max_length:
+                raise ValidationError({'parent': const.MSG_FOLDER_TREE_TOO_DEEP})
+
         # Validations for root folder
         if self.is_root:
             root_folders = Folder.objects.active().filter(parent=None)
@@ -54,6 +167,147 @@ class Folder(IsActiveModel, BaseTimeModel):
 
         return self.is_root and self.is_active
 
+    @property
+    def subtree_path(self):
+        """Path prefix shared by all descendants of this folder."""
+
+        return '%s%s/' % (self.path, self.pk)
+
+    @property
+    def ancestor_ids(self):
+        """Ids of ancestor folders ordered from root down. Doesn't perform any queries."""
+
+        return Folder.parse_path(self.path)
+
+    @staticmethod
+    def parse_path(path):
+        """Returns ids of folders in tree index path."""
+
+        return [int(pk) for pk in path.split('/') if pk]
+
+    def get_ancestors(self):
+        """Returns queryset of ancestor folders ordered from root down."""
+
+        return Folder.objects.filter(pk__in=self.ancestor_ids).order_by('depth')
+
+    def get_descendants(self):
+        """Returns queryset of all folders in subtree of this folder (excluding this folder)."""
+
+        return Folder.objects.filter(path__startswith=self.subtree_path)
+
+    @classmethod
+    def get_structure_version(cls, pk):
+        """
+        Returns the latest modification time and the number of records (folder, it's ancestors,
+        sub-folders and ads) which make folder structure. Inactive records are included, so that
+        deactivations are reflected. Uses one aggregate query.
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'WITH RECURSIVE ancestors(id, parent_id, time_modified) AS ('
+                '  SELECT id, parent_id, time_modified FROM {folder} WHERE id = %s'
+                '  UNION ALL'
+                '  SELECT folder.id, folder.parent_id, folder.time_modified'
+                '    FROM {folder} folder JOIN ancestors ON folder.id = ancestors.parent_id'
+                ')'
+                'SELECT MAX(time_modified), COUNT(*) FROM ('
+                '  SELECT time_modified FROM ancestors'
+                '  UNION ALL'
+                '  SELECT time_modified FROM {folder} WHERE parent_id = %s'
+                '  UNION ALL'
+                '  SELECT time_modified FROM {ad} WHERE folder_id = %s'
+                ') structure'.format(folder=cls._meta.db_table, ad=Ad._meta.db_table),
+                [pk, pk, pk]
+            )
+            last_modified, count = cursor.fetchone()
+
+        # Raw queries aren't converted by backend (e.g. SQLite returns text in UTC).
+        if isinstance(last_modified, str):
+            last_modified = parse_datetime(last_modified)
+        if last_modified and settings.USE_TZ and timezone.is_naive(last_modified):
+            last_modified = timezone.make_aware(last_modified, timezone.utc)
+
+        return last_modified, count
+
+    @classmethod
+    def update_counters(cls, folder_ids, active_children=0, active_ads=0,
+                        total_active_children=None, total_active_ads=None):
+        """
+        Adds deltas to direct counters of the last folder in 'folder_ids' and to total counters of
+        all folders in 'folder_ids' (folder and it's ancestors). Total deltas default to direct
+        deltas. Counters are updated with F-expressions in one query, so concurrent updates aren't
+        lost. Modification time is updated as well, so that validators of responses change.
+        """
+
+        if not folder_ids:
+            return
+
+        total_deltas = (
+            ('total_active_child_count',
+             active_children if total_active_children is None else total_active_children),
+            ('total_active_ad_count', active_ads if total_active_ads is None else total_active_ads),
+        )
+        updates = {field: F(field) + delta for field, delta in total_deltas if delta}
+
+        for field, delta in (('active_child_count', active_children),
+                             ('active_ad_count', active_ads)):
+            if delta:
+                updates[field] = Case(
+                    When(pk=folder_ids[-1], then=F(field) + delta), default=F(field),
+                    output_field=models.PositiveIntegerField()
+                )
+
+        if updates:
+            cls.objects.filter(pk__in=folder_ids).update(time_modified=timezone.now(), **updates)
+
+    def deactivate_subtree(self):
+        """
+        Deactivates folder together with all of it's sub-folders and their ads. Number of queries
+        doesn't depend on size of subtree. Returns number of deactivated folders and ads.
+        """
+
+        now = timezone.now()
+
+        with atomic():
+            self.deactivate()
+            num_ads = Ad.objects.active().filter(
+                Q(folder=self) | Q(folder__path__startswith=self.subtree_path)
+            ).update(is_active=False, time_modified=now, version=F('version') + 1)
+            num_folders = self.get_descendants().active().update(
+                is_active=False, time_modified=now, version=F('version') + 1
+            )
+            # Counters of ancestors are updated by deactivate(). Subtree has no active records.
+            Folder.objects.filter(Q(pk=self.pk) | Q(path__startswith=self.subtree_path)).update(
+                **{field: 0 for field in self.counter_fields}
+            )
+
+        folder_tree_cache.invalidate()
+
+        return num_folders + 1, num_ads
+
+    def _get_longest_subtree_path(self):
+        """Returns length of the longest path in subtree of folder under it's (new) parent."""
+
+        new_path = self.parent.subtree_path
+        if self._state.adding:
+            return len(new_path)
+
+        old_path = self.get_tracked_value('path')
+        longest = Folder.objects.filter(
+            path__startswith='%s%s/' % (old_path, self.pk)
+        ).aggregate(longest=Max(Length('path')))['longest']
+
+        return len(new_path) + max((longest or 0) - len(old_path), 0)
+
+    def _set_tree_position(self):
+        """Sets path and depth of folder according to it's parent."""
+
+        if self.parent is None:
+            self.path, self.depth = '', 0
+        else:
+            self.path, self.depth = self.parent.subtree_path, self.parent.depth + 1
+
 
 class Ad(IsActiveModel, BaseTimeModel):
     """Represents ad. One ad belongs to one folder."""
@@ -64,12 +318,34 @@ class Ad(IsActiveModel, BaseTimeModel):
         Folder, related_name='ads', help_text='Folder to which ad belongs to.'
     )
 
+    tracked_fields = ('folder_id', 'is_active')
+    invalidated_caches = (folder_tree_cache,)
+
     class Meta:
         ordering = ('name',)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Keeps counters of folders in sync with folder and activity of ad."""
+
+        adding = self._state.adding
+        old_folder_id = None if adding else self.get_tracked_value('folder_id')
+        was_active = not adding and self.get_tracked_value('is_active')
+        moved = old_folder_id != self.folder_id
+
+        with atomic():
+            result = super().save(*args, **kwargs)
+
+            if was_active and (moved or not self.is_active):
+                old_path = Folder.objects.values_list('path', flat=True).get(pk=old_folder_id)
+                Folder.update_counters(Folder.parse_path(old_path) + [old_folder_id], active_ads=-1)
+            if self.is_active and (moved or not was_active):
+                Folder.update_counters(self.folder.ancestor_ids + [self.folder_id], active_ads=1)
+
+        return result
+
     def clean(self):
         """Additional model validations."""
 
@@ -0,0 +1,75 @@
+import sqlite3
+
+from django.db import connections
+from django.db.models import Q
+
+from .models import Ad, Folder
+
+
+# Minimal length of query, which can be matched with trigram indexes.
+MIN_QUERY_LENGTH = 3
+
+# Searched fields of models and SQLite FTS5 tables indexing them (rowid is id of record).
+SEARCHED_FIELDS = {
+    Folder: ('name',),
+    Ad: ('name', 'ad_url'),
+}
+SEARCH_TABLES = {
+    Folder: 'ads_folder_search',
+    Ad: 'ads_ad_search',
+}
+
+
+def has_search_tables(connection):
+    """Returns whether SQLite FTS5 search tables with trigram tokenizer are used on connection."""
+
+    return connection.vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34)
+
+
+def filter_matching(queryset, query):
+    """
+    Filters active records of queryset whose searched fields contain query (case-insensitive). On
+    PostgreSQL the lookups use trigram GIN indexes on UPPER(field), on SQLite the query is matched
+    against FTS5 table with trigram tokenizer.
+    """
+
+    model = queryset.model
+    connection = connections[queryset.db]
+
+    if has_search_tables(connection) and len(query) >= MIN_QUERY_LENGTH:
+        quote_name = connection.ops.quote_name
+        # Search table contains active records only. Without condition on 'is_active' SQLite
+        # doesn't scan index of active records by name, but starts from matching records.
+        return queryset.extra(
+            where=['%s.%s IN (SELECT rowid FROM %s WHERE %s MATCH %%s)' % (
+                quote_name(model._meta.db_table), quote_name(model._meta.pk.column),
+                quote_name(SEARCH_TABLES[model]), quote_name(SEARCH_TABLES[model])
+            )],
+            # Query is matched as phrase, so that it is matched as substring.
+            params=['"%s"' % query.replace('"', '""')]
+        )
+
+    condition = Q()
+    for field in SEARCHED_FIELDS[model]:
+        condition |= Q(**{'%s__icontains' % field: query})
+
+    return queryset.active().filter(condition)
+
+
+def search(query, folder=None):
+    """
+    Returns list of ('folder', queryset) and ('ad', queryset) pairs of active folders and ads
+    matching query. Results can be limited to subtree of folder.
+    """
+
+    folders = filter_matching(Folder.objects.all(), query)
+    ads = filter_matching(Ad.objects.all(), query)
+
+    if folder is not None:
+        folders = folders.filter(path__startswith=folder.subtree_path)
+        # Folders of subtree are selected with subquery, so ads aren't joined with folders.
+        ads = ads.filter(folder__in=Folder.objects.filter(
+            Q(pk=folder.pk) | Q(path__startswith=folder.subtree_path)
+        ).values('pk'))
+
+    return [('folder', folders), ('ad', ads)]
@@ -1,6 +1,10 @@
+from collections import OrderedDict
+
 from rest_framework import serializers
 
+from . import const
 from .models import Folder, Ad
+from core.serializers import ValuesSerializer
 
 
 class FolderSerializer(serializers.ModelSerializer):
@@ -8,7 +12,7 @@ class FolderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Folder
-        fields = ('pk', 'url', 'name', 'parent')
+        fields = ('pk', 'url', 'name', 'parent', 'version')
         # Limits parent folders to active folders.
         extra_kwargs = {
             'parent': {'queryset': Folder.objects.active()}
@@ -20,13 +24,35 @@ class AdSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ad
-        fields = ('pk', 'url', 'name', 'ad_url', 'folder')
+        fields = ('pk', 'url', 'name', 'ad_url', 'folder', 'version')
         # Limits folders to active folders.
         extra_kwargs = {
             'folder': {'queryset': Folder.objects.active()}
         }
 
 
+class AdBulkSerializer(serializers.ModelSerializer):
+    """
+    Ad serializer for bulk create and update. Ads with 'pk' are updated, others are created. Folder
+    is validated as plain id, because activity of folders is checked for all ads at once. Updated
+    ads have to contain version of ad, which client changes.
+    """
+
+    pk = serializers.IntegerField(required=False)
+    folder = serializers.IntegerField()
+    version = serializers.IntegerField(required=False, min_value=1)
+
+    class Meta:
+        model = Ad
+        fields = ('pk', 'name', 'ad_url', 'folder', 'version')
+
+    def validate(self, attrs):
+        if 'pk' in attrs and 'version' not in attrs:
+            raise serializers.ValidationError({'version': [const.MSG_BULK_VERSION_REQUIRED]})
+
+        return attrs
+
+
 class FolderRelatedSerializer(serializers.HyperlinkedModelSerializer):
     """Serializer for related folder field."""
 
@@ -36,6 +62,13 @@ class FolderRelatedSerializer(serializers.HyperlinkedModelSerializer):
         extra_kwargs = {'url': {'view_name': 'folder-ad-detail'}}
 
 
+class FolderChildSerializer(FolderRelatedSerializer):
+    """Serializer for child folder field. Contains counters of active sub-folders and ads."""
+
+    class Meta(FolderRelatedSerializer.Meta):
+        fields = FolderRelatedSerializer.Meta.fields + Folder.counter_fields
+
+
 class AdRelatedSerializer(serializers.HyperlinkedModelSerializer):
     """Serializer for related ad field."""
 
@@ -45,32 +78,99 @@ class AdRelatedSerializer(serializers.HyperlinkedModelSerializer):
 
 
 class FolderAdSerializer(serializers.HyperlinkedModelSerializer):
-    """Serializer for folder structure. Contains folder children and ads."""
+    """
+    Serializer for folder structure. Contains folder ancestors (from root down), children and ads.
+    Active children and ads have to be prefetched to attributes 'active_children' and 'active_ads'.
+    """
 
     parent = FolderRelatedSerializer()
-    children = serializers.SerializerMethodField('filter_active_folders')
-    ads = serializers.SerializerMethodField('filter_active_ads')
+    ancestors = FolderRelatedSerializer(source='get_ancestors', many=True)
+    children = FolderChildSerializer(source='active_children', many=True)
+    ads = AdRelatedSerializer(source='active_ads', many=True)
 
     class Meta:
         model = Folder
-        fields = ('pk', 'name', 'parent', 'children', 'ads')
+        fields = ('pk', 'name', 'parent', 'ancestors', 'children', 'ads')
         extra_kwargs = {'url': {'view_name': 'folder-ad-detail'}}
 
-    def _get_serialized_data(self, serializer_class, instance):
-        """Helper function for data serialization."""
 
-        serializer = serializer_class(
-            instance, context={'request': self.context['request']}, many=True
-        )
+class FolderReadSerializer(ValuesSerializer):
+    """Read-only equivalent of FolderSerializer for rows from QuerySet.values()."""
+
+    fields = ('pk', 'url', 'name', 'parent', 'version')
+    view_name = 'folder-detail'
+
+
+class AdReadSerializer(ValuesSerializer):
+    """Read-only equivalent of AdSerializer for rows from QuerySet.values()."""
+
+    fields = ('pk', 'url', 'name', 'ad_url', 'folder', 'version')
+    view_name = 'ad-detail'
+
+
+class FolderRelatedReadSerializer(ValuesSerializer):
+    """Read-only equivalent of FolderRelatedSerializer for rows from QuerySet.values()."""
+
+    fields = ('pk', 'url', 'name')
+    view_name = 'folder-ad-detail'
+
+
+class FolderChildReadSerializer(FolderRelatedReadSerializer):
+    """Read-only equivalent of FolderChildSerializer for rows from QuerySet.values()."""
+
+    fields = FolderRelatedReadSerializer.fields + Folder.counter_fields
+
+
+class AdRelatedReadSerializer(ValuesSerializer):
+    """Read-only equivalent of AdRelatedSerializer for rows from QuerySet.values()."""
+
+    fields = ('ad_url', 'name')
+
+
+class FolderAdReadSerializer(ValuesSerializer):
+    """
+    Read-only equivalent of FolderAdSerializer for rows from QuerySet.values(). Ancestors (from
+    tree index), active children and ads of all serialized folders are read with one query each.
+    """
+
+    fields = ('pk', 'name', 'parent', 'ancestors', 'children', 'ads')
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.folder_serializer = FolderRelatedReadSerializer(request)
+        self.child_serializer = FolderChildReadSerializer(request)
+        self.ad_serializer = AdRelatedReadSerializer(request)
 
-        return serializer.data
+    def get_values_fields(self):
+        return ['pk', 'name', 'parent', 'parent__name', 'path']
 
-    def filter_active_folders(self, obj):
-        """Filter for active folders. Needed for related field 'children'."""
+    def serialize(self, rows):
+        rows = list(rows)
+        pks = [row['pk'] for row in rows]
+        children, ads = {pk: [] for pk in pks}, {pk: [] for pk in pks}
+        ancestor_ids = {row['pk']: Folder.parse_path(row['path']) for row in rows}
 
-        return self._get_serialized_data(FolderRelatedSerializer, obj.children.active())
+        ancestors = {
+            ancestor['pk']: self.folder_serializer.to_representation(ancestor)
+            for ancestor in Folder.objects.filter(
+                pk__in={pk for ids in ancestor_ids.values() for pk in ids}
+            ).order_by().values(*self.folder_serializer.get_values_fields())
+        } if any(ancestor_ids.values()) else {}
 
-    def filter_active_ads(self, obj):
-        """Filter for active ads. Needed for related field 'ads'."""
+        for child in Folder.objects.active().filter(parent__in=pks).values(
+                'parent', *self.child_serializer.get_values_fields()):
+            children[child['parent']].append(self.child_serializer.to_representation(child))
+        for ad in Ad.objects.active().filter(folder__in=pks).values(
+                'folder', *self.ad_serializer.get_values_fields()):
+            ads[ad['folder']].append(self.ad_serializer.to_representation(ad))
 
-        return self._get_serialized_data(AdRelatedSerializer, obj.ads.active())
+        return [OrderedDict((
+            ('pk', row['pk']),
+            ('name', row['name']),
+            ('parent', None if row['parent'] is None else self.folder_serializer.to_representation(
+                {'pk': row['parent'], 'name': row['parent__name']}
+            )),
+            ('ancestors', [ancestors[pk] for pk in ancestor_ids[row['pk']]]),
+            ('children', children[row['pk']]),
+            ('ads', ads[row['pk']]),
+        )) for row in rows]
@@ -0,0 +1,225 @@
+import json
+import os
+import sys
+import tempfile
+import uuid
+from array import array
+from collections import OrderedDict
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .export import iter_chunked
+from .models import Ad, Folder
+from core.utils import get_batch_size, in_batches
+
+
+# Version of snapshot file format. Snapshots of other formats can't be loaded.
+SNAPSHOT_FORMAT = 1
+
+
+def build_snapshot():
+    """
+    Returns snapshot of active folders (and their inactive ancestors) and active ads of active
+    folders as dictionary of columns. Strings are stored once in 'strings' and referenced by index.
+    Folders and ads are ordered by name as in database, so that their order in snapshot is the
+    same as in API. Parent of folder and folder of ad are referenced by index of folder.
+    """
+
+    strings, string_indexes = [], {}
+
+    def intern(value):
+        if value not in string_indexes:
+            string_indexes[value] = len(strings)
+            strings.append(value)
+        return string_indexes[value]
+
+    folder_fields = ('pk', 'name', 'parent', 'path', 'is_active') + Folder.counter_fields
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # All queries have to see the same state of database.
+            connection.cursor().execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+
+        folders = list(iter_chunked(Folder.objects.active(), folder_fields, ('name', 'pk')))
+        # Inactive ancestors of active folders are needed for ancestors of folder structures.
+        folder_pks = {folder['pk'] for folder in folders}
+        missing_pks = {
+            pk for folder in folders for pk in Folder.parse_path(folder['path'])
+        } - folder_pks
+        for batch in in_batches(missing_pks, get_batch_size(1, missing_pks)):
+            folders.extend(Folder.objects.filter(pk__in=batch).values(*folder_fields))
+
+        ads = list(iter_chunked(
+            Ad.objects.active().filter(folder__is_active=True), ('pk', 'name', 'ad_url', 'folder'),
+            ('name', 'pk')
+        ))
+
+    folder_indexes = {folder['pk']: i for i, folder in enumerate(folders)}
+    snapshot = OrderedDict((
+        ('format', SNAPSHOT_FORMAT),
+        ('version', uuid.uuid4().hex[:16]),
+        ('created', timezone.now().isoformat()),
+        ('folder_pk', [folder['pk'] for folder in folders]),
+        ('folder_name', [intern(folder['name']) for folder in folders]),
+        ('folder_parent', [
+            -1 if folder['parent'] is None else folder_indexes[folder['parent']]
+            for folder in folders
+        ]),
+        ('folder_active', [int(folder['is_active']) for folder in folders]),
+    ))
+    for field in Folder.counter_fields:
+        snapshot['folder_%s' % field] = [folder[field] for folder in folders]
+    snapshot.update((
+        ('ad_name', [intern(ad['name']) for ad in ads]),
+        ('ad_url', [intern(ad['ad_url']) for ad in ads]),
+        ('ad_folder', [folder_indexes[ad['folder']] for ad in ads]),
+        ('strings', strings),
+    ))
+
+    return snapshot
+
+
+def write_snapshot(snapshot, path):
+    """
+    Writes snapshot to file atomically. Snapshot is written to temporary file in the same directory,
+    which then replaces the file, so that readers never see partially written snapshot.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+
+    try:
+        with open(file_descriptor, 'w', encoding='utf-8') as snapshot_file:
+            json.dump(snapshot, snapshot_file, ensure_ascii=False, separators=(',', ':'))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def build_csr(groups, num_groups):
+    """
+    Returns CSR (compressed sparse row) offsets and items of items grouped by group index (-1 if
+    item doesn't belong to any group). Items of group i are items[offsets[i]:offsets[i + 1]] in
+    their original order.
+    """
+
+    offsets = array('l', [0]) * (num_groups + 1)
+    for group in groups:
+        if group >= 0:
+            offsets[group + 1] += 1
+    for i in range(num_groups):
+        offsets[i + 1] += offsets[i]
+
+    positions = array('l', offsets)
+    items = array('l', [0]) * offsets[-1]
+    for item, group in enumerate(groups):
+        if group >= 0:
+            items[positions[group]] = item
+            positions[group] += 1
+
+    return offsets, items
+
+
+class Snapshot():
+    """
+    Read-only in-memory folder tree loaded from snapshot file. Folders and ads are stored in arrays
+    (parent indexes, CSR lists of children and ads) and their strings are interned, so that tree
+    takes little memory. Returns the same folder structure as FolderAdReadSerializer.
+    """
+
+    def __init__(self, data):
+        if data.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError('Unsupported snapshot format %s.' % data.get('format'))
+
+        self.version = data['version']
+        self.strings = [sys.intern(string) for string in data['strings']]
+        self.folder_pks = array('q', data['folder_pk'])
+        self.folder_names = array('l', data['folder_name'])
+        self.folder_parents = array('l', data['folder_parent'])
+        self.folder_active = array('b', data['folder_active'])
+        self.folder_counters = [
+            (field, array('l', data['folder_%s' % field])) for field in Folder.counter_fields
+        ]
+        self.ad_names = array('l', data['ad_name'])
+        self.ad_urls = array('l', data['ad_url'])
+        self.folder_indexes = {pk: i for i, pk in enumerate(self.folder_pks)}
+
+        num_folders = len(self.folder_pks)
+        self.child_offsets, self.children = build_csr([
+            parent if active else -1
+            for parent, active in zip(self.folder_parents, self.folder_active)
+        ], num_folders)
+        self.ad_offsets, self.ads = build_csr(data['ad_folder'], num_folders)
+        self.root = next((
+            i for i in range(num_folders)
+            if self.folder_parents[i] == -1 and self.folder_active[i]
+        ), None)
+
+    @classmethod
+    def load(cls, path):
+        """Loads snapshot from file."""
+
+        with open(path, encoding='utf-8') as snapshot_file:
+            return cls(json.load(snapshot_file))
+
+    @property
+    def num_folders(self):
+        return len(self.folder_pks)
+
+    @property
+    def num_ads(self):
+        return len(self.ads)
+
+    def get_root_pk(self):
+        """Returns pk of active root folder or None if it doesn't exist."""
+
+        return None if self.root is None else self.folder_pks[self.root]
+
+    def _folder_related(self, i, url_template):
+        return OrderedDict((
+            ('pk', self.folder_pks[i]),
+            ('url', url_template.format(self.folder_pks[i])),
+            ('name', self.strings[self.folder_names[i]]),
+        ))
+
+    def get_folder_structure(self, pk, url_template):
+        """
+        Returns structure of active folder (the same as FolderAdReadSerializer) or None if folder
+        doesn't exist. 'url_template' formats urls of folders (see core.serializers.UrlTemplate).
+        """
+
+        i = self.folder_indexes.get(pk)
+        if i is None or not self.folder_active[i]:
+            return None
+
+        ancestors = []
+        parent = self.folder_parents[i]
+        while parent != -1:
+            ancestors.append(self._folder_related(parent, url_template))
+            parent = self.folder_parents[parent]
+        ancestors.reverse()
+
+        children = []
+        for child in self.children[self.child_offsets[i]:self.child_offsets[i + 1]]:
+            child_data = self._folder_related(child, url_template)
+            child_data.update((field, counters[child]) for field, counters in self.folder_counters)
+            children.append(child_data)
+
+        return OrderedDict((
+            ('pk', pk),
+            ('name', self.strings[self.folder_names[i]]),
+            ('parent', ancestors[-1] if ancestors else None),
+            ('ancestors', ancestors),
+            ('children', children),
+            ('ads', [
+                OrderedDict((
+                    ('ad_url', self.strings[self.ad_urls[ad]]),
+                    ('name', self.strings[self.ad_names[ad]]),
+                ))
+                for ad in self.ads[self.ad_offsets[i]:self.ad_offsets[i + 1]]
+            ]),
+        ))
@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+from http.client import responses
+
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.http.request import split_domain_port, validate_host
+
+from rest_framework.renderers import JSONRenderer
+
+from . import const as msg
+from .snapshot import Snapshot
+from core.serializers import UrlTemplate
+
+
+logger = logging.getLogger(__name__)
+
+# Number of rendered folder structures kept in memory. Cache is dropped on reload.
+RENDER_CACHE_SIZE = 1000
+# Requests with longer lines (request line or header) are rejected.
+MAX_LINE_LENGTH = 8192
+
+# Loaded snapshot with cache of its rendered folder structures. Both are replaced with one
+# assignment, so that request never combines ETag of one snapshot with body of another.
+LoadedSnapshot = namedtuple('LoadedSnapshot', ('snapshot', 'render'))
+
+
+class SnapshotServer():
+    """
+    Standalone read-only HTTP server (asyncio, HTTP/1.1 with keep-alive) which serves folder
+    structures (the same responses as FolderAdView) from in-memory snapshot (ads.snapshot) instead
+    of database. Snapshot file is checked periodically and reloaded when it changes. New snapshot
+    is loaded in background and replaces the old one at once, so that requests never see partially
+    loaded snapshot.
+    """
+
+    def __init__(self, path, reload_interval=1.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._loaded = None
+        self._file_id = None
+
+        prefix, suffix = reverse(
+            'folder-ad-detail', kwargs={'pk': UrlTemplate.PK_PLACEHOLDER}
+        ).rsplit(str(UrlTemplate.PK_PLACEHOLDER), 1)
+        self._folder_url_pattern = re.compile(
+            r'^%s(\d+)%s$' % (re.escape(prefix), re.escape(suffix))
+        )
+        self._default_path = reverse('folder-ad-detail')
+        self._renderer = JSONRenderer()
+
+    @property
+    def snapshot(self):
+        """Currently served snapshot or None if it isn't loaded yet."""
+
+        loaded = self._loaded
+        return None if loaded is None else loaded.snapshot
+
+    def _get_file_id(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def reload(self):
+        """Loads snapshot file if it changed since the last load. Returns whether it was loaded."""
+
+        try:
+            file_id = self._get_file_id()
+        except FileNotFoundError:
+            return False
+        if file_id == self._file_id:
+            return False
+
+        snapshot = Snapshot.load(self.path)
+        self._loaded = LoadedSnapshot(snapshot, lru_cache(RENDER_CACHE_SIZE)(
+            lambda pk, base_url: self.render_folder_structure(snapshot, pk, base_url)
+        ))
+        self._file_id = file_id
+        logger.info(
+            'Loaded snapshot %s with %s folders and %s ads.', snapshot.version,
+            snapshot.num_folders, snapshot.num_ads
+        )
+
+        return True
+
+    async def watch(self):
+        """Reloads snapshot whenever snapshot file changes. Loading doesn't block requests."""
+
+        loop = asyncio.get_event_loop()
+
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await loop.run_in_executor(None, self.reload)
+            except Exception:
+                logger.exception('Loading of snapshot %s failed.', self.path)
+
+    def render_folder_structure(self, snapshot, pk, base_url):
+        """Returns JSON of folder structure or None if folder doesn't exist."""
+
+        data = snapshot.get_folder_structure(
+            pk, UrlTemplate('folder-ad-detail', base_url=base_url)
+        )
+
+        return None if data is None else self._renderer.render(data)
+
+    def get_host(self, headers):
+        """
+        Returns host of request or None if it isn't allowed by setting ALLOWED_HOSTS. Same as
+        HttpRequest.get_host(), which isn't used, since there is no Django request.
+        """
+
+        host = headers.get('host', 'localhost')
+        if settings.USE_X_FORWARDED_HOST and 'x-forwarded-host' in headers:
+            host = headers['x-forwarded-host']
+
+        if settings.DEBUG:
+            return host
+        domain, _ = split_domain_port(host)
+
+        return host if domain and validate_host(domain, settings.ALLOWED_HOSTS) else None
+
+    def get_base_url(self, headers):
+        """
+        Returns scheme and host of request, from which absolute urls are built, or None if host
+        isn't allowed.
+        """
+
+        host = self.get_host(headers)
+        if host is None:
+            return None
+
+        scheme = 'http'
+        if settings.SECURE_PROXY_SSL_HEADER:
+            header, value = settings.SECURE_PROXY_SSL_HEADER
+            if headers.get(header[len('HTTP_'):].replace('_', '-').lower()) == value:
+                scheme = 'https'
+
+        return '%s://%s' % (scheme, host)
+
+    def respond(self, method, path, headers):
+        """
+        Returns status, headers and body of response to request with lowercase 'headers'. Loaded
+        snapshot is read once, since it can be replaced by reload in another thread.
+        """
+
+        path = path.split('?', 1)[0]
+        match = self._folder_url_pattern.match(path)
+        loaded = self._loaded
+
+        if method not in ('GET', 'HEAD'):
+            return 405, [('Allow', 'GET, HEAD')], b''
+        if loaded is None:
+            return 503, [('Retry-After', '1')], b''
+
+        base_url = self.get_base_url(headers)
+        if base_url is None:
+            return 400, [('Content-Type', 'text/html; charset=utf-8')], \
+                b'<h1>Bad Request (400)</h1>'
+
+        if path == self._default_path:
+            root_pk = loaded.snapshot.get_root_pk()
+            if root_pk is None:
+                return 404, [('Content-Type', 'text/html; charset=utf-8')], \
+                    msg.MSG_ROOT_FOLDER_DOESNT_EXIST.encode('utf-8')
+            location = UrlTemplate('folder-ad-detail', base_url=base_url)
+            return 302, [('Location', location.format(root_pk))], b''
+
+        content_type = [('Content-Type', 'application/json')]
+        body = None
+        if match is not None:
+            body = loaded.render(int(match.group(1)), base_url)
+        if body is None:
+            return 404, content_type, self._renderer.render({'detail': 'Not found.'})
+
+        # Body contains absolute urls, so ETag depends on base url as well.
+        etag = '"%s"' % hashlib.md5(
+            ('%s:%s:%s' % (loaded.snapshot.version, base_url, path)).encode('utf-8')
+        ).hexdigest()
+        if etag in headers.get('if-none-match', ''):
+            return 304, [('ETag', etag)], b''
+
+        return 200, content_type + [('ETag', etag)], body
+
+    async def handle(self, reader, writer):
+        """Serves requests of one connection."""
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                status, response_headers, body = self.respond(method, path, headers)
+                keep_alive = version == 'HTTP/1.1' and \
+                    headers.get('connection', '').lower() != 'close' and \
+                    'content-length' not in headers and 'transfer-encoding' not in headers
+
+                response_headers += [
+                    ('Content-Length', str(len(body))),
+                    ('Connection', 'keep-alive' if keep_alive else 'close'),
+                ]
+                writer.write(('HTTP/1.1 %s %s\r\n%s\r\n' % (
+                    status, responses[status],
+                    ''.join('%s: %s\r\n' % header for header in response_headers)
+                )).encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            # Connection was closed or request line was too long.
+            pass
+        finally:
+            writer.close()
+
+    def start(self, host, port):
+        """Loads snapshot and starts server and watching of snapshot file on current event loop."""
+
+        loop = asyncio.get_event_loop()
+        self.reload()
+
+        server = loop.run_until_complete(asyncio.start_server(
+            self.handle, host, port, limit=MAX_LINE_LENGTH
+        ))
+        watcher = loop.create_task(self.watch())
+
+        return server, watcher
@@ -0,0 +1,104 @@
+'use strict';
+
+// Service worker of ad creator. App shell is precached and responses of app shell and folder
+// structures are served from cache and updated in background (stale-while-revalidate).
+
+// Version changes with urls of static files, so that caches of previous versions are deleted.
+var SHELL_CACHE = 'ad-creator-shell-{{ version }}';
+var FOLDER_CACHE = 'ad-creator-folders-{{ version }}';
+// Number of folder structures kept in cache. The oldest entries are deleted first.
+var FOLDER_CACHE_SIZE = {{ folder_cache_size }};
+
+var SHELL_URLS = [
+    '{% url "ad-creator" %}'{% for url in shell_urls %},
+    '{{ url }}'{% endfor %}
+];
+var FOLDER_AD_PATH = '{% url "folder-ad-detail" %}';
+
+self.addEventListener('install', function (event) {
+    event.waitUntil(caches.open(SHELL_CACHE).then(function (cache) {
+        return cache.addAll(SHELL_URLS);
+    }).then(function () {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener('activate', function (event) {
+    // Caches of previous versions are deleted.
+    event.waitUntil(caches.keys().then(function (names) {
+        return Promise.all(names.filter(function (name) {
+            return name !== SHELL_CACHE && name !== FOLDER_CACHE;
+        }).map(function (name) {
+            return caches.delete(name);
+        }));
+    }).then(function () {
+        return self.clients.claim();
+    }));
+});
+
+function trimCache(cache, size) {
+    return cache.keys().then(function (requests) {
+        return Promise.all(requests.slice(0, Math.max(requests.length - size, 0)).map(
+            function (request) { return cache.delete(request); }
+        ));
+    });
+}
+
+// Fetches request from network and stores successful response in cache.
+function update(cacheName, request, size) {
+    return fetch(request).then(function (response) {
+        if (response.status === 200) {
+            var copy = response.clone();
+            caches.open(cacheName).then(function (cache) {
+                // Entry is deleted first, so that order of keys is order of updates.
+                return cache.delete(request).then(function () {
+                    return cache.put(request, copy);
+                }).then(function () {
+                    return size ? trimCache(cache, size) : null;
+                });
+            });
+        }
+        return response;
+    });
+}
+
+// Returns cached response (or 'fallbackUrl' response) and updates cache in background. Request
+// waits for network only if nothing is cached.
+function staleWhileRevalidate(event, cacheName, size, fallbackUrl) {
+    var request = event.request;
+    var network = update(cacheName, request, size);
+
+    event.waitUntil(network.catch(function () {}));
+
+    return caches.open(cacheName).then(function (cache) {
+        return cache.match(request).then(function (response) {
+            return response || (fallbackUrl ? cache.match(fallbackUrl) : undefined);
+        });
+    }).then(function (response) {
+        return response || network;
+    });
+}
+
+self.addEventListener('fetch', function (event) {
+    var request = event.request;
+    var url = new URL(request.url);
+
+    if (request.method !== 'GET' || url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (url.pathname.indexOf(FOLDER_AD_PATH) === 0) {
+        // Client revalidates folders it already shows, so such requests go to network (their
+        // successful responses still update cache).
+        if (request.headers.has('If-None-Match') ||
+                request.headers.get('Cache-Control') === 'no-cache') {
+            event.respondWith(update(FOLDER_CACHE, request, FOLDER_CACHE_SIZE));
+        } else {
+            event.respondWith(staleWhileRevalidate(event, FOLDER_CACHE, FOLDER_CACHE_SIZE));
+        }
+    } else if (request.mode === 'navigate' && url.pathname === SHELL_URLS[0]) {
+        event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, 0, SHELL_URLS[0]));
+    } else if (SHELL_URLS.indexOf(url.pathname) !== -1) {
+        event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, 0));
+    }
+});
@@ -1,2 +1,5 @@
 from .test_models import *
 from .test_views import *
+from .test_import_catalog import *
+from .test_read_serializers import *
+from .test_snapshot import *
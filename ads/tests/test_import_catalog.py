@@ -0,0 +1,104 @@
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from model_mommy import mommy
+
+from .. import const
+from ..importer import CatalogImporter
+from ..models import Ad, Folder
+
+
+class CatalogImporterTest(TestCase):
+    """Tests for CatalogImporter and command import_catalog."""
+
+    def _import(self, rows, chunk_size=2):
+        return CatalogImporter(chunk_size=chunk_size, use_copy=False).import_rows(rows)
+
+    def test_imports_folders_and_ads(self):
+        importer = self._import([
+            {'type': 'folder', 'path': '', 'name': 'Root'},
+            {'type': 'folder', 'path': 'Root', 'name': 'A'},
+            {'type': 'folder', 'path': 'Root/A', 'name': 'B'},
+            {'type': 'ad', 'path': 'Root/A/B', 'name': 'Ad', 'ad_url': 'http://www.celtra.com'},
+        ])
+        root = Folder.objects.get(parent=None)
+        folder_b = Folder.objects.get(name='B')
+
+        self.assertEqual((3, 1, []), (importer.num_folders, importer.num_ads, importer.rejected))
+        self.assertEqual(root, folder_b.parent.parent)
+        self.assertEqual((folder_b.parent.subtree_path, 2), (folder_b.path, folder_b.depth))
+        self.assertEqual(folder_b, Ad.objects.get(name='Ad').folder)
+
+    def test_reuses_existing_folders(self):
+        root = mommy.make(Folder, parent=None, name='Root')
+        folder = mommy.make(Folder, parent=root, name='A')
+        importer = self._import([
+            {'type': 'folder', 'path': '', 'name': 'Root'},
+            {'type': 'folder', 'path': ['Root'], 'name': 'A'},
+            {'type': 'ad', 'path': ['Root', 'A'], 'name': 'Ad', 'ad_url': 'http://www.celtra.com'},
+        ])
+
+        self.assertEqual((0, 2), (importer.num_folders, importer.num_existing_folders))
+        self.assertEqual(2, Folder.objects.count())
+        self.assertEqual(folder, Ad.objects.get().folder)
+
+    def test_rejects_invalid_rows(self):
+        mommy.make(Folder, parent=None, name='Root')
+        importer = self._import([
+            {'type': 'folder', 'path': '', 'name': 'Other root'},
+            {'type': 'folder', 'path': 'Missing', 'name': 'A'},
+            {'type': 'ad', 'path': 'Root', 'name': 'Ad', 'ad_url': 'invalid'},
+            {'type': 'ad', 'path': 'Missing', 'name': 'Ad', 'ad_url': 'http://www.celtra.com'},
+            {'type': 'campaign', 'name': 'Campaign'},
+            None,
+            {'type': 'ad', 'path': 'Root', 'name': 'Ad', 'ad_url': 'http://www.celtra.com'},
+        ])
+
+        rejected = dict(importer.rejected)
+
+        self.assertEqual([1, 2, 3, 4, 5, 6], sorted(rejected))
+        self.assertEqual(const.MSG_ONLY_ONE_ROOT_FOLDER, rejected[1])
+        self.assertEqual(const.MSG_PARENT_FOLDER_DOESNT_EXIST, rejected[2])
+        self.assertEqual(const.MSG_AD_HAS_TO_BELONG_TO_FOLDER, rejected[4])
+        self.assertEqual(const.MSG_INVALID_ROW, rejected[6])
+        self.assertEqual(1, importer.num_ads)
+
+    def test_resolves_folders_with_one_query_per_level(self):
+        self._import([{'type': 'folder', 'path': '', 'name': 'Root'}] + [
+            {'type': 'folder', 'path': 'Root', 'name': str(i)} for i in range(10)
+        ], chunk_size=100)
+        rows = [{'type': 'ad', 'path': 'Root/%s' % i, 'name': 'Ad', 'ad_url': 'http://a.com'}
+                for i in range(10)]
+
+        # Two folder levels, insert, paths of folders and update of counters, plus savepoint and its
+        # release.
+        with self.assertNumQueries(5 + 2):
+            CatalogImporter(chunk_size=100, use_copy=False).import_rows(rows)
+
+        self.assertEqual(10, Ad.objects.count())
+        root_folder = Folder.objects.get(parent=None)
+        self.assertEqual((10, 10), (root_folder.active_child_count, root_folder.total_active_ad_count))
+
+    def test_command_imports_csv_file(self):
+        handle, file_name = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as csv_file:
+            csv_file.write(
+                'type,path,name,ad_url\n'
+                'folder,,Root,\n'
+                'ad,Root,Ad,http://www.celtra.com\n'
+                'ad,Root,Ad,invalid\n'
+            )
+        output, errors = StringIO(), StringIO()
+
+        try:
+            call_command('import_catalog', file_name, stdout=output, stderr=errors)
+        finally:
+            os.remove(file_name)
+
+        self.assertEqual(1, Ad.objects.count())
+        self.assertIn('Rejected 1 rows.', output.getvalue())
+        self.assertIn('Rejected row 3', errors.getvalue())
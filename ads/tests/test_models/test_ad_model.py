@@ -5,6 +5,7 @@ from django.core.exceptions import ValidationError
 from model_mommy import mommy
 
 from ...models import Ad, Folder
+from core.models.models import VersionConflict
 
 
 class AdModelTest(TestCase):
@@ -32,6 +33,24 @@ class AdModelTest(TestCase):
         # Shouldn't raise error
         mommy.make(Ad, ad_url='http://www.valid.com')
 
+    def test_update_increases_version(self):
+        ad = mommy.make(Ad)
+        ad.name = 'New name'
+        ad.save()
+
+        self.assertEqual(2, ad.version)
+        self.assertEqual(2, Ad.objects.get(pk=ad.pk).version)
+
+    def test_cannot_update_ad_with_stale_version(self):
+        ad = mommy.make(Ad)
+        stale_ad = Ad.objects.get(pk=ad.pk)
+        ad.save()
+
+        stale_ad.name = 'New name'
+        with self.assertRaises(VersionConflict):
+            stale_ad.save()
+        self.assertNotEqual('New name', Ad.objects.get(pk=ad.pk).name)
+
     def test_cannot_delete_ad(self):
         ad = mommy.make(Ad)
         with self.assertRaises(Exception):
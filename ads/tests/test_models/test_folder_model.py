@@ -1,9 +1,14 @@
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
+from django.utils.six import StringIO
 
 from model_mommy import mommy
 
-from ...models import Folder
+from ...counters import repair_counters
+from ...models import Ad, Folder
 
 
 class FolderModelTest(TestCase):
@@ -97,3 +102,228 @@ class FolderModelTest(TestCase):
     def test_string_representation(self):
         folder = mommy.make(Folder, name='Test name')
         self.assertEqual('Test name', str(folder))
+
+
+class FolderTreeIndexTest(TestCase):
+    """Tests for materialized path tree index of Folder."""
+
+    def setUp(self):
+        self._root_folder = mommy.make(Folder)
+        self._child_folder = mommy.make(Folder, parent=self._root_folder)
+        self._sub_folder = mommy.make(Folder, parent=self._child_folder)
+
+    def _reload(self, folder):
+        return Folder.objects.get(pk=folder.pk)
+
+    def _set_path_length(self, folder, length):
+        """Sets path of folder to path of given length and returns reloaded folder."""
+
+        path = '1/' * (length // 2) if length % 2 == 0 else '1/' * ((length - 3) // 2) + '11/'
+        Folder.objects.filter(pk=folder.pk).update(path=path)
+        return self._reload(folder)
+
+    def test_root_folder_has_empty_path_and_zero_depth(self):
+        self.assertEqual('', self._root_folder.path)
+        self.assertEqual(0, self._root_folder.depth)
+
+    def test_path_and_depth_are_set_on_create(self):
+        expected_path = '%s/%s/' % (self._root_folder.pk, self._child_folder.pk)
+
+        self.assertEqual(expected_path, self._reload(self._sub_folder).path)
+        self.assertEqual(2, self._reload(self._sub_folder).depth)
+
+    def test_get_descendants_returns_whole_subtree_in_one_query(self):
+        sub_sub_folder = mommy.make(Folder, parent=self._sub_folder)
+        mommy.make(Folder, parent=self._root_folder)
+
+        with self.assertNumQueries(1):
+            descendants = set(self._child_folder.get_descendants())
+
+        self.assertEqual({self._sub_folder, sub_sub_folder}, descendants)
+
+    def test_get_ancestors_returns_ancestors_from_root_down_in_one_query(self):
+        sub_sub_folder = self._reload(mommy.make(Folder, parent=self._sub_folder))
+
+        with self.assertNumQueries(1):
+            ancestors = list(sub_sub_folder.get_ancestors())
+
+        self.assertEqual([self._root_folder, self._child_folder, self._sub_folder], ancestors)
+
+    def test_moving_folder_updates_path_of_whole_subtree(self):
+        new_parent = mommy.make(Folder, parent=self._root_folder)
+        sub_sub_folder = mommy.make(Folder, parent=self._sub_folder)
+
+        self._child_folder.parent = new_parent
+        self._child_folder.save()
+
+        self.assertEqual(2, self._reload(self._child_folder).depth)
+        self.assertEqual(
+            '%s/%s/%s/' % (self._root_folder.pk, new_parent.pk, self._child_folder.pk),
+            self._reload(self._sub_folder).path
+        )
+        self.assertEqual(4, self._reload(sub_sub_folder).depth)
+        self.assertIn(sub_sub_folder, new_parent.get_descendants())
+
+    def test_cannot_move_folder_to_its_descendant(self):
+        with self.assertRaises(ValidationError):
+            self._child_folder.parent = self._sub_folder
+            self._child_folder.save()
+
+    def test_cannot_create_folder_deeper_than_tree_index_allows(self):
+        max_length = Folder._meta.get_field('path').max_length
+        deep_folder = self._set_path_length(self._sub_folder, max_length - 1)
+
+        with self.assertRaises(ValidationError):
+            mommy.make(Folder, parent=deep_folder)
+
+    def test_cannot_move_folder_if_paths_of_subtree_would_be_too_long(self):
+        max_length = Folder._meta.get_field('path').max_length
+        new_parent = mommy.make(Folder, parent=self._root_folder)
+        new_parent = self._set_path_length(new_parent, max_length - len(str(new_parent.pk)) - 1)
+
+        # Folder itself fits, but it's sub-folder doesn't.
+        self._child_folder.parent = new_parent
+        with self.assertRaises(ValidationError):
+            self._child_folder.save()
+
+        self._sub_folder.parent = new_parent
+        self._sub_folder.save()
+        self.assertEqual(new_parent.subtree_path, self._reload(self._sub_folder).path)
+
+    def test_saving_stale_instance_doesnt_overwrite_tree_index(self):
+        stale_sub_folder = self._reload(self._sub_folder)
+        new_parent = mommy.make(Folder, parent=self._root_folder)
+        self._child_folder.parent = new_parent
+        self._child_folder.save()
+
+        stale_sub_folder.name = 'New name'
+        stale_sub_folder.save()
+
+        self.assertEqual(self._reload(self._child_folder).subtree_path,
+                         self._reload(self._sub_folder).path)
+
+    def test_deactivation_keeps_tree_index(self):
+        path = self._sub_folder.path
+        self._sub_folder.deactivate()
+
+        self.assertEqual(path, self._reload(self._sub_folder).path)
+
+    def test_deactivate_subtree_deactivates_sub_folders_and_their_ads(self):
+        sub_sub_folder = mommy.make(Folder, parent=self._sub_folder)
+        sibling_folder = mommy.make(Folder, parent=self._root_folder)
+        mommy.make(Ad, folder=self._child_folder)
+        mommy.make(Ad, folder=sub_sub_folder)
+        sibling_ad = mommy.make(Ad, folder=sibling_folder)
+
+        num_folders, num_ads = self._reload(self._child_folder).deactivate_subtree()
+
+        self.assertEqual((3, 2), (num_folders, num_ads))
+        self.assertEqual({self._root_folder, sibling_folder}, set(Folder.objects.active()))
+        self.assertEqual([sibling_ad], list(Ad.objects.active()))
+
+    def test_deactivate_subtree_number_of_queries_doesnt_depend_on_subtree_size(self):
+        with CaptureQueriesContext(connection) as shallow_queries:
+            self._reload(self._sub_folder).deactivate_subtree()
+
+        parent = folder = mommy.make(Folder, parent=self._root_folder)
+        for _ in range(5):
+            parent = mommy.make(Folder, parent=parent)
+            mommy.make(Ad, folder=parent)
+
+        with CaptureQueriesContext(connection) as deep_queries:
+            self._reload(folder).deactivate_subtree()
+
+        self.assertEqual(len(shallow_queries), len(deep_queries))
+
+
+class FolderCountersTest(TestCase):
+    """Tests for counters of active sub-folders and ads of Folder."""
+
+    def setUp(self):
+        self._root_folder = mommy.make(Folder)
+        self._child_folder = mommy.make(Folder, parent=self._root_folder)
+        self._sub_folder = mommy.make(Folder, parent=self._child_folder)
+        mommy.make(Ad, folder=self._sub_folder, _quantity=2)
+
+    def _counters(self, folder):
+        return Folder.objects.values_list(*Folder.counter_fields).get(pk=folder.pk)
+
+    def _assert_counters_are_consistent(self):
+        self.assertEqual(0, repair_counters())
+
+    def test_counters_are_updated_on_create(self):
+        self.assertEqual((1, 0, 2, 2), self._counters(self._root_folder))
+        self.assertEqual((1, 0, 1, 2), self._counters(self._child_folder))
+        self.assertEqual((0, 2, 0, 2), self._counters(self._sub_folder))
+        self._assert_counters_are_consistent()
+
+    def test_inactive_records_arent_counted(self):
+        mommy.make(Folder, parent=self._root_folder, is_active=False)
+        mommy.make(Ad, folder=self._root_folder, is_active=False)
+
+        self.assertEqual((1, 0, 2, 2), self._counters(self._root_folder))
+        self._assert_counters_are_consistent()
+
+    def test_moving_folder_moves_counters_of_subtree(self):
+        new_parent = mommy.make(Folder, parent=self._root_folder)
+
+        self._sub_folder.parent = new_parent
+        self._sub_folder.save()
+
+        self.assertEqual((2, 0, 3, 2), self._counters(self._root_folder))
+        self.assertEqual((0, 0, 0, 0), self._counters(self._child_folder))
+        self.assertEqual((1, 0, 1, 2), self._counters(new_parent))
+        self._assert_counters_are_consistent()
+
+    def test_deactivating_folder_removes_subtree_from_counters_of_ancestors(self):
+        self._child_folder.deactivate()
+
+        self.assertEqual((0, 0, 0, 0), self._counters(self._root_folder))
+        self._assert_counters_are_consistent()
+
+    def test_deactivate_subtree_resets_counters_of_subtree(self):
+        Folder.objects.get(pk=self._child_folder.pk).deactivate_subtree()
+
+        self.assertEqual((0, 0, 0, 0), self._counters(self._root_folder))
+        self.assertEqual((0, 0, 0, 0), self._counters(self._child_folder))
+        self.assertEqual((0, 0, 0, 0), self._counters(self._sub_folder))
+        self._assert_counters_are_consistent()
+
+    def test_counters_are_updated_when_ad_is_moved_or_deactivated(self):
+        ad = mommy.make(Ad, folder=self._child_folder)
+        self.assertEqual((1, 1, 1, 3), self._counters(self._child_folder))
+
+        ad.folder = self._root_folder
+        ad.save()
+        self.assertEqual((1, 1, 2, 3), self._counters(self._root_folder))
+        self.assertEqual((1, 0, 1, 2), self._counters(self._child_folder))
+
+        ad.deactivate()
+        self.assertEqual((1, 0, 2, 2), self._counters(self._root_folder))
+        self._assert_counters_are_consistent()
+
+    def test_counter_updates_dont_depend_on_stale_instances(self):
+        stale_child_folder = Folder.objects.get(pk=self._child_folder.pk)
+        mommy.make(Folder, parent=self._child_folder)
+
+        stale_child_folder.name = 'New name'
+        stale_child_folder.save()
+
+        self.assertEqual((2, 0, 2, 2), self._counters(self._child_folder))
+        self._assert_counters_are_consistent()
+
+    def test_repair_counters_recomputes_counters(self):
+        Folder.objects.update(active_child_count=5, total_active_ad_count=0)
+
+        self.assertEqual(3, repair_counters())
+        self.assertEqual((1, 0, 2, 2), self._counters(self._root_folder))
+        self.assertEqual((0, 2, 0, 2), self._counters(self._sub_folder))
+
+    def test_repair_counters_command(self):
+        Folder.objects.filter(pk=self._root_folder.pk).update(total_active_ad_count=0)
+        output = StringIO()
+
+        call_command('repair_counters', stdout=output)
+
+        self.assertIn('Repaired counters of 1 folders.', output.getvalue())
+        self.assertEqual((1, 0, 2, 2), self._counters(self._root_folder))
@@ -0,0 +1,58 @@
+from django.db.models import Prefetch
+from django.test import TestCase
+
+from model_mommy import mommy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from .. import serializers
+from ..models import Ad, Folder
+
+
+class ReadSerializersTest(TestCase):
+    """Tests that read serializers render the same bytes as model serializers."""
+
+    def setUp(self):
+        self._request = APIRequestFactory().get('/', HTTP_HOST='ads.example.com')
+        self._root_folder = mommy.make(Folder, parent=None, name='Root')
+        self._folder = mommy.make(Folder, parent=self._root_folder, name='Kampanje čšž')
+        for name in ('B', 'A', '<C>'):
+            mommy.make(Folder, parent=self._folder, name=name)
+            mommy.make(Ad, folder=self._folder, name=name, ad_url='http://www.celtra.com/%s' % name)
+        mommy.make(Folder, parent=self._folder, is_active=False)
+        mommy.make(Ad, folder=self._folder, is_active=False)
+
+    def _assert_renders_same(self, serializer, read_serializer, queryset):
+        data = serializer(queryset, many=True, context={'request': self._request}).data
+        read_data = read_serializer(self._request).serialize(
+            queryset.values(*read_serializer(self._request).get_values_fields())
+        )
+
+        self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(read_data))
+
+    def test_folder_read_serializer(self):
+        self._assert_renders_same(
+            serializers.FolderSerializer, serializers.FolderReadSerializer, Folder.objects.all()
+        )
+
+    def test_ad_read_serializer(self):
+        self._assert_renders_same(
+            serializers.AdSerializer, serializers.AdReadSerializer, Ad.objects.all()
+        )
+
+    def test_folder_ad_read_serializer(self):
+        queryset = Folder.objects.active().select_related('parent').prefetch_related(
+            Prefetch('children', queryset=Folder.objects.active(), to_attr='active_children'),
+            Prefetch('ads', queryset=Ad.objects.active(), to_attr='active_ads'),
+        )
+
+        self._assert_renders_same(
+            serializers.FolderAdSerializer, serializers.FolderAdReadSerializer, queryset
+        )
+
+    def test_folder_ad_read_serializer_queries(self):
+        serializer = serializers.FolderAdReadSerializer(self._request)
+
+        # Folders, their ancestors, children and ads.
+        with self.assertNumQueries(4):
+            serializer.serialize(Folder.objects.values(*serializer.get_values_fields()))
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.utils.six import StringIO
+
+from model_mommy import mommy
+
+from ..models import Ad, Folder
+from ..snapshot import build_csr
+from ..snapshot_server import SnapshotServer
+
+
+class SnapshotServerTest(TestCase):
+    """Tests for command dump_snapshot and SnapshotServer."""
+
+    def setUp(self):
+        cache.clear()
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self._path = os.path.join(directory, 'snapshot.json')
+
+        self._root = mommy.make(Folder, parent=None, name='Root')
+        self._folder_b = mommy.make(Folder, parent=self._root, name='B')
+        self._folder_a = mommy.make(Folder, parent=self._root, name='A')
+        self._folder_c = mommy.make(Folder, parent=self._folder_a, name='Čebula')
+        mommy.make(Folder, parent=self._root, name='Inactive', is_active=False)
+        mommy.make(Ad, folder=self._folder_a, name='Ad 2', ad_url='http://www.celtra.com/2')
+        mommy.make(Ad, folder=self._folder_a, name='Ad 1', ad_url='http://www.celtra.com/1')
+        mommy.make(Ad, folder=self._folder_a, name='Ad 3', is_active=False)
+        mommy.make(Ad, folder=self._folder_c, name='Ad 4', ad_url='http://www.celtra.com/4')
+
+        self._server = SnapshotServer(self._path)
+        self._dump()
+
+    def _dump(self):
+        output = StringIO()
+        call_command('dump_snapshot', output=self._path, stdout=output)
+        self._server.reload()
+
+        return output.getvalue()
+
+    def _get(self, path, **headers):
+        return self._server.respond('GET', path, dict({'host': 'testserver'}, **headers))
+
+    def test_command_reports_dumped_records(self):
+        self.assertIn('Wrote snapshot of 4 folders and 3 ads', self._dump())
+
+    def test_serves_same_folder_structures_as_folder_ad_view(self):
+        for folder in (self._root, self._folder_a, self._folder_b, self._folder_c):
+            url = reverse('folder-ad-detail', args=(folder.pk,))
+            status, headers, body = self._get(url)
+
+            self.assertEqual(200, status)
+            self.assertIn(('Content-Type', 'application/json'), headers)
+            self.assertEqual(self.client.get(url).content, body)
+
+    def test_returns_not_found_for_inactive_and_missing_folders(self):
+        inactive = Folder.objects.get(name='Inactive')
+
+        for pk in (inactive.pk, 999999):
+            url = reverse('folder-ad-detail', args=(pk,))
+            status, _, body = self._get(url)
+
+            self.assertEqual(404, status)
+            self.assertEqual(self.client.get(url).content, body)
+
+    def test_redirects_default_url_to_root_folder(self):
+        status, headers, _ = self._get(reverse('folder-ad-detail'))
+
+        self.assertEqual(302, status)
+        root_url = reverse('folder-ad-detail', args=(self._root.pk,))
+        self.assertEqual([('Location', 'http://testserver%s' % root_url)], headers)
+
+    def test_returns_not_modified_if_etag_matches(self):
+        url = reverse('folder-ad-detail', args=(self._root.pk,))
+        etag = dict(self._get(url)[1])['ETag']
+
+        self.assertEqual(304, self._get(url, **{'if-none-match': etag})[0])
+
+    def test_etag_depends_on_host(self):
+        url = reverse('folder-ad-detail', args=(self._root.pk,))
+        etag = dict(self._get(url)[1])['ETag']
+
+        status, headers, _ = self._get(url, host='example.com', **{'if-none-match': etag})
+
+        self.assertEqual(200, status)
+        self.assertNotEqual(etag, dict(headers)['ETag'])
+
+    @override_settings(ALLOWED_HOSTS=['testserver'], DEBUG=False)
+    def test_rejects_hosts_which_arent_allowed(self):
+        url = reverse('folder-ad-detail', args=(self._root.pk,))
+
+        self.assertEqual(200, self._get(url)[0])
+        for path in (url, reverse('folder-ad-detail')):
+            self.assertEqual(400, self._get(path, host='evil.com')[0], path)
+
+    def test_reloads_snapshot_only_when_file_changes(self):
+        url = reverse('folder-ad-detail', args=(self._folder_a.pk,))
+        etag = dict(self._get(url)[1])['ETag']
+
+        self.assertFalse(self._server.reload())
+
+        mommy.make(Ad, folder=self._folder_a, name='Ad 5')
+        self._dump()
+        status, headers, body = self._get(url)
+
+        self.assertEqual(200, self._get(url, **{'if-none-match': etag})[0])
+        self.assertEqual(3, len(json.loads(body.decode('utf-8'))['ads']))
+        self.assertEqual(self.client.get(url).content, body)
+
+    def test_request_is_served_from_one_snapshot_if_reloaded_during_request(self):
+        url = reverse('folder-ad-detail', args=(self._folder_a.pk,))
+        version = self._server.snapshot.version
+        render_folder_structure = self._server.render_folder_structure
+
+        def reload_and_render(*args):
+            mommy.make(Ad, folder=self._folder_a, name='Ad 5')
+            self._dump()
+            return render_folder_structure(*args)
+
+        with patch.object(self._server, 'render_folder_structure', reload_and_render):
+            _, headers, body = self._get(url)
+
+        self.assertNotEqual(version, self._server.snapshot.version)
+        self.assertEqual(2, len(json.loads(body.decode('utf-8'))['ads']))
+        self.assertEqual('"%s"' % hashlib.md5(
+            ('%s:http://testserver:%s' % (version, url)).encode('utf-8')
+        ).hexdigest(), dict(headers)['ETag'])
+
+    def test_serves_requests_over_http(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.addCleanup(loop.close)
+        server, watcher = self._server.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        url = reverse('folder-ad-detail', args=(self._folder_a.pk,))
+
+        async def get_twice():
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses = []
+            for i in range(2):
+                writer.write(('GET %s HTTP/1.1\r\nHost: testserver\r\n\r\n' % url).encode())
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+                responses.append((head, await reader.readexactly(length)))
+            writer.close()
+            return responses
+
+        responses = loop.run_until_complete(get_twice())
+        watcher.cancel()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+
+        for head, body in responses:
+            self.assertTrue(head.startswith(b'HTTP/1.1 200 OK\r\n'))
+            self.assertIn(b'Connection: keep-alive', head)
+            self.assertEqual(self.client.get(url).content, body)
+
+    def test_build_csr_groups_items_in_order(self):
+        offsets, items = build_csr([1, -1, 0, 1, 0], 3)
+
+        self.assertEqual([0, 2, 4, 4], list(offsets))
+        self.assertEqual([2, 4, 0, 3], list(items))
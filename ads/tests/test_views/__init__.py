@@ -1,7 +1,15 @@
 from .test_ad_creator_template import *
 from .test_folder_detail import *
+from .test_ad_bulk import *
 from .test_ad_list import *
+from .test_export import *
+from .test_compression import *
+from .test_conditional_get import *
 from .test_folder_ad import *
+from .test_folder_ad_tree import *
 from .test_folder_detail import *
 from .test_folder_list import *
 from .folder_ad_default import *
+from .test_replica import *
+from .test_search import *
+from .test_version import *
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.core.urlresolvers import reverse
 
@@ -11,6 +12,9 @@ from ... import const
 class FolderAdDefaultTest(TestCase):
     """Tests for folder_ad_default."""
 
+    def setUp(self):
+        cache.clear()
+
     def _get_request_url(self, pk=None):
         return reverse('folder-ad-detail', args=(pk,)) if pk else reverse('folder-ad-detail')
 
@@ -34,3 +38,12 @@ class FolderAdDefaultTest(TestCase):
 
         self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
         self.assertEqual(const.MSG_ROOT_FOLDER_DOESNT_EXIST, str(response.content)[2:-1])
+
+    def test_caches_root_folder(self):
+        root_folder = mommy.make(Folder, parent=None)
+        self.client.get(self._get_request_url())
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self._get_request_url())
+
+        self.assertTrue(response['Location'].endswith(self._get_request_url(root_folder.pk)))
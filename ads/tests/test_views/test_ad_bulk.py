@@ -0,0 +1,184 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.core.urlresolvers import reverse
+
+from model_mommy import mommy
+from rest_framework import status
+
+from .base import RestViewTestBase
+from ... import const
+from ...bulk import validate_ads, write_ads
+from ...cache import folder_tree_cache
+from ...models import Ad, Folder
+from core.models import VersionConflict
+
+
+class AdBulkViewTest(RestViewTestBase, TestCase):
+    """Tests for view AdBulkView."""
+
+    def setUp(self):
+        self._request_url = reverse('ad-bulk')
+        self._root_folder = mommy.make(Folder, parent=None)
+        self._folder = mommy.make(Folder, parent=self._root_folder)
+
+    def test_creates_ads(self):
+        post_data = [
+            self._ad_data_dict({'name': 'Ad %s' % i, 'folder': self._folder.pk}) for i in range(3)
+        ]
+        response, response_data = self._post_request(self._request_url, data=post_data)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({'created': 3, 'updated': 0, 'errors': []}, response_data)
+        self.assertEqual(
+            ['Ad 0', 'Ad 1', 'Ad 2'],
+            list(Ad.objects.active().filter(folder=self._folder).order_by('name')
+                 .values_list('name', flat=True))
+        )
+
+    def test_updates_ads(self):
+        ads = [mommy.make(Ad, folder=self._root_folder) for _ in range(2)]
+        post_data = [
+            self._ad_data_dict({'pk': ad.pk, 'name': 'New %s' % ad.pk, 'folder': self._folder.pk,
+                                'version': ad.version})
+            for ad in ads
+        ]
+        _, response_data = self._post_request(self._request_url, data=post_data)
+
+        self.assertEqual({'created': 0, 'updated': 2, 'errors': []}, response_data)
+        for ad in ads:
+            updated_ad = Ad.objects.get(pk=ad.pk)
+            self.assertEqual('New %s' % ad.pk, updated_ad.name)
+            self.assertEqual(self._folder.pk, updated_ad.folder_id)
+            self.assertGreater(updated_ad.time_modified, ad.time_modified)
+            self.assertEqual(ad.version + 1, updated_ad.version)
+
+    def test_reports_errors_and_writes_valid_ads(self):
+        inactive_folder = mommy.make(Folder, parent=self._root_folder, is_active=False)
+        inactive_ad = mommy.make(Ad, folder=self._root_folder, is_active=False)
+        post_data = [
+            self._ad_data_dict({'name': 'Valid', 'folder': self._folder.pk}),
+            self._ad_data_dict({'ad_url': 'invalid', 'folder': self._folder.pk}),
+            self._ad_data_dict({'folder': inactive_folder.pk}),
+            self._ad_data_dict({'pk': inactive_ad.pk, 'folder': self._folder.pk, 'version': 1}),
+        ]
+        response, response_data = self._post_request(self._request_url, data=post_data)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, response_data['created'])
+        self.assertEqual([1, 2, 3], [error['index'] for error in response_data['errors']])
+        self.assertIn('ad_url', response_data['errors'][0]['errors'])
+        self.assertIn('folder', response_data['errors'][1]['errors'])
+        self.assertIn('pk', response_data['errors'][2]['errors'])
+        self.assertEqual(['Valid'], list(Ad.objects.active().values_list('name', flat=True)))
+
+    def test_rejects_ads_with_repeated_pk(self):
+        ad = mommy.make(Ad, folder=self._root_folder, name='Old')
+        post_data = [
+            self._ad_data_dict({'pk': ad.pk, 'name': 'New %s' % i, 'folder': self._folder.pk,
+                                'version': ad.version})
+            for i in range(2)
+        ]
+        response, response_data = self._post_request(self._request_url, data=post_data)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(0, response_data['updated'])
+        self.assertEqual([0, 1], [error['index'] for error in response_data['errors']])
+        self.assertEqual([const.MSG_AD_REPEATED], response_data['errors'][0]['errors']['pk'])
+        self.assertEqual('Old', Ad.objects.get(pk=ad.pk).name)
+        self.assertEqual((1, 1), Folder.objects.values_list(
+            'active_ad_count', 'total_active_ad_count'
+        ).get(pk=self._root_folder.pk))
+
+    def test_rejects_updated_ads_without_version_or_with_stale_version(self):
+        ad = mommy.make(Ad, folder=self._root_folder, name='Old')
+        post_data = [
+            self._ad_data_dict({'pk': ad.pk, 'folder': self._folder.pk}),
+            self._ad_data_dict({'pk': ad.pk, 'folder': self._folder.pk, 'version': 2}),
+        ]
+
+        for item in post_data:
+            response, response_data = self._post_request(self._request_url, data=[item])
+
+            self.assertEqual(0, response_data['updated'])
+            self.assertIn('version', response_data['errors'][0]['errors'])
+        self.assertEqual('Old', Ad.objects.get(pk=ad.pk).name)
+
+    def test_doesnt_write_anything_if_ad_changes_after_validation(self):
+        ads = [mommy.make(Ad, folder=self._root_folder, name='Old') for _ in range(2)]
+        valid, _ = validate_ads([
+            self._ad_data_dict({'pk': ad.pk, 'name': 'New', 'folder': self._folder.pk,
+                                'version': ad.version})
+            for ad in ads
+        ])
+        # Concurrent update
+        ads[1].save()
+
+        with self.assertRaises(VersionConflict):
+            write_ads(valid)
+        self.assertEqual(['Old', 'Old'], [Ad.objects.get(pk=ad.pk).name for ad in ads])
+
+    def test_atomic_request_doesnt_write_anything_if_any_ad_is_invalid(self):
+        post_data = [
+            self._ad_data_dict({'folder': self._folder.pk}),
+            self._ad_data_dict({'folder': 0}),
+        ]
+        response, response_data = self._post_request(
+            self._request_url + '?atomic=1', data=post_data
+        )
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual([1], [error['index'] for error in response_data['errors']])
+        self.assertFalse(Ad.objects.exists())
+
+    def test_updates_counters_of_folders(self):
+        moved_ad = mommy.make(Ad, folder=self._root_folder)
+        post_data = [self._ad_data_dict({'folder': self._folder.pk}),
+                     self._ad_data_dict({'pk': moved_ad.pk, 'folder': self._folder.pk,
+                                         'version': moved_ad.version})]
+
+        self._post_request(self._request_url, data=post_data)
+
+        self.assertEqual((0, 2), Folder.objects.values_list(
+            'active_ad_count', 'total_active_ad_count'
+        ).get(pk=self._root_folder.pk))
+        self.assertEqual((2, 2), Folder.objects.values_list(
+            'active_ad_count', 'total_active_ad_count'
+        ).get(pk=self._folder.pk))
+
+    def test_number_of_queries_doesnt_depend_on_number_of_ads(self):
+        ads = [mommy.make(Ad, folder=self._root_folder) for _ in range(20)]
+        folders = [mommy.make(Folder, parent=self._root_folder) for _ in range(20)]
+        post_data = (
+            [self._ad_data_dict({'pk': ad.pk, 'folder': folder.pk, 'version': ad.version})
+             for ad, folder in zip(ads, folders)] +
+            [self._ad_data_dict({'folder': folder.pk}) for folder in folders]
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self._post_request(self._request_url, data=post_data)
+
+        # Active folders, existing ads, insert, update, paths of folders and update of counters
+        # (transaction statements excluded).
+        writes = [query for query in queries.captured_queries
+                  if 'SAVEPOINT' not in query['sql'] and 'BEGIN' not in query['sql']]
+        self.assertEqual(6, len(writes))
+
+    def test_invalidates_folder_tree_cache(self):
+        generation = folder_tree_cache.get_generation()
+        self._post_request(self._request_url, data=[self._ad_data_dict({'folder': self._folder.pk})])
+
+        self.assertNotEqual(generation, folder_tree_cache.get_generation())
+
+    def test_rejects_non_list_data(self):
+        response, _ = self._post_request(self._request_url, data=self._ad_data_dict())
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    @override_settings(BULK_ADS_MAX_ITEMS=1)
+    def test_rejects_too_many_ads(self):
+        post_data = [self._ad_data_dict({'folder': self._folder.pk}) for _ in range(2)]
+        response, _ = self._post_request(self._request_url, data=post_data)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertFalse(Ad.objects.exists())
@@ -1,13 +1,108 @@
+import json
+
+from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.core.cache import cache
 from django.test import TestCase
 from django.core.urlresolvers import reverse
 
+from model_mommy import mommy
+from rest_framework.renderers import JSONRenderer
+
+from ...models import Folder
+
 
 class AdCreatorTemplateViewTest(TestCase):
     """Tests for view AdCreatorTemplateView."""
 
     def setUp(self):
+        cache.clear()
         self._request_url = reverse('ad-creator')
 
+    def _get_bootstrap_folder(self, response):
+        content = response.content.decode('utf-8')
+        start = content.find('<script type="application/json" id="bootstrap-folder">')
+        if start == -1:
+            return None
+
+        start = content.index('>', start) + 1
+        return content[start:content.index('</script>', start)]
+
     def test_uses_correct_template(self):
         response = self.client.get(self._request_url)
         self.assertTemplateUsed(response, 'ads/ad_creator.html')
+
+    def test_embeds_structure_of_root_folder_same_as_api(self):
+        root_folder = mommy.make(Folder, parent=None)
+        mommy.make(Folder, parent=root_folder)
+
+        bootstrap_folder = self._get_bootstrap_folder(self.client.get(self._request_url))
+        api_response = self.client.get(reverse('folder-ad-detail', args=(root_folder.pk,)))
+
+        self.assertEqual(JSONRenderer().render(api_response.data).decode('utf-8'),
+                         bootstrap_folder)
+        # Structure embedded in page is served from the same cache as API.
+        self.assertEqual('HIT', api_response['X-Cache'])
+
+    def test_embeds_structure_of_folder_in_query_parameter(self):
+        root_folder = mommy.make(Folder, parent=None)
+        child_folder = mommy.make(Folder, parent=root_folder)
+
+        response = self.client.get(self._request_url + '?folder=%s' % child_folder.pk)
+
+        self.assertEqual(child_folder.pk, json.loads(self._get_bootstrap_folder(response))['pk'])
+
+    def test_cached_page_doesnt_query_database(self):
+        mommy.make(Folder, parent=None)
+        self.client.get(self._request_url)
+
+        with self.assertNumQueries(0):
+            self.client.get(self._request_url)
+
+    def test_doesnt_embed_structure_of_missing_folder(self):
+        root_folder = mommy.make(Folder, parent=None)
+
+        response = self.client.get(self._request_url + '?folder=%s' % (root_folder.pk + 1))
+
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(self._get_bootstrap_folder(response))
+
+    def test_doesnt_embed_structure_if_root_folder_doesnt_exist(self):
+        response = self.client.get(self._request_url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(self._get_bootstrap_folder(response))
+
+    def test_escapes_embedded_json(self):
+        root_folder = mommy.make(Folder, parent=None, name='</script><script>alert(1)</script>')
+
+        bootstrap_folder = self._get_bootstrap_folder(self.client.get(self._request_url))
+
+        self.assertNotIn('<', bootstrap_folder)
+        self.assertEqual(root_folder.name, json.loads(bootstrap_folder)['name'])
+
+
+class ServiceWorkerViewTest(TestCase):
+    """Tests for view ServiceWorkerView."""
+
+    def setUp(self):
+        self._request_url = reverse('service-worker')
+
+    def test_serves_service_worker_from_root(self):
+        response = self.client.get(self._request_url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('/sw.js', self._request_url)
+        self.assertEqual('application/javascript', response['Content-Type'])
+        self.assertEqual('no-cache', response['Cache-Control'])
+
+    def test_precaches_app_shell(self):
+        content = self.client.get(self._request_url).content.decode('utf-8')
+
+        for url in (reverse('ad-creator'), static('js/lib/angular.min.js'),
+                    static('js/adCreatorApp.js'), static('css/style.css')):
+            self.assertIn("'%s'" % url, content)
+
+    def test_ad_creator_page_registers_service_worker(self):
+        response = self.client.get(reverse('ad-creator'))
+
+        self.assertContains(response, "navigator.serviceWorker.register('/sw.js')")
@@ -44,7 +44,10 @@ class AdDetailViewUpdateTest(AdDetailViewTestBase, RestViewTestBase, TestCase):
 
     def test_operation_put_updates_ad(self):
         another_folder = mommy.make(Folder, parent=self._root_folder)
-        data = {'name': 'New name', 'ad_url': 'http://www.test.com', 'folder': another_folder.pk}
+        data = {
+            'name': 'New name', 'ad_url': 'http://www.test.com', 'folder': another_folder.pk,
+            'version': self._ad.version
+        }
 
         self._put_request(self._get_request_url(self._ad.pk), data=data)
         ad_updated = Ad.objects.get(pk=self._ad.pk)
@@ -54,7 +57,7 @@ class AdDetailViewUpdateTest(AdDetailViewTestBase, RestViewTestBase, TestCase):
         self.assertEqual(data['folder'], ad_updated.folder.pk)
 
     def test_operation_patch_updates_only_provided_data(self):
-        data = {'name': 'New name', 'folder': self._root_folder.pk}
+        data = {'name': 'New name', 'folder': self._root_folder.pk, 'version': self._ad.version}
         self._patch_request(self._get_request_url(self._ad.pk), data=data)
         ad_updated = Ad.objects.get(pk=self._ad.pk)
 
@@ -73,7 +76,7 @@ class AdDetailViewUpdateTest(AdDetailViewTestBase, RestViewTestBase, TestCase):
 
     def test_cannot_set_inactive_folder(self):
         child_folder = mommy.make(Folder, parent=self._root_folder, is_active=False)
-        data = {'folder': child_folder.pk}
+        data = {'folder': child_folder.pk, 'version': self._ad.version}
 
         response, _ = self._patch_request(self._get_request_url(self._ad.pk), data=data)
 
@@ -1,4 +1,8 @@
+import base64
+import json
+
 from django.test import TestCase
+from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 
 from model_mommy import mommy
@@ -38,6 +42,83 @@ class AdListViewReadTestBase(AdListViewTestBase, RestViewTestBase, TestCase):
         self.assertEqual(2, len(response_data))
 
 
+class AdListViewPaginationTest(AdListViewTestBase, RestViewTestBase, TestCase):
+    """Tests for cursor pagination of view AdListView."""
+
+    def setUp(self):
+        super().setUp()
+        # Ads with the same name are ordered by pk.
+        self._ads = [mommy.make(Ad, folder=self._root_folder, name=name)
+                     for name in ('Ad 3', 'Ad 1', 'Ad 2', 'Ad 2', 'Ad 2')]
+        self._ads.sort(key=lambda ad: (ad.name, ad.pk))
+
+    def _get_pages(self, request_url, link='next'):
+        """Follows pagination links and returns list of pages of ad pks."""
+
+        pages = []
+
+        while request_url:
+            _, response_data = self._get_request(request_url)
+            pages.append([ad['pk'] for ad in response_data['results']])
+            request_url = response_data[link]
+
+        return pages
+
+    def test_is_not_paginated_by_default(self):
+        _, response_data = self._get_request(self._request_url)
+
+        self.assertEqual(5, len(response_data))
+
+    @override_settings(KEYSET_PAGINATION_REQUIRED=True)
+    def test_is_paginated_by_default_if_pagination_is_required(self):
+        _, response_data = self._get_request(self._request_url)
+
+        self.assertEqual(5, len(response_data['results']))
+        self.assertIsNone(response_data['next'])
+
+    def test_next_links_traverse_all_ads_in_order(self):
+        pages = self._get_pages(self._request_url + '?page_size=2')
+        expected_pks = [ad.pk for ad in self._ads]
+
+        self.assertEqual([expected_pks[0:2], expected_pks[2:4], expected_pks[4:]], pages)
+
+    def test_previous_links_traverse_ads_in_reverse_order(self):
+        _, response_data = self._get_request(self._request_url + '?page_size=2')
+        _, response_data = self._get_request(response_data['next'])
+        _, response_data = self._get_request(response_data['next'])
+
+        pages = self._get_pages(response_data['previous'], link='previous')
+        expected_pks = [ad.pk for ad in self._ads]
+
+        self.assertEqual([expected_pks[2:4], expected_pks[0:2]], pages)
+
+    def test_page_size_is_limited(self):
+        _, response_data = self._get_request(self._request_url + '?page_size=100000')
+
+        self.assertEqual(5, len(response_data['results']))
+
+    def test_deep_page_uses_single_query(self):
+        _, response_data = self._get_request(self._request_url + '?page_size=2')
+
+        # Validators of list are cached by the first request, so only page is queried.
+        with self.assertNumQueries(1):
+            self._get_request(response_data['next'])
+
+    def test_returns_not_found_for_invalid_cursor(self):
+        response, _ = self._get_request(self._request_url + '?cursor=invalid')
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_returns_not_found_for_forged_cursor(self):
+        for position in (['Ad', 'pk'], [['Ad'], 1], ['Ad', {'pk': 1}], ['Ad', None], ['Ad']):
+            cursor = base64.urlsafe_b64encode(json.dumps({'p': position, 'r': 0}).encode())
+            response, _ = self._get_request(
+                '%s?cursor=%s' % (self._request_url, cursor.decode('ascii'))
+            )
+
+            self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code, position)
+
+
 class AdListViewCreateTestBase(AdListViewTestBase, RestViewTestBase, TestCase):
     """Tests for view AdListView for operation Create."""
 
@@ -0,0 +1,98 @@
+import gzip
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+
+from model_mommy import mommy
+from rest_framework import status
+
+from .base import RestViewTestBase
+from ...cache import compressed_response_cache, folder_tree_cache
+from ...models import Ad, Folder
+
+
+@override_settings(API_COMPRESSION_MIN_SIZE=100)
+class CompressedResponseTest(RestViewTestBase, TestCase):
+    """Tests for compression of API responses."""
+
+    def setUp(self):
+        cache.clear()
+
+        self._root_folder = mommy.make(Folder, parent=None)
+        for i in range(10):
+            mommy.make(Ad, name='Banner %s' % i, folder=self._root_folder)
+
+        self._folder_ad_url = reverse('folder-ad-detail', args=(self._root_folder.pk,))
+
+    def _get_compressed(self, request_url):
+        return self.client.get(request_url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+    def test_compresses_response_if_client_accepts_gzip(self):
+        for request_url in (self._folder_ad_url, reverse('ad-list'), reverse('folder-ad-tree'),
+                            reverse('search') + '?q=Banner'):
+            response = self._get_compressed(request_url)
+
+            self.assertEqual(status.HTTP_200_OK, response.status_code, request_url)
+            self.assertEqual('gzip', response['Content-Encoding'], request_url)
+            self.assertIn('Accept-Encoding', response['Vary'], request_url)
+            self.assertEqual(
+                self.client.get(request_url).content, gzip.decompress(response.content),
+                request_url
+            )
+
+    def test_doesnt_compress_response_if_client_doesnt_accept_gzip(self):
+        response = self.client.get(self._folder_ad_url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(self._root_folder.pk, self._json_to_dict(response.content)['pk'])
+
+    @override_settings(API_COMPRESSION_MIN_SIZE=10000)
+    def test_doesnt_compress_response_smaller_than_threshold(self):
+        for i in range(2):
+            response = self._get_compressed(self._folder_ad_url)
+
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(self._root_folder.pk, self._json_to_dict(response.content)['pk'])
+
+    def test_caches_compressed_response_by_etag(self):
+        for request_url, response_cache in ((self._folder_ad_url, folder_tree_cache),
+                                            (reverse('ad-list'), compressed_response_cache)):
+            etag = self.client.get(request_url)['ETag']
+            response = self._get_compressed(request_url)
+            cached = response_cache.get(
+                'gzip', 'http', 'testserver', request_url, 'application/json', etag
+            )
+
+            self.assertEqual(('application/json', response.content), cached, request_url)
+            self.assertEqual(response.content, self._get_compressed(request_url).content)
+
+    def test_compresses_new_version_of_response_after_change(self):
+        etag = self._get_compressed(self._folder_ad_url)['ETag']
+        mommy.make(Ad, name='New ad', folder=self._root_folder)
+
+        response = self._get_compressed(self._folder_ad_url)
+
+        self.assertNotEqual(etag, response['ETag'])
+        self.assertEqual(11, len(self._json_to_dict(gzip.decompress(response.content))['ads']))
+
+    def test_compressed_response_has_its_own_etag(self):
+        etag = self.client.get(self._folder_ad_url)['ETag']
+        response = self._get_compressed(self._folder_ad_url)
+
+        self.assertEqual('%s-gzip"' % etag[:-1], response['ETag'])
+
+    def test_returns_not_modified_for_etag_of_compressed_response(self):
+        compressed_etag = self._get_compressed(self._folder_ad_url)['ETag']
+
+        response = self.client.get(
+            self._folder_ad_url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=compressed_etag
+        )
+
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEqual(compressed_etag, response['ETag'])
+
+        # Compressed representation isn't acceptable without gzip.
+        response = self.client.get(self._folder_ad_url, HTTP_IF_NONE_MATCH=compressed_etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from model_mommy import mommy
+from rest_framework import status
+
+from ...models import Ad, Folder
+
+
+class ConditionalGetTest(TestCase):
+    """Tests for ETag and Last-Modified validators of read views."""
+
+    def setUp(self):
+        cache.clear()
+
+        self._root_folder = mommy.make(Folder)
+        self._child_folder = mommy.make(Folder, parent=self._root_folder)
+        self._ad = mommy.make(Ad, folder=self._child_folder)
+
+        self._request_urls = [
+            reverse('folder-list'),
+            reverse('folder-detail', args=(self._child_folder.pk,)),
+            reverse('ad-list'),
+            reverse('ad-detail', args=(self._ad.pk,)),
+            reverse('folder-ad-detail', args=(self._child_folder.pk,)),
+            reverse('folder-ad-tree'),
+        ]
+
+    def test_responses_contain_validators(self):
+        for request_url in self._request_urls:
+            response = self.client.get(request_url)
+
+            self.assertTrue(response.has_header('ETag'), request_url)
+            self.assertTrue(response.has_header('Last-Modified'), request_url)
+
+    def test_returns_not_modified_if_etag_matches(self):
+        for request_url in self._request_urls:
+            etag = self.client.get(request_url)['ETag']
+            response = self.client.get(request_url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code, request_url)
+
+    def test_validators_are_computed_without_serialization(self):
+        # Validators of lists are cached, validators of details take one aggregate query.
+        for request_url, num_queries in zip(self._request_urls[:4], (0, 1, 0, 1)):
+            etag = self.client.get(request_url)['ETag']
+
+            with self.assertNumQueries(num_queries):
+                self.client.get(request_url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_returns_not_modified_if_not_modified_since(self):
+        for request_url in self._request_urls:
+            response = self.client.get(request_url, HTTP_IF_MODIFIED_SINCE=http_date())
+
+            self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code, request_url)
+
+    def test_etag_changes_when_record_involved_in_response_changes(self):
+        etags = {request_url: self.client.get(request_url)['ETag']
+                 for request_url in self._request_urls}
+
+        self._ad.name = 'New name'
+        self._ad.save()
+
+        for request_url in (reverse('ad-list'), reverse('ad-detail', args=(self._ad.pk,)),
+                            reverse('folder-ad-detail', args=(self._child_folder.pk,)),
+                            reverse('folder-ad-tree')):
+            response = self.client.get(request_url, HTTP_IF_NONE_MATCH=etags[request_url])
+
+            self.assertEqual(status.HTTP_200_OK, response.status_code, request_url)
+
+    def test_list_last_modified_changes_when_record_is_deactivated(self):
+        mommy.make(Ad, folder=self._child_folder)
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Ad.objects.update(time_modified=an_hour_ago)
+        cache.clear()
+        last_modified = self.client.get(reverse('ad-list'))['Last-Modified']
+
+        self._ad.deactivate()
+        response = self.client.get(reverse('ad-list'), HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.data))
+
+    def test_folder_ad_etag_changes_when_child_folder_is_deactivated(self):
+        request_url = reverse('folder-ad-detail', args=(self._root_folder.pk,))
+        etag = self.client.get(request_url)['ETag']
+
+        self._child_folder.deactivate_subtree()
+        response = self.client.get(request_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([], response.data['children'])
+
+    def test_folder_ad_etag_changes_when_ad_is_added(self):
+        request_url = reverse('folder-ad-detail', args=(self._root_folder.pk,))
+        etag = self.client.get(request_url)['ETag']
+
+        mommy.make(Ad, folder=self._root_folder)
+        response = self.client.get(request_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_folder_ad_etag_changes_when_ancestor_is_renamed(self):
+        sub_folder = mommy.make(Folder, parent=self._child_folder)
+        request_url = reverse('folder-ad-detail', args=(sub_folder.pk,))
+        etag = self.client.get(request_url)['ETag']
+
+        self._root_folder.name = 'Renamed'
+        self._root_folder.save()
+        response = self.client.get(request_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('Renamed', response.data['ancestors'][0]['name'])
+
+    def test_doesnt_return_validators_for_missing_records(self):
+        response = self.client.get(reverse('ad-detail', args=(self._ad.pk + 1,)))
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertFalse(response.has_header('ETag'))
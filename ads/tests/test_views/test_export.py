@@ -0,0 +1,105 @@
+import json
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from model_mommy import mommy
+from rest_framework import status
+
+from ...export import export_catalog
+from ...models import Ad, Folder
+
+
+class ExportViewTest(TestCase):
+    """Tests for view ExportView and command export_catalog."""
+
+    def setUp(self):
+        self._request_url = reverse('export')
+        self._root_folder = mommy.make(Folder, parent=None)
+        self._folder = mommy.make(Folder, parent=self._root_folder)
+        self._sub_folder = mommy.make(Folder, parent=self._folder)
+        self._root_ad = mommy.make(Ad, folder=self._root_folder)
+        self._sub_ad = mommy.make(Ad, folder=self._sub_folder)
+
+    def _export(self, query=''):
+        response = self.client.get(self._request_url + query)
+        content = b''.join(response.streaming_content).decode('utf-8')
+
+        return response, [json.loads(line) for line in content.splitlines()]
+
+    def test_exports_folders_before_ads(self):
+        response, records = self._export()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        self.assertEqual(
+            [('folder', self._root_folder.pk), ('folder', self._folder.pk),
+             ('folder', self._sub_folder.pk), ('ad', self._root_ad.pk), ('ad', self._sub_ad.pk)],
+            [(record['type'], record['pk']) for record in records]
+        )
+        self.assertEqual(self._folder.pk, records[2]['parent'])
+        self.assertEqual(self._sub_ad.ad_url, records[4]['ad_url'])
+
+    def test_parent_precedes_sub_folders_after_move(self):
+        self._folder.parent = mommy.make(Folder, parent=self._root_folder)
+        self._folder.save()
+
+        _, records = self._export()
+        exported = set()
+
+        for record in records:
+            if record['type'] == 'folder':
+                self.assertTrue(record['parent'] is None or record['parent'] in exported)
+                exported.add(record['pk'])
+
+    def test_exports_inactive_records(self):
+        mommy.make(Ad, folder=self._root_folder, is_active=False)
+        _, records = self._export()
+
+        self.assertEqual(3, len([record for record in records if record['type'] == 'ad']))
+        self.assertFalse(records[-1]['is_active'])
+
+    def test_exports_subtree_of_folder(self):
+        _, records = self._export('?folder=%s' % self._folder.pk)
+
+        self.assertEqual(
+            [self._folder.pk, self._sub_folder.pk, self._sub_ad.pk],
+            [record['pk'] for record in records]
+        )
+
+    def test_exports_records_modified_since(self):
+        modified_since = timezone.now()
+        Ad.objects.filter(pk=self._sub_ad.pk).update(
+            time_modified=modified_since + timedelta(seconds=1)
+        )
+        _, records = self._export(
+            '?modified_since=%s' % modified_since.isoformat().replace('+', '%2B')
+        )
+
+        self.assertEqual([('ad', self._sub_ad.pk)], [(r['type'], r['pk']) for r in records])
+
+    def test_returns_bad_request_for_invalid_modified_since(self):
+        response = self.client.get(self._request_url + '?modified_since=yesterday')
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_returns_not_found_for_non_existing_folder(self):
+        response = self.client.get(self._request_url + '?folder=0')
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_reads_records_in_chunks(self):
+        # 3 folders and 2 ads are read in chunks of 2 (the last chunk of ads is empty).
+        with self.assertNumQueries(4):
+            self.assertEqual(5, len(list(export_catalog(chunk_size=2))))
+
+    def test_command_writes_same_export(self):
+        output = StringIO()
+        call_command('export_catalog', stdout=output)
+        _, records = self._export()
+
+        self.assertEqual(records, [json.loads(line) for line in output.getvalue().splitlines()])
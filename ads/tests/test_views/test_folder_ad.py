@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.core.urlresolvers import reverse
@@ -6,6 +7,7 @@ from model_mommy import mommy
 from rest_framework import status
 
 from .base import RestViewTestBase
+from ...cache import folder_tree_cache
 from ...models import Ad, Folder
 
 
@@ -13,6 +15,8 @@ class FolderAdViewTest(RestViewTestBase, TestCase):
     """Tests for view FolderAdView."""
 
     def setUp(self):
+        cache.clear()
+
         self._root_folder = mommy.make(Folder, parent=None)
         self._child_folder_1 = mommy.make(Folder, parent=self._root_folder)
         self._child_folder_2 = mommy.make(Folder, parent=self._root_folder)
@@ -49,6 +53,30 @@ class FolderAdViewTest(RestViewTestBase, TestCase):
 
         self.assertEqual(expected_url, child_folder_1['url'])
         self.assertEqual(self._child_folder_1.name, child_folder_1['name'])
+        self.assertEqual(0, child_folder_1['active_child_count'])
+        self.assertEqual(0, child_folder_1['total_active_ad_count'])
+
+    def test_returns_ancestors_from_root_down(self):
+        sub_folder = mommy.make(Folder, parent=self._child_folder_1)
+        request = self._factory.get(self._get_request_url(sub_folder.pk))
+        _, response_data = self._get_request(self._get_request_url(sub_folder.pk))
+
+        self.assertEqual(
+            [{'pk': folder.pk, 'name': folder.name, 'url': request.build_absolute_uri(
+                self._get_request_url(folder.pk))}
+             for folder in (self._root_folder, self._child_folder_1)],
+            response_data['ancestors']
+        )
+
+    def test_number_of_queries_doesnt_depend_on_depth(self):
+        folder = self._child_folder_1
+        for _ in range(5):
+            folder = mommy.make(Folder, parent=folder)
+
+        with self.assertNumQueries(5):
+            _, response_data = self._get_request(self._get_request_url(folder.pk))
+
+        self.assertEqual(6, len(response_data['ancestors']))
 
     def test_returns_only_active_child_folders(self):
         mommy.make(Folder, parent=self._root_folder, is_active=False)
@@ -73,3 +101,43 @@ class FolderAdViewTest(RestViewTestBase, TestCase):
         _, response_data = self._get_request(self._get_request_url(self._root_folder.pk))
 
         self.assertEqual(2, len(response_data['ads']))
+
+    def test_number_of_queries_doesnt_depend_on_number_of_children_and_ads(self):
+        sub_folder = mommy.make(Folder, parent=self._child_folder_1)
+        mommy.make(Folder, parent=self._root_folder, _quantity=5)
+        mommy.make(Ad, folder=self._root_folder, _quantity=5)
+
+        # Validators, folder with parent, ancestors, active children and active ads. Root folder
+        # has no ancestors, so they aren't queried.
+        with self.assertNumQueries(4):
+            self._get_request(self._get_request_url(self._root_folder.pk))
+        with self.assertNumQueries(5):
+            self._get_request(self._get_request_url(sub_folder.pk))
+
+    def test_caches_response(self):
+        self._get_request(self._get_request_url(self._root_folder.pk))
+
+        with self.assertNumQueries(0):
+            response, response_data = self._get_request(self._get_request_url(self._root_folder.pk))
+
+        self.assertEqual('HIT', response['X-Cache'])
+        self.assertEqual(2, len(response_data['children']))
+        # Validators and data
+        self.assertEqual({'hits': 2, 'misses': 2}, folder_tree_cache.stats())
+
+    def test_cache_is_invalidated_when_ad_is_saved(self):
+        self._get_request(self._get_request_url(self._root_folder.pk))
+        mommy.make(Ad, folder=self._root_folder)
+
+        response, response_data = self._get_request(self._get_request_url(self._root_folder.pk))
+
+        self.assertEqual('MISS', response['X-Cache'])
+        self.assertEqual(1, len(response_data['ads']))
+
+    def test_cache_is_invalidated_when_folder_subtree_is_deactivated(self):
+        self._get_request(self._get_request_url(self._root_folder.pk))
+        self._child_folder_1.deactivate_subtree()
+
+        _, response_data = self._get_request(self._get_request_url(self._root_folder.pk))
+
+        self.assertEqual(1, len(response_data['children']))
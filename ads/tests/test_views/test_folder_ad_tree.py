@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+
+from model_mommy import mommy
+from rest_framework import status
+
+from .base import RestViewTestBase
+from ...models import Ad, Folder
+
+
+class FolderAdTreeViewTest(RestViewTestBase, TestCase):
+    """Tests for view FolderAdTreeView."""
+
+    def setUp(self):
+        self._request_url = reverse('folder-ad-tree')
+
+        self._root_folder = mommy.make(Folder, name='Root')
+        self._child_folder = mommy.make(Folder, name='Child', parent=self._root_folder)
+        self._ad = mommy.make(Ad, name='Ad', folder=self._child_folder)
+
+    def test_returns_whole_tree(self):
+        _, response_data = self._get_request(self._request_url)
+
+        self.assertEqual(self._root_folder.pk, response_data['root'])
+        self.assertEqual([
+            {'pk': self._child_folder.pk, 'name': 'Child', 'parent': self._root_folder.pk},
+            {'pk': self._root_folder.pk, 'name': 'Root', 'parent': None},
+        ], response_data['folders'])
+        self.assertEqual(
+            [{'name': 'Ad', 'ad_url': self._ad.ad_url, 'folder': self._child_folder.pk}],
+            response_data['ads']
+        )
+
+    def test_returns_only_active_folders_and_ads(self):
+        mommy.make(Folder, parent=self._root_folder, is_active=False)
+        mommy.make(Ad, folder=self._root_folder, is_active=False)
+
+        _, response_data = self._get_request(self._request_url)
+
+        self.assertEqual(2, len(response_data['folders']))
+        self.assertEqual(1, len(response_data['ads']))
+
+    def test_number_of_queries_doesnt_depend_on_tree_size(self):
+        sub_folder = mommy.make(Folder, parent=self._child_folder)
+        mommy.make(Ad, folder=sub_folder, _quantity=3)
+
+        # Two aggregate queries for ETag and two queries for folders and ads.
+        with self.assertNumQueries(4):
+            self._get_request(self._request_url)
+
+    def test_revalidation_doesnt_query_database(self):
+        response = self.client.get(self._request_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self._request_url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+    def test_returns_not_modified_if_tree_didnt_change(self):
+        response = self.client.get(self._request_url)
+        response = self.client.get(self._request_url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+    def test_etag_changes_when_ad_is_deactivated(self):
+        response = self.client.get(self._request_url)
+        self._ad.deactivate()
+        response = self.client.get(self._request_url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
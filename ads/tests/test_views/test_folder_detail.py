@@ -45,7 +45,7 @@ class FolderDetailViewUpdateTest(FolderDetailViewTestBase, RestViewTestBase, Tes
 
     def test_operation_put_updates_folder(self):
         new_child = mommy.make(Folder, parent=self._root_folder)
-        data = {'name': 'New Name', 'parent': new_child.pk}
+        data = {'name': 'New Name', 'parent': new_child.pk, 'version': self._child_folder.version}
 
         self._put_request(self._get_request_url(self._child_folder.pk), data)
         new_child_updated = Folder.objects.get(pk=self._child_folder.pk)
@@ -55,7 +55,8 @@ class FolderDetailViewUpdateTest(FolderDetailViewTestBase, RestViewTestBase, Tes
 
     def test_operation_patch_updates_only_provided_data(self):
         self._patch_request(
-            self._get_request_url(self._child_folder.pk), data={'name': 'New Name'}
+            self._get_request_url(self._child_folder.pk),
+            data={'name': 'New Name', 'version': self._child_folder.version}
         )
         folder_updated = Folder.objects.get(pk=self._child_folder.pk)
 
@@ -64,7 +65,7 @@ class FolderDetailViewUpdateTest(FolderDetailViewTestBase, RestViewTestBase, Tes
         self.assertEqual(self._child_folder.parent.pk, folder_updated.parent.pk)
 
     def test_can_update_root_folder(self):
-        data_dict = {'name': 'New Name', 'parent': None}
+        data_dict = {'name': 'New Name', 'parent': None, 'version': self._root_folder.version}
 
         self._put_request(self._get_request_url(self._root_folder.pk), data=data_dict)
         root_updated = Folder.objects.get(pk=self._root_folder.pk)
@@ -74,7 +75,8 @@ class FolderDetailViewUpdateTest(FolderDetailViewTestBase, RestViewTestBase, Tes
 
     def test_cannot_update_non_root_folder_to_root_folder(self):
         response, response_data = self._patch_request(
-            self._get_request_url(self._child_folder.pk), data={'parent': None}
+            self._get_request_url(self._child_folder.pk),
+            data={'parent': None, 'version': self._child_folder.version}
         )
 
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
@@ -82,7 +84,8 @@ class FolderDetailViewUpdateTest(FolderDetailViewTestBase, RestViewTestBase, Tes
 
     def test_cannot_update_folder_parent_to_self(self):
         response, response_data = self._patch_request(
-            self._get_request_url(self._child_folder.pk), data={'parent': self._child_folder.pk}
+            self._get_request_url(self._child_folder.pk),
+            data={'parent': self._child_folder.pk, 'version': self._child_folder.version}
         )
 
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
@@ -157,3 +160,14 @@ class FolderDetailViewDeleteTest(FolderDetailViewTestBase, RestViewTestBase, Tes
 
         self.assertFalse(ad_deactivated_1.is_active)
         self.assertFalse(ad_deactivated_2.is_active)
+
+    def test_returns_number_of_deactivated_folders_and_ads(self):
+        sub_folder = mommy.make(Folder, parent=self._child_folder)
+        mommy.make(Ad, folder=self._child_folder)
+        mommy.make(Ad, folder=sub_folder)
+        mommy.make(Ad, folder=sub_folder, is_active=False)
+
+        response, response_data = self._delete_request(self._get_request_url(self._child_folder.pk))
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({'deactivated_folders': 2, 'deactivated_ads': 2}, response_data)
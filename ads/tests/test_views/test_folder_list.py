@@ -38,6 +38,22 @@ class FolderListViewReadTest(FolderListViewTestBase, RestViewTestBase, TestCase)
         self.assertEqual(2, len(response_data))
 
 
+class FolderListViewPaginationTest(FolderListViewTestBase, RestViewTestBase, TestCase):
+    """Tests for cursor pagination of view FolderListView."""
+
+    def test_returns_requested_page(self):
+        root_folder = mommy.make(Folder, name='C')
+        folder_a = mommy.make(Folder, name='A', parent=root_folder)
+        folder_b = mommy.make(Folder, name='B', parent=root_folder)
+
+        _, response_data = self._get_request(self._request_url + '?page_size=2')
+        _, next_response_data = self._get_request(response_data['next'])
+
+        self.assertEqual([folder_a.pk, folder_b.pk], [f['pk'] for f in response_data['results']])
+        self.assertEqual([root_folder.pk], [f['pk'] for f in next_response_data['results']])
+        self.assertIsNone(next_response_data['next'])
+
+
 class FolderListViewCreateTest(FolderListViewTestBase, RestViewTestBase, TestCase):
     """Tests for view FolderListView for operation Create."""
 
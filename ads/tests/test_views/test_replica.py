@@ -0,0 +1,110 @@
+import json
+import time
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+
+from model_mommy import mommy
+from rest_framework import status
+
+from .base import RestViewTestBase
+from ...models import Folder
+from core.db_routers import STICKY_COOKIE, STICKY_HEADER
+
+
+@skipUnless('replica' in settings.DATABASES, 'Replica database is not configured.')
+@override_settings(DATABASE_REPLICA='replica')
+class ReplicaReadTest(RestViewTestBase, TestCase):
+    """
+    Tests for reads from replica database. Replica database of tests isn't replicated, so data read
+    from it differs from data in default database.
+    """
+
+    multi_db = True
+
+    def setUp(self):
+        cache.clear()
+
+        self._root_folder = mommy.make(Folder, parent=None, name='Root')
+        self._folder = mommy.make(Folder, parent=self._root_folder, name='Primary')
+        Folder.objects.using('replica').bulk_create([
+            Folder(pk=self._root_folder.pk, name='Root', path='', depth=0),
+            Folder(pk=self._folder.pk, name='Replica', parent_id=self._root_folder.pk,
+                   path=self._folder.path, depth=1),
+        ])
+
+        self._detail_url = reverse('folder-detail', args=(self._folder.pk,))
+        self._folder_ad_url = reverse('folder-ad-detail', args=(self._folder.pk,))
+
+    def test_get_views_read_from_replica(self):
+        for request_url in (self._detail_url, self._folder_ad_url):
+            _, response_data = self._get_request(request_url)
+
+            self.assertEqual('Replica', response_data['name'], request_url)
+
+        _, response_data = self._get_request(reverse('folder-list'))
+        self.assertEqual(['Replica', 'Root'], [folder['name'] for folder in response_data])
+
+        _, response_data = self._get_request(reverse('folder-ad-tree'))
+        self.assertEqual(
+            ['Replica', 'Root'], sorted(folder['name'] for folder in response_data['folders'])
+        )
+
+    def test_ad_creator_embeds_structure_from_replica_cached_for_api(self):
+        response = self.client.get(reverse('ad-creator') + '?folder=%s' % self._folder.pk)
+        api_response = self.client.get(self._folder_ad_url)
+
+        self.assertEqual('Replica', json.loads(response.context['bootstrap_folder'])['name'])
+        self.assertEqual('HIT', api_response['X-Cache'])
+
+    def test_folder_ad_default_reads_from_replica(self):
+        Folder.objects.using('replica').filter(pk=self._root_folder.pk).delete()
+
+        response = self.client.get(reverse('folder-ad-detail'))
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_writes_go_to_default_database(self):
+        response, _ = self._post_request(
+            reverse('folder-list'), self._folder_data_dict({'parent': self._root_folder.pk})
+        )
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertTrue(Folder.objects.filter(name='Test').exists())
+        self.assertFalse(Folder.objects.using('replica').filter(name='Test').exists())
+
+    def test_client_reads_from_default_database_after_write(self):
+        # Folder structure is cached from replica before write.
+        self._get_request(self._folder_ad_url)
+
+        response, _ = self._patch_request(
+            self._detail_url, {'name': 'Renamed', 'version': self._folder.version}
+        )
+
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertTrue(response.has_header(STICKY_HEADER))
+        for request_url in (self._detail_url, self._folder_ad_url):
+            _, response_data = self._get_request(request_url)
+
+            self.assertEqual('Renamed', response_data['name'], request_url)
+
+    def test_client_reads_from_default_database_until_header_expires(self):
+        for read_primary_until, name in ((time.time() + 60, 'Primary'), (time.time(), 'Replica')):
+            response = self.client.get(
+                self._detail_url, HTTP_X_READ_PRIMARY_UNTIL=str(read_primary_until)
+            )
+
+            self.assertEqual(name, self._json_to_dict(response.content)['name'])
+
+    @override_settings(DATABASE_REPLICA=None)
+    def test_reads_from_default_database_if_replica_is_disabled(self):
+        _, response_data = self._get_request(self._detail_url)
+        response, _ = self._patch_request(
+            self._detail_url, {'name': 'Renamed', 'version': self._folder.version}
+        )
+
+        self.assertEqual('Primary', response_data['name'])
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
@@ -0,0 +1,102 @@
+import base64
+import json
+
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+
+from model_mommy import mommy
+from rest_framework import status
+
+from .base import RestViewTestBase
+from ... import const
+from ...models import Ad, Folder
+
+
+class SearchViewTest(RestViewTestBase, TestCase):
+    """Tests for view SearchView."""
+
+    def setUp(self):
+        self._request_url = reverse('search')
+        self._root_folder = mommy.make(Folder, name='Root', parent=None)
+        self._folder = mommy.make(Folder, name='Summer campaign', parent=self._root_folder)
+        self._sub_folder = mommy.make(Folder, name='Summer banners', parent=self._folder)
+        self._ad = mommy.make(Ad, name='Beach SUMMER ad', folder=self._folder)
+        self._url_ad = mommy.make(
+            Ad, name='Other ad', ad_url='http://www.example.com/summer', folder=self._root_folder
+        )
+
+    def _search(self, query):
+        return self._get_request(self._request_url + query)
+
+    def _result_pks(self, response_data):
+        return [(result['type'], result['pk']) for result in response_data['results']]
+
+    def test_returns_matching_folders_before_ads_ordered_by_name(self):
+        response, response_data = self._search('?q=summer')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([
+            ('folder', self._sub_folder.pk), ('folder', self._folder.pk),
+            ('ad', self._ad.pk), ('ad', self._url_ad.pk),
+        ], self._result_pks(response_data))
+        self.assertEqual(self._ad.folder_id, response_data['results'][2]['folder'])
+
+    def test_doesnt_return_inactive_records(self):
+        self._sub_folder.deactivate()
+        self._ad.deactivate()
+
+        _, response_data = self._search('?q=summer')
+
+        self.assertEqual([('folder', self._folder.pk), ('ad', self._url_ad.pk)],
+                         self._result_pks(response_data))
+
+    def test_returns_renamed_records(self):
+        self._url_ad.name = 'Winter ad'
+        self._url_ad.ad_url = 'http://www.example.com/winter'
+        self._url_ad.save()
+
+        _, response_data = self._search('?q=winter')
+
+        self.assertEqual([('ad', self._url_ad.pk)], self._result_pks(response_data))
+
+    def test_can_be_limited_to_subtree_of_folder(self):
+        _, response_data = self._search('?q=summer&folder=%s' % self._folder.pk)
+
+        self.assertEqual([('folder', self._sub_folder.pk), ('ad', self._ad.pk)],
+                         self._result_pks(response_data))
+
+    def test_returns_404_for_unknown_folder(self):
+        response, _ = self._search('?q=summer&folder=%s' % (self._ad.pk + 1000))
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_rejects_too_short_query(self):
+        response, response_data = self._search('?q=su')
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual([const.MSG_SEARCH_QUERY_TOO_SHORT % 3], response_data['q'])
+
+    def test_pages_continue_from_folders_to_ads_in_both_directions(self):
+        _, first_page = self._search('?q=summer&page_size=3')
+        _, second_page = self._get_request(first_page['next'])
+        _, previous_page = self._get_request(second_page['previous'])
+
+        self.assertEqual([('folder', self._sub_folder.pk), ('folder', self._folder.pk),
+                          ('ad', self._ad.pk)], self._result_pks(first_page))
+        self.assertEqual([('ad', self._url_ad.pk)], self._result_pks(second_page))
+        self.assertIsNone(second_page['next'])
+        self.assertEqual(self._result_pks(first_page), self._result_pks(previous_page))
+        self.assertIsNone(previous_page['previous'])
+
+    def test_rejects_invalid_cursor(self):
+        response, _ = self._search('?q=summer&cursor=invalid')
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_rejects_forged_cursor(self):
+        for position in (['ad', 'Summer', 'pk'], ['ad', 'Summer'], [['ad'], 'Summer', 1],
+                         ['folder', ['Summer'], 1], ['other', 'Summer', 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'p': position, 'r': 0}).encode())
+            response, _ = self._search('?q=summer&cursor=%s' % cursor.decode('ascii'))
+
+            self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code, position)
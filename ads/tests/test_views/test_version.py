@@ -0,0 +1,122 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.core.urlresolvers import reverse
+
+from model_mommy import mommy
+from rest_framework import status
+
+from .base import RestViewTestBase
+from ...models import Ad, Folder
+from core import const
+
+
+class VersionTest(RestViewTestBase, TestCase):
+    """Tests for optimistic concurrency control of updates (UpdateModelMixin)."""
+
+    def setUp(self):
+        self._root_folder = mommy.make(Folder, parent=None)
+        self._folder = mommy.make(Folder, parent=self._root_folder)
+        self._ad = mommy.make(Ad, folder=self._folder)
+
+        self._folder_url = reverse('folder-detail', args=(self._folder.pk,))
+        self._ad_url = reverse('ad-detail', args=(self._ad.pk,))
+
+    def test_response_contains_version(self):
+        for request_url in (self._folder_url, self._ad_url):
+            _, response_data = self._get_request(request_url)
+
+            self.assertEqual(1, response_data['version'], request_url)
+
+    def test_update_requires_version(self):
+        for request_url in (self._folder_url, self._ad_url):
+            response, response_data = self._patch_request(request_url, {'name': 'New name'})
+
+            self.assertEqual(status.HTTP_428_PRECONDITION_REQUIRED, response.status_code)
+            self.assertEqual(const.MSG_VERSION_REQUIRED, response_data['detail'])
+
+    def test_update_increases_version(self):
+        response, response_data = self._patch_request(
+            self._folder_url, {'name': 'New name', 'version': 1}
+        )
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(2, response_data['version'])
+        self.assertEqual(2, Folder.objects.get(pk=self._folder.pk).version)
+
+    def test_accepts_version_in_if_match_header(self):
+        for if_match in ('"1"', 'W/"2"'):
+            response = self.client.patch(
+                self._ad_url, data='{"name": "New name"}', content_type='application/json',
+                HTTP_IF_MATCH=if_match
+            )
+
+            self.assertEqual(status.HTTP_200_OK, response.status_code, if_match)
+
+        self.assertEqual(3, Ad.objects.get(pk=self._ad.pk).version)
+
+    def test_cannot_update_with_stale_version(self):
+        self._patch_request(self._ad_url, {'name': 'First', 'version': 1})
+
+        response, response_data = self._patch_request(
+            self._ad_url, {'name': 'Second', 'version': 1}
+        )
+
+        self.assertEqual(status.HTTP_412_PRECONDITION_FAILED, response.status_code)
+        self.assertEqual(const.MSG_VERSION_CONFLICT, response_data['detail'])
+        self.assertEqual('First', Ad.objects.get(pk=self._ad.pk).name)
+
+    def test_cannot_update_with_invalid_version(self):
+        for data, headers in (({'name': 'New name', 'version': 'first'}, {}),
+                              ({'name': 'New name'}, {'HTTP_IF_MATCH': '"0c61a2f7"'})):
+            response = self.client.patch(
+                self._folder_url, data=json.dumps(data), content_type='application/json',
+                **headers
+            )
+
+            self.assertEqual(status.HTTP_412_PRECONDITION_FAILED, response.status_code, data)
+
+    def test_if_match_any_updates_current_version(self):
+        self._patch_request(self._folder_url, {'name': 'First', 'version': 1})
+
+        response = self.client.patch(
+            self._folder_url, data='{"name": "Second"}', content_type='application/json',
+            HTTP_IF_MATCH='*'
+        )
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(3, Folder.objects.get(pk=self._folder.pk).version)
+
+    def _patch_if_match(self, request_url, if_match):
+        return self.client.patch(
+            request_url, data='{"name": "New name"}', content_type='application/json',
+            HTTP_IF_MATCH=if_match
+        )
+
+    def test_etag_of_detail_response_can_be_sent_in_if_match(self):
+        for request_url in (self._folder_url, self._ad_url):
+            etag = self.client.get(request_url)['ETag']
+
+            response = self._patch_if_match(request_url, etag)
+            self.assertEqual(status.HTTP_200_OK, response.status_code, request_url)
+
+            response = self._patch_if_match(request_url, etag)
+            self.assertEqual(status.HTTP_412_PRECONDITION_FAILED, response.status_code, request_url)
+
+            response = self._patch_if_match(request_url, self.client.get(request_url)['ETag'])
+            self.assertEqual(status.HTTP_200_OK, response.status_code, request_url)
+
+    @override_settings(API_COMPRESSION_MIN_SIZE=0)
+    def test_etag_of_compressed_detail_response_can_be_sent_in_if_match(self):
+        response = self.client.get(self._ad_url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual('gzip', response['Content-Encoding'])
+
+        response = self._patch_if_match(self._ad_url, response['ETag'])
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_deactivation_of_folder_increases_versions_of_subtree(self):
+        self._delete_request(self._folder_url)
+
+        self.assertEqual(2, Folder.objects.get(pk=self._folder.pk).version)
+        self.assertEqual(2, Ad.objects.get(pk=self._ad.pk).version)
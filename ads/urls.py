@@ -10,12 +10,19 @@ urlpatterns = [
     # CRUD API for ads
     url(r'^ads/$', views.AdListView.as_view(), name='ad-list'),
     url(r'^ads/(?P<pk>\d+)/$', views.AdDetailView.as_view(), name='ad-detail'),
+    url(r'^ads/bulk/$', views.AdBulkView.as_view(), name='ad-bulk'),
     # API for list of folders and ads
     url(r'^folder_ad/$', views.folder_ad_default, name='folder-ad-detail'),
+    url(r'^folder_ad/tree/$', views.FolderAdTreeView.as_view(), name='folder-ad-tree'),
     url(r'^folder_ad/(?P<pk>\d+)/$', views.FolderAdView.as_view(), name='folder-ad-detail'),
+    # Search of active folders and ads
+    url(r'^search/$', views.SearchView.as_view(), name='search'),
+    # Export of all folders and ads
+    url(r'^export/$', views.ExportView.as_view(), name='export'),
 ]
 
 
 urlpatterns += [
     url(r'^$', views.AdCreatorTemplateView.as_view(), name='ad-creator'),
+    url(r'^sw\.js$', views.ServiceWorkerView.as_view(), name='service-worker'),
 ]
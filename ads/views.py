@@ -1,83 +1,378 @@
-from django.http.response import HttpResponseNotFound
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.http import Http404
+from django.http.response import HttpResponseNotFound, StreamingHttpResponse
+from django.utils.safestring import mark_safe
 from django.views.generic import TemplateView
 from django.core.urlresolvers import reverse
-from django.db import transaction
-from django.shortcuts import redirect
+from django.db.models import Count, Max
+from django.shortcuts import get_object_or_404, redirect
 
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .bulk import validate_ads, write_ads
+from .cache import compressed_response_cache, folder_tree_cache
+from .export import export_catalog, parse_modified_since
 from .models import Folder, Ad
+from .search import MIN_QUERY_LENGTH, search
 from . import serializers
 from .import const as msg
-from core.views import ListCreateAPIView, RetrieveUpdateDestroyAPIView
+from core.db_routers import get_cache_timeout, get_read_database, read_from_replica
+from core.exceptions import PreconditionFailed
+from core.metrics import measure_serializer
+from core.models import VersionConflict
+from core.pagination import ChainedKeysetPagination, KeysetPagination
+from core.utils import django_exc_to_rest_exc, escape_json_for_html
+from core.views import (
+    ListCreateAPIView, RetrieveUpdateDestroyAPIView, CachedRetrieveModelMixin,
+    CompressedResponseMixin, ConditionalGetMixin, ReplicaReadMixin, ValuesListModelMixin,
+    ValuesRetrieveModelMixin
+)
 
 
-class FolderListView(ListCreateAPIView):
+class FolderListView(ReplicaReadMixin, CompressedResponseMixin, ConditionalGetMixin,
+                     ValuesListModelMixin, ListCreateAPIView):
     """Folder API for operations read (multiple) and create."""
 
+    compressed_response_cache = compressed_response_cache
+    validator_cache = folder_tree_cache
+
     queryset = Folder.objects.active()
     serializer_class = serializers.FolderSerializer
+    read_serializer_class = serializers.FolderReadSerializer
+    pagination_class = KeysetPagination
 
 
-class FolderDetailView(RetrieveUpdateDestroyAPIView):
+class FolderDetailView(ReplicaReadMixin, CompressedResponseMixin, ConditionalGetMixin,
+                       ValuesRetrieveModelMixin, RetrieveUpdateDestroyAPIView):
     """Folder API for operations read, update and delete."""
 
+    compressed_response_cache = compressed_response_cache
+    version_etag = True
+
     queryset = Folder.objects.active()
     serializer_class = serializers.FolderSerializer
+    read_serializer_class = serializers.FolderReadSerializer
 
-    def perform_destroy(self, instance):
-        """Deactivates current folder and all it's children folders."""
+    def destroy(self, request, *args, **kwargs):
+        """Returns number of deactivated folders and ads instead of empty response."""
 
-        with transaction.atomic():
-            super().perform_destroy(instance)
-            self.delete_children(instance)
+        num_folders, num_ads = self.perform_destroy(self.get_object())
 
-    def delete_children(self, instance):
-        """Recursively deletes child folders and their corresponding ads."""
+        return Response({'deactivated_folders': num_folders, 'deactivated_ads': num_ads})
 
-        for child in instance.children.active():
-            self.delete_children(child)
+    @django_exc_to_rest_exc
+    def perform_destroy(self, instance):
+        """Deactivates current folder and all it's sub-folders and ads with set-based updates."""
 
-        instance.children.active().update(is_active=False)
-        instance.ads.active().update(is_active=False)
+        return instance.deactivate_subtree()
 
 
-class AdListView(generics.ListCreateAPIView):
+class AdListView(ReplicaReadMixin, CompressedResponseMixin, ConditionalGetMixin,
+                 ValuesListModelMixin, generics.ListCreateAPIView):
     """Ad API for operations read (multiple) and create."""
 
+    compressed_response_cache = compressed_response_cache
+    validator_cache = folder_tree_cache
+
     queryset = Ad.objects.active()
     serializer_class = serializers.AdSerializer
+    read_serializer_class = serializers.AdReadSerializer
+    pagination_class = KeysetPagination
 
 
-class AdDetailView(RetrieveUpdateDestroyAPIView):
+class AdDetailView(ReplicaReadMixin, CompressedResponseMixin, ConditionalGetMixin,
+                   ValuesRetrieveModelMixin, RetrieveUpdateDestroyAPIView):
     """Ad API for operations read, update and delete."""
 
+    compressed_response_cache = compressed_response_cache
+    version_etag = True
+
     queryset = Ad.objects.active()
     serializer_class = serializers.AdSerializer
+    read_serializer_class = serializers.AdReadSerializer
+
+
+class AdBulkView(generics.GenericAPIView):
+    """
+    Ad API for creating and updating list of ads at once. Ads with 'pk' are updated, others are
+    created. Invalid ads are reported with their index in list, while valid ads are still written.
+    With query parameter 'atomic' (e.g. ?atomic=1) no ad is written if any ad is invalid. Updated
+    ads have to contain version of ad, ads with stale version are invalid. If ad changes while ads
+    are written, nothing is written and response is 412.
+    """
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+
+        if not isinstance(items, list):
+            return Response(
+                {'non_field_errors': [msg.MSG_BULK_EXPECTS_LIST]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.BULK_ADS_MAX_ITEMS:
+            return Response(
+                {'non_field_errors': [msg.MSG_BULK_TOO_MANY_ITEMS % settings.BULK_ADS_MAX_ITEMS]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ads, errors = validate_ads(items)
+
+        if errors and request.query_params.get('atomic', '').lower() in ('1', 'true'):
+            return Response(
+                {'created': 0, 'updated': 0, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            num_created, num_updated = write_ads(ads)
+        except VersionConflict:
+            raise PreconditionFailed
+
+        return Response({'created': num_created, 'updated': num_updated, 'errors': errors})
+
+
+class ExportView(APIView):
+    """
+    API which streams all folders and ads (including inactive ones) as NDJSON. Export can be limited
+    to subtree of folder with query parameter 'folder' (pk) and to records modified since datetime
+    in query parameter 'modified_since'.
+    """
+
+    def get(self, request, *args, **kwargs):
+        folder = modified_since = None
+
+        if 'folder' in request.query_params:
+            if not request.query_params['folder'].isdigit():
+                raise NotFound
+            folder = get_object_or_404(Folder, pk=request.query_params['folder'])
+        if 'modified_since' in request.query_params:
+            try:
+                modified_since = parse_modified_since(request.query_params['modified_since'])
+            except ValueError:
+                raise ValidationError({'modified_since': [msg.MSG_INVALID_MODIFIED_SINCE]})
+
+        response = StreamingHttpResponse(
+            export_catalog(folder, modified_since), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="catalog.ndjson"'
 
+        return response
 
-class FolderAdView(generics.RetrieveAPIView):
+
+class SearchView(CompressedResponseMixin, generics.GenericAPIView):
+    """
+    API for searching active folders and ads by name (and url of ads) with query parameter 'q'.
+    Results are always paginated with cursor. Folders come before ads and both are ordered by
+    name. Search can be limited to subtree of folder with query parameter 'folder' (pk). Results
+    have no version, so they are compressed on every request.
+    """
+
+    pagination_class = ChainedKeysetPagination
+    read_serializer_classes = {
+        'folder': serializers.FolderReadSerializer,
+        'ad': serializers.AdReadSerializer,
+    }
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        folder = None
+
+        if len(query) < MIN_QUERY_LENGTH:
+            raise ValidationError({'q': [msg.MSG_SEARCH_QUERY_TOO_SHORT % MIN_QUERY_LENGTH]})
+        if 'folder' in request.query_params:
+            if not request.query_params['folder'].isdigit():
+                raise NotFound
+            folder = get_object_or_404(Folder.objects.active(), pk=request.query_params['folder'])
+
+        read_serializers = {
+            key: serializer_class(request)
+            for key, serializer_class in self.read_serializer_classes.items()
+        }
+        page = self.paginate_queryset([
+            (key, queryset.values(*read_serializers[key].get_values_fields()))
+            for key, queryset in search(query, folder)
+        ])
+
+        with measure_serializer():
+            data = [
+                OrderedDict([('type', key)] + list(
+                    read_serializers[key].to_representation(row).items()
+                ))
+                for key, row in page
+            ]
+
+        return self.get_paginated_response(data)
+
+
+class FolderAdView(ReplicaReadMixin, CompressedResponseMixin, ConditionalGetMixin,
+                   CachedRetrieveModelMixin, ValuesRetrieveModelMixin, generics.RetrieveAPIView):
     """
     API which returns structure of current folder. Structure contains all immediate sub-folders
-    (only for one level) and ads for current folder.
+    (only for one level) and ads for current folder. Number of queries is fixed. Responses (and
+    their compressed bodies) are cached until any folder or ad changes.
     """
 
+    response_cache = folder_tree_cache
+    compressed_response_cache = folder_tree_cache
+
+    def get_validator_values(self):
+        """Validators are cached as well, so that cache hit doesn't query database at all."""
+
+        key_parts = 'version', get_read_database(), self.kwargs['pk']
+        version = folder_tree_cache.get(*key_parts)
+
+        if version is None:
+            version = Folder.get_structure_version(self.kwargs['pk'])
+            folder_tree_cache.set(version, *key_parts, timeout=get_cache_timeout())
+
+        return version
+
     queryset = Folder.objects.active()
     serializer_class = serializers.FolderAdSerializer
+    read_serializer_class = serializers.FolderAdReadSerializer
+
+
+class FolderAdTreeView(ReplicaReadMixin, CompressedResponseMixin, ConditionalGetMixin,
+                       generics.RetrieveAPIView):
+    """
+    API which returns whole active folder tree with ads as two flat lists, so that client can
+    navigate the tree without further requests. Supports revalidation with ETag.
+    """
+
+    compressed_response_cache = compressed_response_cache
+
+    def get_validator_values(self):
+        """
+        Inactive records are included, so that validators reflect also deactivations. Aggregates
+        run over whole tables, so they are cached until any folder or ad changes.
+        """
+
+        key_parts = 'validators', get_read_database(), 'tree'
+        values = folder_tree_cache.get(*key_parts)
+
+        if values is None:
+            versions = [
+                model.objects.aggregate(last_modified=Max('time_modified'), count=Count('pk'))
+                for model in (Folder, Ad)
+            ]
+            last_modified = max(
+                (version['last_modified'] for version in versions if version['last_modified']),
+                default=None
+            )
+            values = last_modified, sum(version['count'] for version in versions)
+            folder_tree_cache.set(values, *key_parts, timeout=get_cache_timeout())
 
+        return values
 
+    def retrieve(self, request, *args, **kwargs):
+        folders = list(Folder.objects.active().values('pk', 'name', 'parent'))
+        ads = list(Ad.objects.active().values('name', 'ad_url', 'folder'))
+        root = next((folder['pk'] for folder in folders if folder['parent'] is None), None)
+
+        return Response({'root': root, 'folders': folders, 'ads': ads})
+
+
+def get_root_folder_pk():
+    """Returns pk of active root folder (cached in folder tree cache) or None if it doesn't exist."""
+
+    root_folder_pk = folder_tree_cache.get('root')
+
+    if root_folder_pk is None:
+        try:
+            root_folder_pk = Folder.objects.active().get(parent=None).pk
+        except Folder.DoesNotExist:
+            return None
+        folder_tree_cache.set(root_folder_pk, 'root')
+
+    return root_folder_pk
+
+
+@read_from_replica
 def folder_ad_default(request):
     """Redirects url with no path to root folder view."""
 
-    try:
-        root_folder = Folder.objects.active().get(parent=None)
-    except Folder.DoesNotExist:
+    root_folder_pk = get_root_folder_pk()
+
+    if root_folder_pk is None:
         return HttpResponseNotFound(msg.MSG_ROOT_FOLDER_DOESNT_EXIST)
 
-    return redirect(reverse('folder-ad-detail', args=(root_folder.pk,)))
+    return redirect(reverse('folder-ad-detail', args=(root_folder_pk,)))
 
 
-class AdCreatorTemplateView(TemplateView):
-    """View which servers html page for ad creator."""
+class AdCreatorTemplateView(ReplicaReadMixin, TemplateView):
+    """
+    View which serves html page for ad creator. Page contains structure of root folder (or folder
+    in query parameter 'folder') as inline JSON, so that client can render it without requests.
+    """
 
     template_name = 'ads/ad_creator.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['bootstrap_folder'] = self.get_bootstrap_folder()
+
+        return context
+
+    def get_bootstrap_folder(self):
+        """
+        Returns JSON of folder structure, which is the same as response of FolderAdView and is
+        served from the same cache (read from the same database). Returns None if folder doesn't
+        exist.
+        """
+
+        pk = self.request.GET.get('folder', '')
+        if not pk.isdigit():
+            pk = get_root_folder_pk()
+            if pk is None:
+                return None
+
+        kwargs = {'pk': str(pk)}
+        request = Request(self.request)
+        view = FolderAdView(request=request, args=(), kwargs=kwargs, format_kwarg=None)
+
+        try:
+            data, _ = view.get_cached_data(request, **kwargs)
+        except Http404:
+            return None
+
+        # JSON is escaped, so it is safe to embed it in page.
+        return mark_safe(escape_json_for_html(JSONRenderer().render(data).decode('utf-8')))
+
+
+class ServiceWorkerView(TemplateView):
+    """
+    View which serves service worker of ad creator. It is served from root url, so that its scope
+    contains ad creator page and all APIs.
+    """
+
+    template_name = 'ads/service_worker.js'
+    content_type = 'application/javascript'
+    # Static files of app shell, which are precached by service worker.
+    shell_static_files = (
+        'js/lib/angular.min.js', 'js/adCreatorApp.js', 'css/reset.css', 'css/style.css'
+    )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        shell_urls = [static(path) for path in self.shell_static_files]
+        context.update({
+            'shell_urls': shell_urls,
+            'version': hashlib.md5(' '.join(shell_urls).encode('utf-8')).hexdigest()[:12],
+            'folder_cache_size': settings.SERVICE_WORKER_FOLDER_CACHE_SIZE,
+        })
+
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # Browsers have to check for new version of service worker on every visit.
+        response['Cache-Control'] = 'no-cache'
+
+        return response
@@ -0,0 +1,8 @@
+"""
+Benchmarks of the web service. Every benchmark is a module, which is run from project root, e.g.:
+
+    python -m benchmarks.indexes --help
+
+Benchmarks use settings module from DJANGO_SETTINGS_MODULE (default 'ad_creator.settings') and
+run on a throwaway test database, which is created and destroyed by the benchmark.
+"""
@@ -0,0 +1,219 @@
+"""
+Benchmark of all API endpoints (ads/urls.py) on synthetic folder tree of configurable depth,
+fan-out and number of ads per folder. Measures latency percentiles and number of SQL queries of
+requests through the whole Django stack. Results are written as JSON and can be compared with
+results of another commit (--baseline).
+"""
+
+import argparse
+import json
+import subprocess
+import time
+
+from .utils import setup_django, test_database, percentiles, write_results
+
+
+class Case():
+    """
+    Benchmarked request. 'request' is function which performs i-th request with test client and
+    'setup' is optional function called before i-th request, which isn't measured.
+    """
+
+    def __init__(self, name, request, setup=None, repeat=None):
+        self.name = name
+        self.request = request
+        self.setup = setup
+        self.repeat = repeat
+
+
+def get_cases(client, tree):
+    """Returns benchmarked cases. Cases which deactivate records are the last ones."""
+
+    from django.core.cache import cache
+    from django.core.urlresolvers import reverse
+    from ads.models import Ad, Folder
+
+    def json_request(method, url, data):
+        return getattr(client, method)(url, json.dumps(data), content_type='application/json')
+
+    def pick(pks, i):
+        return pks[i % len(pks)]
+
+    leaf_folders = list(Folder.objects.active().filter(depth=tree['depth']).values_list(
+        'pk', flat=True
+    ))
+    folders = list(Folder.objects.active().values_list('pk', flat=True))
+    ads = list(Ad.objects.active().values_list('pk', flat=True))
+    # Folders on the first level have the largest subtrees.
+    top_folders = list(Folder.objects.active().filter(depth=1).values_list('pk', flat=True))
+
+    # Current versions of updated records, which are read before requests (setup).
+    versions = {}
+
+    def read_version(model, pks, i):
+        versions[model, i] = model.objects.get(pk=pick(pks, i)).version
+
+    def ad_data(i):
+        return {'name': 'Ad %s' % i, 'ad_url': 'http://www.example.com/%s' % i,
+                'folder': pick(leaf_folders, i)}
+
+    return (
+        Case('GET folder list', lambda i: client.get(reverse('folder-list'))),
+        Case('GET folder list page',
+             lambda i: client.get(reverse('folder-list') + '?page_size=100')),
+        Case('GET folder detail',
+             lambda i: client.get(reverse('folder-detail', args=(pick(folders, i),)))),
+        Case('GET ad list', lambda i: client.get(reverse('ad-list'))),
+        Case('GET ad list page', lambda i: client.get(reverse('ad-list') + '?page_size=100')),
+        Case('GET ad detail', lambda i: client.get(reverse('ad-detail', args=(pick(ads, i),)))),
+        Case('GET folder_ad (cold cache)',
+             lambda i: client.get(reverse('folder-ad-detail', args=(pick(folders, i),))),
+             setup=lambda i: cache.clear()),
+        Case('GET folder_ad (warm cache)',
+             lambda i: client.get(reverse('folder-ad-detail', args=(pick(folders, i),))),
+             setup=lambda i: client.get(reverse('folder-ad-detail', args=(pick(folders, i),)))),
+        Case('GET folder_ad (warm cache, gzip)',
+             lambda i: client.get(reverse('folder-ad-detail', args=(pick(folders, i),)),
+                                  HTTP_ACCEPT_ENCODING='gzip'),
+             setup=lambda i: client.get(reverse('folder-ad-detail', args=(pick(folders, i),)),
+                                        HTTP_ACCEPT_ENCODING='gzip')),
+        Case('GET folder_ad default', lambda i: client.get(reverse('folder-ad-detail'))),
+        Case('GET folder_ad tree', lambda i: client.get(reverse('folder-ad-tree'))),
+        Case('GET search', lambda i: client.get(reverse('search') + '?q=%03d' % (i % 1000))),
+        Case('GET search in subtree', lambda i: client.get(
+            reverse('search') + '?q=%03d&folder=%s' % (i % 1000, pick(top_folders, i))
+        )),
+        Case('GET export', lambda i: b''.join(client.get(reverse('export')).streaming_content)),
+        Case('GET ad creator page', lambda i: client.get(reverse('ad-creator'))),
+        Case('POST folder', lambda i: json_request('post', reverse('folder-list'), {
+            'name': 'New folder %s' % i, 'parent': pick(leaf_folders, i)
+        })),
+        Case('PUT folder', lambda i: json_request(
+            'put', reverse('folder-detail', args=(pick(leaf_folders, i),)),
+            {'name': 'Renamed %s' % i, 'parent': pick(top_folders, i),
+             'version': versions[Folder, i]}
+        ), setup=lambda i: read_version(Folder, leaf_folders, i)),
+        Case('POST ad', lambda i: json_request('post', reverse('ad-list'), ad_data(i))),
+        Case('PUT ad', lambda i: json_request(
+            'put', reverse('ad-detail', args=(pick(ads, i),)),
+            dict(ad_data(i), version=versions[Ad, i])
+        ), setup=lambda i: read_version(Ad, ads, i)),
+        Case('POST ads bulk (100 ads)', lambda i: json_request(
+            'post', reverse('ad-bulk'), [ad_data(i * 100 + j) for j in range(100)]
+        )),
+        Case('DELETE ad', lambda i: client.delete(reverse('ad-detail', args=(ads[-1 - i],))),
+             repeat=len(ads)),
+        Case('DELETE folder on first level (largest subtree)',
+             lambda i: client.delete(reverse('folder-detail', args=(top_folders[i],))),
+             repeat=len(top_folders)),
+    )
+
+
+def run_case(connection, case, repeat):
+    """Returns latency percentiles and numbers of queries of case."""
+
+    from django.test.utils import CaptureQueriesContext
+
+    durations, num_queries = [], []
+
+    for i in range(min(repeat, case.repeat or repeat)):
+        if case.setup:
+            case.setup(i)
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = case.request(i)
+            durations.append((time.perf_counter() - start) * 1000)
+
+        status_code = getattr(response, 'status_code', 200)
+        if status_code >= 400:
+            raise AssertionError('%s returned status %s.' % (case.name, status_code))
+        num_queries.append(len(queries))
+
+    return {
+        'latency_ms': percentiles(durations),
+        'queries': {'min': min(num_queries), 'max': max(num_queries)},
+        'repeat': len(durations),
+    }
+
+
+def get_commit():
+    """Returns current git commit or None."""
+
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print('Commit %(commit)s, %(folders)s folders, %(ads)s ads (%(vendor)s)' % dict(
+        results['dataset'], commit=results['commit']
+    ))
+    print('%-50s %10s %10s %10s %8s' % ('', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'))
+
+    for name, result in results['cases'].items():
+        latency = result['latency_ms']
+        print('%-50s %10.3f %10.3f %10.3f %8s' % (
+            name, latency['p50'], latency['p95'], latency['p99'], result['queries']['max']
+        ))
+
+        baseline_result = (baseline or {}).get('cases', {}).get(name)
+        if baseline_result:
+            print('%-50s %+9.1f%% %+9.1f%% %+9.1f%% %+8d' % (
+                '  vs. baseline %s' % baseline.get('commit'),
+                *[100 * (latency[p] / baseline_result['latency_ms'][p] - 1)
+                  if baseline_result['latency_ms'][p] else 0 for p in ('p50', 'p95', 'p99')],
+                result['queries']['max'] - baseline_result['queries']['max']
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=5)
+    parser.add_argument('--ads-per-folder', type=int, default=10)
+    parser.add_argument('--inactive-ratio', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='File to which JSON results are written.')
+    parser.add_argument('--baseline', help='JSON results of another run to compare with.')
+    args = parser.parse_args()
+
+    setup_django()
+
+    from collections import OrderedDict
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client
+    from ads.models import Ad, Folder
+    from .data import build_tree
+
+    settings.ALLOWED_HOSTS = ['testserver']
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    with test_database():
+        build_tree(args.depth, args.fanout, args.ads_per_folder, args.inactive_ratio)
+        tree = {'depth': args.depth, 'fanout': args.fanout, 'ads_per_folder': args.ads_per_folder,
+                'inactive_ratio': args.inactive_ratio}
+        results = {
+            'commit': get_commit(),
+            'dataset': dict(tree, vendor=connection.vendor, folders=Folder.objects.count(),
+                            ads=Ad.objects.count()),
+            'cases': OrderedDict(),
+        }
+        client = Client()
+
+        for case in get_cases(client, tree):
+            results['cases'][case.name] = run_case(connection, case, args.repeat)
+
+    print_results(results, baseline)
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
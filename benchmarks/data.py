@@ -0,0 +1,60 @@
+from itertools import islice
+from random import Random
+
+from ads.counters import repair_counters
+from ads.models import Ad, Folder
+
+
+def bulk_create(model, objs, chunk_size=1000):
+    """Inserts records from iterable in chunks, so that whole dataset is never in memory."""
+
+    objs = iter(objs)
+    chunk = list(islice(objs, chunk_size))
+
+    while chunk:
+        model.objects.bulk_create(chunk)
+        chunk = list(islice(objs, chunk_size))
+
+
+def build_tree(depth, fanout, ads_per_folder, inactive_ratio=0.0, seed=0):
+    """
+    Builds synthetic folder tree with root folder, 'depth' levels of sub-folders with 'fanout'
+    sub-folders per folder and 'ads_per_folder' ads in every folder. Fraction 'inactive_ratio' of
+    sub-folders and ads is inactive (sub-folders of inactive folders are inactive as well). Records
+    are inserted with bulk_create level by level. Returns root folder.
+    """
+
+    random = Random(seed)
+
+    root_folder = Folder(name='Root')
+    root_folder.save()
+    # (pk, path of sub-folders, is_active) of folders on previous level
+    level = [(root_folder.pk, root_folder.subtree_path, True)]
+
+    for level_depth in range(1, depth + 1):
+        bulk_create(Folder, (
+            Folder(
+                name='Folder %06d' % random.randrange(10 ** 6), parent_id=pk, path=path,
+                depth=level_depth, is_active=is_active and random.random() >= inactive_ratio
+            )
+            for pk, path, is_active in level for _ in range(fanout)
+        ))
+
+        level = [
+            (pk, '%s%s/' % (path, pk), is_active)
+            for pk, path, is_active in Folder.objects.filter(depth=level_depth).values_list(
+                'pk', 'path', 'is_active'
+            )
+        ]
+
+    folders = Folder.objects.values_list('pk', 'is_active').order_by('pk')
+    bulk_create(Ad, (
+        Ad(
+            name='Ad %06d' % random.randrange(10 ** 6), ad_url='http://www.example.com/%s' % i,
+            folder_id=pk, is_active=is_active and random.random() >= inactive_ratio
+        )
+        for pk, is_active in folders.iterator() for i in range(ads_per_folder)
+    ))
+    repair_counters()
+
+    return root_folder
@@ -0,0 +1,118 @@
+"""
+Benchmark of composite indexes for queries of active records (migration
+ads.0003_active_composite_indexes). Builds synthetic dataset, then measures query plans and latency
+of the real queries without the indexes and with them.
+"""
+
+import argparse
+import importlib
+import random
+
+from .utils import setup_django, test_database, measure, percentiles, write_results
+
+
+def get_queries(folder_pks):
+    """Returns (name, function returning queryset for i-th repetition) of benchmarked queries."""
+
+    from ads.models import Ad, Folder
+
+    return (
+        ('active sub-folders of folder',
+         lambda i: Folder.objects.active().filter(parent_id=folder_pks[i % len(folder_pks)])),
+        ('active ads of folder',
+         lambda i: Ad.objects.active().filter(folder_id=folder_pks[i % len(folder_pks)])),
+        ('first page of active folders',
+         lambda i: Folder.objects.active().order_by('name', 'pk')[:100]),
+        ('first page of active ads',
+         lambda i: Ad.objects.active().order_by('name', 'pk')[:100]),
+    )
+
+
+def explain(connection, queryset):
+    """Returns query plan of queryset."""
+
+    sql, params = queryset.query.sql_with_params()
+    explain_prefix = 'EXPLAIN ' if connection.vendor == 'postgresql' else 'EXPLAIN QUERY PLAN '
+
+    with connection.cursor() as cursor:
+        cursor.execute(explain_prefix + sql, params)
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+
+def execute(connection, queryset):
+    """Executes SQL of queryset and fetches rows without creating model instances."""
+
+    sql, params = queryset.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def run_queries(connection, queries, repeat):
+    results = {}
+
+    for name, get_queryset in queries:
+        results[name] = {
+            'plan': explain(connection, get_queryset(0)),
+            'latency_ms': percentiles(
+                measure(lambda i: execute(connection, get_queryset(i)), repeat)
+            ),
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fanout', type=int, default=20)
+    parser.add_argument('--ads-per-folder', type=int, default=20)
+    parser.add_argument('--inactive-ratio', type=float, default=0.3)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output', help='File to which JSON results are written.')
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+    from ads.models import Ad, Folder
+    from .data import build_tree
+
+    migration = importlib.import_module('ads.migrations.0003_active_composite_indexes')
+
+    with test_database():
+        build_tree(args.depth, args.fanout, args.ads_per_folder, args.inactive_ratio)
+        folder_pks = list(Folder.objects.active().values_list('pk', flat=True))
+        random.Random(0).shuffle(folder_pks)
+        queries = get_queries(folder_pks)
+
+        results = {'dataset': {
+            'vendor': connection.vendor,
+            'folders': Folder.objects.count(),
+            'ads': Ad.objects.count(),
+        }}
+
+        for phase, operation in (('before', migration.drop_indexes),
+                                 ('after', migration.create_indexes)):
+            with connection.schema_editor() as schema_editor:
+                operation(None, schema_editor)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            results[phase] = run_queries(connection, queries, args.repeat)
+
+    print('Dataset: %(folders)s folders, %(ads)s ads (%(vendor)s)' % results['dataset'])
+    for name, _ in queries:
+        print('\n%s' % name)
+        for phase in ('before', 'after'):
+            latency = results[phase][name]['latency_ms']
+            print('  %-6s p50 %8.3f ms  p99 %8.3f ms' % (phase, latency['p50'], latency['p99']))
+            for line in results[phase][name]['plan']:
+                print('         %s' % line)
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
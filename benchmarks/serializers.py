@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of read serializers (ads.serializers.*ReadSerializer) against model serializers.
+Records are loaded before measuring, so only serialization and rendering to JSON is measured.
+Checks that both serializers render the same bytes.
+"""
+
+import argparse
+
+from .utils import setup_django, test_database, measure, percentiles, write_results
+
+
+def get_cases(request, folder):
+    """Returns (name, model serializer function, read serializer function) of benchmarked cases."""
+
+    from django.db.models import Prefetch
+    from ads import serializers
+    from ads.models import Ad, Folder
+
+    folders = list(Folder.objects.active().filter(parent=folder))
+    folder_rows = list(Folder.objects.active().filter(parent=folder).values(
+        *serializers.FolderReadSerializer().get_values_fields()
+    ))
+    ads = list(Ad.objects.active().filter(folder=folder))
+    ad_rows = list(Ad.objects.active().filter(folder=folder).values(
+        *serializers.AdReadSerializer().get_values_fields()
+    ))
+    folder_ad = Folder.objects.select_related('parent').prefetch_related(
+        Prefetch('children', queryset=Folder.objects.active(), to_attr='active_children'),
+        Prefetch('ads', queryset=Ad.objects.active(), to_attr='active_ads'),
+    ).get(pk=folder.pk)
+    folder_ad_read_serializer = serializers.FolderAdReadSerializer(request)
+    folder_ad_row = Folder.objects.values(
+        *folder_ad_read_serializer.get_values_fields()
+    ).get(pk=folder.pk)
+    context = {'request': request}
+
+    return (
+        ('folder list (%s folders)' % len(folders),
+         lambda: serializers.FolderSerializer(folders, many=True, context=context).data,
+         lambda: serializers.FolderReadSerializer(request).serialize(folder_rows)),
+        ('ad list (%s ads)' % len(ads),
+         lambda: serializers.AdSerializer(ads, many=True, context=context).data,
+         lambda: serializers.AdReadSerializer(request).serialize(ad_rows)),
+        # Read serializer of folder structure queries children and ads itself, so it is measured
+        # together with the queries.
+        ('folder structure incl. queries of read serializer',
+         lambda: serializers.FolderAdSerializer(folder_ad, context=context).data,
+         lambda: folder_ad_read_serializer.serialize([folder_ad_row])[0]),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--children', type=int, default=500)
+    parser.add_argument('--ads-per-folder', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='File to which JSON results are written.')
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIRequestFactory
+    from .data import build_tree
+
+    renderer = JSONRenderer()
+    request = APIRequestFactory().get('/', HTTP_HOST='ads.example.com')
+    results = {}
+
+    with test_database():
+        root_folder = build_tree(1, args.children, args.ads_per_folder)
+
+        for name, serialize, read_serialize in get_cases(request, root_folder):
+            if renderer.render(serialize()) != renderer.render(read_serialize()):
+                raise AssertionError('Serializers render different output for %s.' % name)
+
+            results[name] = {
+                'model_serializer_ms': percentiles(
+                    measure(lambda i: renderer.render(serialize()), args.repeat)
+                ),
+                'read_serializer_ms': percentiles(
+                    measure(lambda i: renderer.render(read_serialize()), args.repeat)
+                ),
+            }
+
+    for name, result in results.items():
+        model_p50 = result['model_serializer_ms']['p50']
+        read_p50 = result['read_serializer_ms']['p50']
+        print('%s\n  model serializer p50 %8.3f ms\n  read serializer  p50 %8.3f ms (%.1fx)' % (
+            name, model_p50, read_p50, model_p50 / read_p50 if read_p50 else 0
+        ))
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
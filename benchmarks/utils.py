@@ -0,0 +1,71 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    """
+    Configures Django. Has to be called before any models are imported. Debug mode is turned off,
+    so that queries aren't logged, as in production.
+    """
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ad_creator.settings')
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.DEBUG = False
+
+
+@contextmanager
+def test_database():
+    """Creates throwaway test database with all migrations applied and destroys it on exit."""
+
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(fn, repeat):
+    """Calls function 'repeat' times and returns list of durations in milliseconds."""
+
+    durations = []
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return durations
+
+
+def percentiles(durations):
+    """Returns mean and 50th, 95th and 99th percentile of durations."""
+
+    durations = sorted(durations)
+
+    def percentile(p):
+        return round(durations[min(len(durations) - 1, int(len(durations) * p / 100))], 3)
+
+    return {
+        'mean': round(sum(durations) / len(durations), 3),
+        'p50': percentile(50),
+        'p95': percentile(95),
+        'p99': percentile(99),
+    }
+
+
+def write_results(results, output):
+    """Writes benchmark results as JSON to file 'output' (if given)."""
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
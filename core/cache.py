@@ -0,0 +1,124 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+# Generation caches by namespace, so that their statistics can be reported.
+generation_caches = {}
+# Caches invalidated inside transaction, which are invalidated again when transaction ends.
+_pending = threading.local()
+
+
+class GenerationCache():
+    """
+    Cache for data derived from database records. Every key is prefixed with generation counter of
+    the cache, so bumping the counter invalidates all cached entries at once. Works with any Django
+    cache backend (incl. local-memory and file based backends). Counts cache hits and misses.
+    """
+
+    def __init__(self, namespace, timeout=DEFAULT_TIMEOUT, alias='default'):
+        self.namespace = namespace
+        # Timeout of cached entries. Bounds staleness in case some change isn't caught.
+        self.timeout = timeout
+        self.alias = alias
+        generation_caches[namespace] = self
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    def _key(self, name):
+        return '%s:%s' % (self.namespace, name)
+
+    def _incr(self, key):
+        """Increments counter with given key. Creates counter if it doesn't exist."""
+
+        try:
+            self._cache.incr(key)
+        except ValueError:
+            if not self._cache.add(key, 1, timeout=None):
+                self._cache.incr(key)
+
+    def get_generation(self):
+        """Returns current generation of cache."""
+
+        key = self._key('generation')
+        generation = self._cache.get(key)
+
+        if generation is None:
+            # Counter is seeded with current time, so that generation doesn't repeat if counter
+            # gets evicted from cache.
+            self._cache.add(key, int(time.time() * 1000000), timeout=None)
+            generation = self._cache.get(key)
+
+        return generation
+
+    def invalidate(self, using=DEFAULT_DB_ALIAS):
+        """
+        Bumps generation counter, which invalidates all cached entries. Inside transaction, readers
+        can still cache data from before commit under new generation, so cache is invalidated
+        again when the outermost block of atomic() ends.
+        """
+
+        self._bump()
+
+        if transaction.get_connection(using).in_atomic_block:
+            if not hasattr(_pending, 'caches'):
+                _pending.caches = set()
+            _pending.caches.add(self)
+
+    def _bump(self):
+        try:
+            self._cache.incr(self._key('generation'))
+        except ValueError:
+            self.get_generation()
+
+    def make_key(self, *parts):
+        """Returns cache key for given parts, which is valid for current generation only."""
+
+        return self._key('%s:%s' % (self.get_generation(), ':'.join(str(part) for part in parts)))
+
+    def get(self, *parts):
+        """Returns cached value for given key parts or None. Counts cache hit or miss."""
+
+        value = self._cache.get(self.make_key(*parts))
+        self._incr(self._key('hits' if value is not None else 'misses'))
+
+        return value
+
+    def set(self, value, *parts, timeout=DEFAULT_TIMEOUT):
+        """Caches value for given key parts. Timeout of the cache is used by default."""
+
+        timeout = self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self._cache.set(self.make_key(*parts), value, timeout=timeout)
+
+    def stats(self):
+        """Returns number of cache hits and misses."""
+
+        counters = self._cache.get_many([self._key('hits'), self._key('misses')])
+
+        return {
+            'hits': counters.get(self._key('hits'), 0),
+            'misses': counters.get(self._key('misses'), 0),
+        }
+
+
+@contextmanager
+def atomic(using=DEFAULT_DB_ALIAS):
+    """
+    Same as transaction.atomic, but generation caches invalidated inside of it are invalidated again
+    after the outermost block ends (Django 1.8 has no on-commit hooks).
+    """
+
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        if not transaction.get_connection(using).in_atomic_block:
+            for cache in getattr(_pending, 'caches', ()):
+                cache._bump()
+            _pending.caches = set()
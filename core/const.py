@@ -1,2 +1,11 @@
 # Model messages
 MSG_RECORDS_CANT_DELETE = "Records shouldn't be deleted. Records can only be deactivated."
+MSG_VERSION_CONFLICT = 'Record was changed in the meantime. Reload it and try again.'
+MSG_VERSION_REQUIRED = (
+    'Version of record is required. Send it in header If-Match (e.g. If-Match: "1") or in field '
+    "'version'."
+)
+MSG_INVALID_VERSION = 'Invalid version.'
+
+# Pagination messages
+MSG_INVALID_CURSOR = 'Invalid cursor.'
@@ -0,0 +1,93 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Cookie and header with time (Unix timestamp) until which reads of client are made on primary
+# database. Clients which don't keep cookies can send header from response of their write back.
+STICKY_COOKIE = 'read_primary_until'
+STICKY_HEADER = 'X-Read-Primary-Until'
+
+_state = threading.local()
+
+
+def get_read_database():
+    """Returns alias of database from which current thread reads."""
+
+    return getattr(_state, 'read_database', None) or DEFAULT_DB_ALIAS
+
+
+def get_cache_timeout():
+    """
+    Returns timeout of cached data read from current database. Data read from replica may be stale
+    by replication lag, so it is cached only for the lag window.
+    """
+
+    return DEFAULT_TIMEOUT if get_read_database() == DEFAULT_DB_ALIAS else \
+        settings.DATABASE_REPLICA_LAG_WINDOW
+
+
+def reads_from_primary(request):
+    """Returns whether client of request wrote recently, so that it has to read from primary."""
+
+    value = request.COOKIES.get(STICKY_COOKIE) or request.META.get(
+        'HTTP_%s' % STICKY_HEADER.upper().replace('-', '_')
+    )
+
+    try:
+        return float(value) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+@contextmanager
+def replica_reads(request):
+    """
+    Context manager which routes reads of GET and HEAD request to replica database (setting
+    DATABASE_REPLICA), unless client wrote recently. Writes always go to primary database.
+    """
+
+    replica = settings.DATABASE_REPLICA
+    if replica is None or request.method not in ('GET', 'HEAD') or reads_from_primary(request):
+        yield
+        return
+
+    previous = getattr(_state, 'read_database', None)
+    _state.read_database = replica
+    try:
+        yield
+    finally:
+        _state.read_database = previous
+
+
+def read_from_replica(view):
+    """Decorator of function view, which routes reads of GET requests to replica database."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request):
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter():
+    """
+    Database router which sends reads of views marked with read_from_replica (or ReplicaReadMixin)
+    to replica database and all other reads and writes to primary (default) database.
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replica contains the same data as primary database.
+        return True
@@ -0,0 +1,18 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import const
+
+
+class PreconditionRequired(APIException):
+    """Raised when conditional request (e.g. update with version of record) is required."""
+
+    status_code = status.HTTP_428_PRECONDITION_REQUIRED
+    default_detail = const.MSG_VERSION_REQUIRED
+
+
+class PreconditionFailed(APIException):
+    """Raised when condition of request (e.g. version of updated record) isn't met."""
+
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = const.MSG_VERSION_CONFLICT
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.db.backends.utils import CursorDebugWrapper, CursorWrapper
+
+from .cache import generation_caches
+
+
+_local = threading.local()
+
+
+class RequestMetrics():
+    """Metrics of request, which is being processed in current thread."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_end = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+
+
+def start_request():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def finish_request():
+    return _local.__dict__.pop('metrics', None)
+
+
+def get_request_metrics():
+    """Returns metrics of current request or None if request isn't instrumented."""
+
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def measure_serializer():
+    """Measures time spent in block as serializer time. SQL time of block isn't included."""
+
+    metrics = get_request_metrics()
+    if metrics is None:
+        yield
+        return
+
+    start, sql_time = time.perf_counter(), metrics.sql_time
+    try:
+        yield
+    finally:
+        metrics.serializer_time += (
+            time.perf_counter() - start - (metrics.sql_time - sql_time)
+        )
+
+
+class TimedCursorMixin():
+    """Adds number and duration of executed queries to metrics of current request."""
+
+    def _timed(self, method, *args):
+        metrics = get_request_metrics()
+        if metrics is None:
+            return method(*args)
+
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            metrics.queries += 1
+            metrics.sql_time += time.perf_counter() - start
+
+    def execute(self, sql, params=None):
+        return self._timed(super().execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self._timed(super().executemany, sql, param_list)
+
+
+class TimedCursorWrapper(TimedCursorMixin, CursorWrapper):
+    pass
+
+
+class TimedCursorDebugWrapper(TimedCursorMixin, CursorDebugWrapper):
+    pass
+
+
+def instrument_connection(connection):
+    """Makes database connection create timed cursors. Can be called repeatedly."""
+
+    if not getattr(connection, 'instrumented', False):
+        connection.make_cursor = lambda cursor: TimedCursorWrapper(cursor, connection)
+        connection.make_debug_cursor = lambda cursor: TimedCursorDebugWrapper(cursor, connection)
+        connection.instrumented = True
+
+
+class Histogram():
+    """Prometheus histogram with labels. Thread safe."""
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        # Maps labels to (list of counts per bucket, sum, count).
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            counts, total, count = self._series.get(labels) or ([0] * len(self.buckets), 0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._series[labels] = counts, total + value, count + 1
+
+    def render(self):
+        """Returns histogram in Prometheus text exposition format."""
+
+        lines = ['# HELP %s %s' % (self.name, self.description), '# TYPE %s histogram' % self.name]
+
+        with self._lock:
+            series = [(labels, list(counts), total, count)
+                      for labels, (counts, total, count) in self._series.items()]
+
+        for labels, counts, total, count in series:
+            label_text = ','.join('%s="%s"' % label for label in labels)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append('%s_bucket{%s,le="%s"} %s' % (
+                    self.name, label_text, bound, bucket_count
+                ))
+            lines.append('%s_bucket{%s,le="+Inf"} %s' % (self.name, label_text, count))
+            lines.append('%s_sum{%s} %s' % (self.name, label_text, total))
+            lines.append('%s_count{%s} %s' % (self.name, label_text, count))
+
+        return '\n'.join(lines)
+
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Duration of requests.', DURATION_BUCKETS
+)
+sql_duration = Histogram(
+    'http_request_sql_duration_seconds', 'Time spent executing SQL queries.', DURATION_BUCKETS
+)
+serializer_duration = Histogram(
+    'http_request_serializer_duration_seconds', 'Time spent in serializers (without SQL).',
+    DURATION_BUCKETS
+)
+render_duration = Histogram(
+    'http_request_render_duration_seconds', 'Time spent rendering responses.', DURATION_BUCKETS
+)
+sql_queries = Histogram('http_request_sql_queries', 'Number of SQL queries.', QUERY_BUCKETS)
+
+histograms = (request_duration, sql_duration, serializer_duration, render_duration, sql_queries)
+
+
+def observe_request(labels, metrics, duration):
+    """Adds metrics of finished request to histograms."""
+
+    request_duration.observe(labels, duration)
+    sql_duration.observe(labels, metrics.sql_time)
+    serializer_duration.observe(labels, metrics.serializer_time)
+    render_duration.observe(labels, metrics.render_time)
+    sql_queries.observe(labels, metrics.queries)
+
+
+def render_metrics():
+    """Returns all metrics (histograms and cache statistics) in Prometheus text format."""
+
+    lines = [histogram.render() for histogram in histograms]
+    stats = [(namespace, cache.stats()) for namespace, cache in sorted(generation_caches.items())]
+
+    for name, description in (('hits', 'Number of cache hits.'),
+                              ('misses', 'Number of cache misses.')):
+        lines.append('# HELP cache_%s_total %s' % (name, description))
+        lines.append('# TYPE cache_%s_total counter' % name)
+        lines.extend('cache_%s_total{cache="%s"} %s' % (name, namespace, cache_stats[name])
+                     for namespace, cache_stats in stats)
+
+    return '\n'.join(lines) + '\n'
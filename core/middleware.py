@@ -0,0 +1,83 @@
+import math
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+from .db_routers import STICKY_COOKIE, STICKY_HEADER
+
+
+class MetricsMiddleware():
+    """
+    Records number of SQL queries, SQL time, serializer time and render time of every request.
+    Metrics are sent in Server-Timing header (in milliseconds) and aggregated to histograms per
+    view, which are exposed in Prometheus format by view core.views.metrics_view. Histograms are
+    kept in memory of each process. Has to be the first middleware, so that it measures rendering
+    of template responses.
+    """
+
+    def process_request(self, request):
+        for connection in connections.all():
+            metrics.instrument_connection(connection)
+
+        metrics.start_request()
+
+    def process_template_response(self, request, response):
+        request_metrics = metrics.get_request_metrics()
+        if request_metrics is not None:
+            request_metrics.view_end = time.perf_counter()
+
+        return response
+
+    def process_response(self, request, response):
+        request_metrics = metrics.finish_request()
+        if request_metrics is None:
+            return response
+
+        end = time.perf_counter()
+        if request_metrics.view_end is not None:
+            request_metrics.render_time = end - request_metrics.view_end
+        duration = end - request_metrics.start
+
+        response['Server-Timing'] = ', '.join((
+            'db;desc="%s queries";dur=%.3f' % (request_metrics.queries,
+                                                 request_metrics.sql_time * 1000),
+            'serializer;dur=%.3f' % (request_metrics.serializer_time * 1000),
+            'render;dur=%.3f' % (request_metrics.render_time * 1000),
+            'total;dur=%.3f' % (duration * 1000),
+        ))
+
+        # Url name can be shared by several views (e.g. redirect to default object), so histograms
+        # are labeled also with dotted path of view function.
+        resolver_match = getattr(request, 'resolver_match', None)
+        view, handler = 'unresolved', 'unresolved'
+        if resolver_match:
+            view = resolver_match.view_name
+            handler = '%s.%s' % (resolver_match.func.__module__, resolver_match.func.__name__)
+        metrics.observe_request(
+            (('view', view), ('handler', handler), ('method', request.method)), request_metrics,
+            duration
+        )
+
+        return response
+
+
+class ReplicaStickinessMiddleware():
+    """
+    Marks client, which successfully wrote, with cookie and header (core.db_routers.STICKY_COOKIE
+    and STICKY_HEADER), so that it's reads stay on primary database for replication lag window
+    (setting DATABASE_REPLICA_LAG_WINDOW) and client sees it's own writes.
+    """
+
+    def process_response(self, request, response):
+        if settings.DATABASE_REPLICA is None or request.method in ('GET', 'HEAD', 'OPTIONS') or \
+                response.status_code >= 400:
+            return response
+
+        window = settings.DATABASE_REPLICA_LAG_WINDOW
+        read_primary_until = str(math.ceil(time.time() + window))
+        response.set_cookie(STICKY_COOKIE, read_primary_until, max_age=window, httponly=True)
+        response[STICKY_HEADER] = read_primary_until
+
+        return response
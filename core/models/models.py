@@ -1,21 +1,58 @@
 from django.db import models
+from django.db.models import F
 
 from .managers import ActiveManager
 from .. import const
 
 
+class VersionConflict(Exception):
+    """Raised when record was changed by someone else since its version was read."""
+
+
 class Model(models.Model):
     """Base class for models."""
 
+    # Names of fields (attnames) whose values, as loaded from database, are remembered, so that
+    # changes can be detected on save.
+    tracked_fields = ()
+    # Caches (core.cache.GenerationCache) of data derived from records of model. They are
+    # invalidated whenever record is saved.
+    invalidated_caches = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._store_tracked_fields()
+
     def save(self, *args, **kwargs):
         """Django Model class isn't performing validations when data is saved."""
 
         self.full_clean()
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        self._store_tracked_fields()
+
+        for cache in self.invalidated_caches:
+            cache.invalidate()
+
+        return result
 
     class Meta:
         abstract = True
 
+    def _store_tracked_fields(self):
+        """Remembers current values of tracked fields. Deferred fields aren't loaded."""
+
+        self._tracked_values = {name: self.__dict__.get(name) for name in self.tracked_fields}
+
+    def get_tracked_value(self, name):
+        """Returns value of tracked field as it was loaded from (or last saved to) database."""
+
+        return self._tracked_values[name]
+
+    def has_changed(self, name):
+        """Designates whether tracked field changed since it was loaded from database."""
+
+        return self._tracked_values[name] != getattr(self, name)
+
     def delete(self, using=None):
         """Prevents deletion from Django ORM."""
 
@@ -48,7 +85,10 @@ class IsActiveModel(Model):
 
 
 class BaseTimeModel(Model):
-    """Base model that provides self-updating 'time_created' and 'time_modified' fields"""
+    """
+    Base model that provides self-updating 'time_created' and 'time_modified' fields and 'version'
+    field for optimistic concurrency control.
+    """
 
     time_created = models.DateTimeField(
         auto_now_add=True, help_text='Time when record was created.'
@@ -56,6 +96,28 @@ class BaseTimeModel(Model):
     time_modified = models.DateTimeField(
         auto_now=True, help_text='Time when record was updated.'
     )
+    version = models.PositiveIntegerField(
+        default=1, editable=False, help_text='Version of record. Increased by every update.'
+    )
 
     class Meta:
         abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        """
+        Updates record only if its version in database is still version of instance and increases
+        version with the same UPDATE statement. Raises VersionConflict if record was changed in the
+        meantime.
+        """
+
+        version_field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not version_field] + [
+            (version_field, None, F('version') + 1)
+        ]
+
+        if not super()._do_update(base_qs.filter(version=self.version), using, pk_val, values,
+                                  update_fields, forced_update):
+            raise VersionConflict(const.MSG_VERSION_CONFLICT)
+        self.version += 1
+
+        return True
@@ -0,0 +1,237 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from . import const
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination ordered by 'ordering' fields, where the last field has to be unique. Page is
+    selected with range condition on ordering fields instead of OFFSET, so deep pages cost the same
+    as the first page.
+
+    Pagination is opt-in for clients. Requests without cursor and page size query parameters get
+    unpaginated list, unless setting KEYSET_PAGINATION_REQUIRED is enabled. That way existing
+    clients keep working until they migrate.
+    """
+
+    ordering = ('name', 'pk')
+    # Pagination is used even for requests without cursor and page size query parameters.
+    required = False
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        query_params = request.query_params
+
+        required = self.required or getattr(settings, 'KEYSET_PAGINATION_REQUIRED', False)
+
+        if not required and not (self.cursor_query_param in query_params or
+                                 self.page_size_query_param in query_params):
+            return None
+
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+        if self.position is not None:
+            self.position = self.convert_position(queryset, self.position)
+        self.page, has_more = self.get_page(queryset, self.position, self.reverse, self.page_size)
+
+        if self.reverse:
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        return self.page
+
+    def get_page(self, queryset, position, reverse, page_size):
+        """
+        Returns records after position (before position in reverse direction) in ordering and
+        whether more records exist in direction of pagination.
+        """
+
+        if reverse:
+            queryset = queryset.order_by(*('-%s' % field for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._get_position_filter(position, reverse))
+
+        # One extra record tells whether another page exists in direction of pagination.
+        results = list(queryset[:page_size + 1])
+        page = results[:page_size]
+
+        if reverse:
+            page.reverse()
+
+        return page, len(results) > page_size
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        """Returns page size requested by client, limited by 'max_page_size'."""
+
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(self._get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        return self.encode_cursor(self._get_position(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request):
+        """Returns position and direction of pagination encoded in cursor query parameter."""
+
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position, reverse = cursor['p'], bool(cursor['r'])
+            if not self._is_valid_position(position):
+                raise ValueError
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(const.MSG_INVALID_CURSOR)
+
+        return position, reverse
+
+    def convert_position(self, queryset, position):
+        """
+        Converts values of position from cursor to values of ordering fields of queryset model.
+        Forged cursor with values of wrong type is rejected the same way as malformed cursor.
+        """
+
+        opts = queryset.model._meta
+
+        try:
+            return [
+                self._convert_value(opts.pk if field == 'pk' else opts.get_field(field), value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(const.MSG_INVALID_CURSOR)
+
+    def _convert_value(self, field, value):
+        if not isinstance(value, (str, int, float)):
+            raise TypeError
+        return field.to_python(value)
+
+    def encode_cursor(self, position, reverse):
+        """Returns url of current request with cursor for given position and direction."""
+
+        cursor = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encoded
+        )
+
+    def _is_valid_position(self, position):
+        return isinstance(position, list) and len(position) == len(self.ordering)
+
+    def _get_position(self, instance):
+        """Returns values of ordering fields of model instance or row from QuerySet.values()."""
+
+        if isinstance(instance, dict):
+            return [instance[field] for field in self.ordering]
+
+        return [getattr(instance, field) for field in self.ordering]
+
+    def _get_position_filter(self, position, reverse):
+        """
+        Returns filter for records after position (before position in reverse direction) in
+        ordering, e.g. (name > n) OR (name = n AND pk > p).
+        """
+
+        lookup = 'lt' if reverse else 'gt'
+        position_filter = Q(**{'%s__%s' % (self.ordering[-1], lookup): position[-1]})
+
+        for field, value in zip(self.ordering[-2::-1], position[-2::-1]):
+            position_filter = (
+                Q(**{'%s__%s' % (field, lookup): value}) | (Q(**{field: value}) & position_filter)
+            )
+
+        return position_filter
+
+
+class ChainedKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination over several querysets (e.g. of different models), which are paginated one
+    after another as if they were one list. Querysets are passed as list of (key, queryset) pairs
+    and page contains (key, record) pairs. Position in cursor is prefixed with key of queryset.
+    """
+
+    required = True
+
+    def paginate_queryset(self, querysets, request, view=None):
+        self.keys = [key for key, _ in querysets]
+
+        return super().paginate_queryset(querysets, request, view)
+
+    def get_page(self, querysets, position, reverse, page_size):
+        if reverse:
+            querysets = querysets[::-1]
+        if position is not None:
+            # Querysets before the one with position are skipped.
+            keys = [key for key, _ in querysets]
+            querysets = querysets[keys.index(position[0]):]
+
+        page, has_more = [], False
+
+        for key, queryset in querysets:
+            queryset_position = position[1:] if position and position[0] == key else None
+            # When page is already full, one record is still read to know whether more exist.
+            records, has_more = super().get_page(
+                queryset, queryset_position, reverse, page_size - len(page)
+            )
+            records = [(key, record) for record in records]
+            page = records + page if reverse else page + records
+
+            if has_more:
+                break
+
+        return page, has_more
+
+    def convert_position(self, querysets, position):
+        key = position[0]
+
+        return [key] + super().convert_position(dict(querysets)[key], position[1:])
+
+    def _is_valid_position(self, position):
+        return (isinstance(position, list) and len(position) == len(self.ordering) + 1 and
+                position[0] in self.keys)
+
+    def _get_position(self, item):
+        key, record = item
+
+        return [key] + super()._get_position(record)
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+
+from django.core.urlresolvers import reverse
+
+
+class UrlTemplate():
+    """Url of detail view, which is reversed only once and then formatted for any primary key."""
+
+    # Placeholder for primary key, which matches any pattern for primary key in url.
+    PK_PLACEHOLDER = 9876543210123456789
+
+    def __init__(self, view_name, request=None, base_url=None):
+        url = reverse(view_name, kwargs={'pk': self.PK_PLACEHOLDER})
+
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        elif base_url is not None:
+            # Scheme and host, e.g. 'http://www.example.com'.
+            url = base_url + url
+
+        self._prefix, self._suffix = url.rsplit(str(self.PK_PLACEHOLDER), 1)
+
+    def format(self, pk):
+        return '%s%s%s' % (self._prefix, pk, self._suffix)
+
+
+class ValuesSerializer():
+    """
+    Lightweight read-only serializer of rows from QuerySet.values(). Produces the same data as model
+    serializer with the same 'fields', but without field objects and model instances. Field 'url'
+    is hyperlink to detail view 'view_name' and is built from url template.
+    """
+
+    fields = ()
+    view_name = None
+
+    def __init__(self, request=None):
+        self.request = request
+        self._url_template = UrlTemplate(self.view_name, request) if 'url' in self.fields else None
+
+    def get_values_fields(self):
+        """Returns names of fields, which have to be selected with QuerySet.values()."""
+
+        values_fields = [field for field in self.fields if field != 'url']
+
+        if 'url' in self.fields and 'pk' not in values_fields:
+            values_fields.append('pk')
+
+        return values_fields
+
+    def get_url(self, pk):
+        return self._url_template.format(pk)
+
+    def to_representation(self, row):
+        return OrderedDict(
+            (field, self.get_url(row['pk']) if field == 'url' else row[field])
+            for field in self.fields
+        )
+
+    def serialize(self, rows):
+        """Returns list of serialized rows."""
+
+        return [self.to_representation(row) for row in rows]
@@ -0,0 +1,139 @@
+import mimetypes
+import os
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.utils.http import http_date, parse_http_date_safe
+
+
+# Content codings of precompressed variants in order of preference and their file extensions.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Files with content hash in name never change, so clients can cache them forever.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+def parse_accept_encoding(header):
+    """Returns set of content codings accepted by Accept-Encoding header (with q value above 0)."""
+
+    encodings = set()
+
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        params = params.strip().replace(' ', '')
+        try:
+            quality = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            quality = 1.0
+        if coding.strip() and quality > 0:
+            encodings.add(coding.strip().lower())
+
+    return encodings
+
+
+class StaticFile():
+    """Static file and its precompressed variants."""
+
+    def __init__(self, path, content_type, immutable, variants):
+        self.path = path
+        self.content_type = content_type
+        self.immutable = immutable
+        # Maps content coding to path of variant.
+        self.variants = variants
+        self.sizes = {
+            variant_path: os.path.getsize(variant_path)
+            for variant_path in [path] + list(variants.values())
+        }
+        self.mtime = int(os.path.getmtime(path))
+        self.last_modified = http_date(self.mtime)
+
+    def get_variant(self, accepted_encodings):
+        """Returns path, size and content coding (or None) of preferred accepted variant."""
+
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accepted_encodings:
+                path = self.variants[encoding]
+                return path, self.sizes[path], encoding
+
+        return self.path, self.sizes[self.path], None
+
+
+class StaticFilesMiddleware():
+    """
+    WSGI middleware which serves collected static files (STATIC_ROOT) under STATIC_URL. Variant
+    precompressed with brotli or gzip (e.g. app.js.br, see core.storage) is served, if client
+    accepts it. Files with content hash in name (listed in manifest of storage) are served with
+    far-future Cache-Control. Files are indexed on start, other requests are passed to application.
+    """
+
+    def __init__(self, application, root=None, prefix=None, hashed_names=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+
+        if hashed_names is None:
+            from django.contrib.staticfiles.storage import staticfiles_storage
+            hashed_names = getattr(staticfiles_storage, 'hashed_files', {}).values()
+
+        self.files = self.index_files(set(hashed_names))
+
+    def index_files(self, hashed_names):
+        """Returns dictionary, which maps names of files under root to StaticFile objects."""
+
+        files = {}
+        variant_extensions = tuple(extension for _, extension in ENCODINGS)
+
+        for directory, _, file_names in os.walk(self.root or ''):
+            for file_name in file_names:
+                if file_name.endswith(variant_extensions):
+                    continue
+
+                path = os.path.join(directory, file_name)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                content_type, _ = mimetypes.guess_type(name)
+                variants = {
+                    encoding: path + extension for encoding, extension in ENCODINGS
+                    if os.path.isfile(path + extension)
+                }
+                files[name] = StaticFile(
+                    path, content_type or 'application/octet-stream', name in hashed_names,
+                    variants
+                )
+
+        return files
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD')
+        static_file = None
+        if path.startswith(self.prefix):
+            static_file = self.files.get(path[len(self.prefix):])
+
+        if static_file is None or method not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+
+        headers = [
+            ('Cache-Control', IMMUTABLE_CACHE_CONTROL if static_file.immutable else CACHE_CONTROL),
+            ('Last-Modified', static_file.last_modified),
+        ]
+        if static_file.variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+
+        modified_since = parse_http_date_safe(environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if modified_since is not None and static_file.mtime <= modified_since:
+            start_response('304 Not Modified', headers)
+            return []
+
+        file_path, size, encoding = static_file.get_variant(
+            parse_accept_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        )
+        headers += [('Content-Type', static_file.content_type), ('Content-Length', str(size))]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+
+        start_response('200 OK', headers)
+
+        if method == 'HEAD':
+            return []
+
+        return environ.get('wsgi.file_wrapper', FileWrapper)(open(file_path, 'rb'), 8192)
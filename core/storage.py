@@ -0,0 +1,62 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+import brotli
+
+
+# Extensions of static files, which are compressed. Other files (e.g. images) are compressed
+# already.
+COMPRESSED_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.html', '.map')
+# Files smaller than this (in bytes) aren't compressed, because gain would be negligible.
+MIN_COMPRESSED_SIZE = 256
+
+
+def get_compressed_variants(content):
+    """
+    Returns list of (extension, compressed content) pairs of content with gzip and brotli.
+    Variants which aren't smaller than content are left out.
+    """
+
+    variants = [
+        ('.gz', gzip.compress(content, compresslevel=9)),
+        ('.br', brotli.compress(content)),
+    ]
+
+    return [(extension, compressed) for extension, compressed in variants
+            if len(compressed) < len(content)]
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Static files storage which stores files with content hash in their names (e.g. app.1a2b3c.js)
+    and precompressed gzip and brotli variants of hashed files next to them (app.1a2b3c.js.gz), so
+    that they can be served without compressing on every request.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = []
+
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.append(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+
+        for hashed_name in hashed_names:
+            if os.path.splitext(hashed_name)[1] not in COMPRESSED_EXTENSIONS:
+                continue
+
+            with self.open(hashed_name) as file:
+                content = file.read()
+            if len(content) < MIN_COMPRESSED_SIZE:
+                continue
+
+            for extension, compressed in get_compressed_variants(content):
+                if self.exists(hashed_name + extension):
+                    self.delete(hashed_name + extension)
+                self._save(hashed_name + extension, ContentFile(compressed))
@@ -1,3 +1,270 @@
-from django.test import TestCase
+import gzip
+import re
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+import brotli
+
+from .cache import GenerationCache, atomic
+from .metrics import Histogram
+from .serializers import UrlTemplate
+from .staticfiles import StaticFilesMiddleware
+
+
+class GenerationCacheTestBase():
+    """Common tests for GenerationCache, which have to pass with every cache backend."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self._cache = GenerationCache('test')
+
+    def test_returns_cached_value(self):
+        self._cache.set({'a': 1}, 'key', 1)
+
+        self.assertEqual({'a': 1}, self._cache.get('key', 1))
+        self.assertIsNone(self._cache.get('key', 2))
+
+    def test_invalidate_invalidates_all_entries(self):
+        self._cache.set('value 1', 'key', 1)
+        self._cache.set('value 2', 'key', 2)
+
+        self._cache.invalidate()
+
+        self.assertIsNone(self._cache.get('key', 1))
+        self.assertIsNone(self._cache.get('key', 2))
+
+    def test_generation_doesnt_repeat_if_counter_is_evicted(self):
+        generation = self._cache.get_generation()
+        self._cache.invalidate()
+        caches['default'].delete('test:generation')
+
+        self.assertGreater(self._cache.get_generation(), generation)
+
+    def test_counts_hits_and_misses(self):
+        self._cache.get('key')
+        self._cache.set('value', 'key')
+        self._cache.get('key')
+        self._cache.get('key')
+
+        self.assertEqual({'hits': 2, 'misses': 1}, self._cache.stats())
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class GenerationCacheLocMemTest(GenerationCacheTestBase, SimpleTestCase):
+    """Tests for GenerationCache with local-memory cache backend."""
+    pass
+
+
+class GenerationCacheFileBasedTest(GenerationCacheTestBase, SimpleTestCase):
+    """Tests for GenerationCache with file based cache backend."""
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        super().setUp()
+
+
+class GenerationCacheTransactionTest(TransactionTestCase):
+    """Tests for invalidation of GenerationCache inside transactions."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self._cache = GenerationCache('test')
+
+    def test_invalidates_cache_again_after_transaction(self):
+        with atomic():
+            with atomic():
+                self._cache.invalidate()
+                # Concurrent reader caches data from before commit under new generation.
+                self._cache.set('stale', 'key')
+            self.assertEqual('stale', self._cache.get('key'))
+
+        self.assertIsNone(self._cache.get('key'))
+
+    def test_invalidates_cache_again_after_rollback(self):
+        with self.assertRaises(ValueError):
+            with atomic():
+                self._cache.invalidate()
+                self._cache.set('stale', 'key')
+                raise ValueError
+
+        self.assertIsNone(self._cache.get('key'))
+
+
+class UrlTemplateTest(SimpleTestCase):
+    """Tests for class UrlTemplate."""
+
+    def test_formats_relative_url(self):
+        self.assertEqual('/ads/15/', UrlTemplate('ad-detail').format(15))
+
+    def test_formats_absolute_url(self):
+        request = RequestFactory().get('/', HTTP_HOST='ads.example.com')
+
+        self.assertEqual(
+            'http://ads.example.com/folders/7/', UrlTemplate('folder-detail', request).format(7)
+        )
+
+
+class HistogramTest(SimpleTestCase):
+    """Tests for class Histogram."""
+
+    def test_renders_cumulative_buckets(self):
+        histogram = Histogram('test_seconds', 'Test.', (0.1, 1))
+        for value in (0.05, 0.5, 5):
+            histogram.observe((('view', 'test'),), value)
+
+        self.assertEqual(
+            '# HELP test_seconds Test.\n'
+            '# TYPE test_seconds histogram\n'
+            'test_seconds_bucket{view="test",le="0.1"} 1\n'
+            'test_seconds_bucket{view="test",le="1"} 2\n'
+            'test_seconds_bucket{view="test",le="+Inf"} 3\n'
+            'test_seconds_sum{view="test"} 5.55\n'
+            'test_seconds_count{view="test"} 3',
+            histogram.render()
+        )
+
+
+class MetricsMiddlewareTest(TestCase):
+    """Tests for MetricsMiddleware and view metrics_view."""
+
+    def test_sends_server_timing_header(self):
+        caches['default'].clear()
+        response = self.client.get(reverse('folder-list'))
+        timing = dict(
+            re.match(r'(\w+);(?:desc="(\d+) queries";)?dur=[\d.]+$', entry).group(1, 2)
+            for entry in response['Server-Timing'].split(', ')
+        )
+
+        # Validators and list of folders.
+        self.assertEqual({'db': '2', 'serializer': None, 'render': None, 'total': None}, timing)
+
+    def test_exposes_histograms_per_view(self):
+        self.client.get(reverse('folder-list'))
+        response = self.client.get(reverse('metrics'))
+        content = response.content.decode()
+
+        self.assertEqual('text/plain; version=0.0.4; charset=utf-8', response['Content-Type'])
+        for name in ('http_request_duration_seconds', 'http_request_sql_duration_seconds',
+                     'http_request_serializer_duration_seconds',
+                     'http_request_render_duration_seconds', 'http_request_sql_queries'):
+            self.assertIn(
+                '%s_count{view="folder-list",handler="ads.views.FolderListView",method="GET"}' %
+                name, content
+            )
+        self.assertIn('cache_hits_total{cache="folder_tree"}', content)
+
+    def test_separates_views_with_the_same_url_name(self):
+        self.client.get(reverse('folder-ad-detail'))
+        self.client.get(reverse('folder-ad-detail', args=(1,)))
+        content = self.client.get(reverse('metrics')).content.decode()
+
+        for handler in ('ads.views.folder_ad_default', 'ads.views.FolderAdView'):
+            self.assertIn(
+                'http_request_duration_seconds_count{view="folder-ad-detail",handler="%s",'
+                'method="GET"}' % handler, content
+            )
+
+
+class StaticFilesTest(SimpleTestCase):
+    """Tests for CompressedManifestStaticFilesStorage and StaticFilesMiddleware."""
+
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+
+        settings_override = override_settings(
+            STATIC_ROOT=static_root,
+            STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self._app_environ = None
+        self._middleware = StaticFilesMiddleware(self._application)
+
+    def _application(self, environ, start_response):
+        self._app_environ = environ
+        start_response('200 OK', [])
+        return [b'application']
+
+    def _request(self, path, **environ):
+        response = {}
+
+        def start_response(status, headers):
+            response.update(status=status, headers=dict(headers))
+
+        body = b''.join(self._middleware(
+            dict({'PATH_INFO': path, 'REQUEST_METHOD': 'GET'}, **environ), start_response
+        ))
+
+        return response['status'], response['headers'], body
+
+    def test_static_urls_resolve_to_hashed_names(self):
+        self.assertRegex(
+            static('js/adCreatorApp.js'), r'^/static/js/adCreatorApp\.[0-9a-f]{12}\.js$'
+        )
+
+    def test_serves_precompressed_variant_accepted_by_client(self):
+        url = static('js/adCreatorApp.js')
+
+        status, headers, body = self._request(url, HTTP_ACCEPT_ENCODING='deflate, gzip;q=0.5')
+
+        self.assertEqual('200 OK', status)
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        self.assertEqual('Accept-Encoding', headers['Vary'])
+        self.assertEqual('public, max-age=31536000, immutable', headers['Cache-Control'])
+        self.assertEqual(str(len(body)), headers['Content-Length'])
+        with open(finders.find('js/adCreatorApp.js'), 'rb') as source:
+            self.assertEqual(source.read(), gzip.decompress(body))
+
+    def test_prefers_brotli_variant(self):
+        status, headers, body = self._request(
+            static('js/adCreatorApp.js'), HTTP_ACCEPT_ENCODING='gzip, deflate, br'
+        )
+
+        self.assertEqual('200 OK', status)
+        self.assertEqual('br', headers['Content-Encoding'])
+        self.assertEqual(str(len(body)), headers['Content-Length'])
+        with open(finders.find('js/adCreatorApp.js'), 'rb') as source:
+            self.assertEqual(source.read(), brotli.decompress(body))
+
+    def test_serves_uncompressed_file_if_client_doesnt_accept_compression(self):
+        status, headers, body = self._request(
+            static('js/adCreatorApp.js'), HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+
+        self.assertEqual('200 OK', status)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertIn(b'adCreatorApp', body)
+
+    def test_files_without_hash_arent_cached_forever(self):
+        _, headers, _ = self._request('/static/js/adCreatorApp.js')
+
+        self.assertEqual('public, max-age=0, must-revalidate', headers['Cache-Control'])
+
+    def test_passes_other_requests_to_application(self):
+        for path in ('/folders/', '/static/missing.js', '/static/../manage.py'):
+            _, _, body = self._request(path)
+
+            self.assertEqual(b'application', body)
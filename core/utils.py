@@ -1,4 +1,5 @@
 from django.core import exceptions as django_exc
+from django.db import connection
 
 from rest_framework import exceptions as rest_exc
 
@@ -12,8 +13,28 @@ def django_exc_to_rest_exc(fn):
 
     def wrapper(*args, **kwargs):
         try:
-            fn(*args, **kwargs)
+            return fn(*args, **kwargs)
         except django_exc.ValidationError as exc:
             raise rest_exc.ValidationError(dict(exc))
 
     return wrapper
+
+
+def get_batch_size(params_per_row, rows):
+    """Returns number of rows per statement, respecting limit of query parameters of database."""
+
+    return max(1, connection.ops.bulk_batch_size([None] * params_per_row, rows))
+
+
+def in_batches(values, batch_size):
+    """Yields lists of at most 'batch_size' values."""
+
+    values = list(values)
+    for start in range(0, len(values), batch_size):
+        yield values[start:start + batch_size]
+
+
+def escape_json_for_html(json_text):
+    """Escapes JSON text, so that it can be embedded in <script> element of html page."""
+
+    return json_text.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
@@ -1,2 +1,3 @@
 from .mixins import *
 from .views import *
+from .metrics import *
@@ -0,0 +1,9 @@
+from django.http import HttpResponse
+
+from ..metrics import render_metrics
+
+
+def metrics_view(request):
+    """Returns request histograms and cache statistics in Prometheus text format."""
+
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,5 +1,22 @@
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.http import condition
+
 from rest_framework import mixins
+from rest_framework.response import Response
 
+from .. import const
+from ..db_routers import get_cache_timeout, get_read_database, replica_reads
+from ..exceptions import PreconditionFailed, PreconditionRequired
+from ..metrics import measure_serializer
+from ..models import VersionConflict
+from ..staticfiles import parse_accept_encoding
 from ..utils import django_exc_to_rest_exc
 
 
@@ -14,13 +31,57 @@ class CreateModelMixin(mixins.CreateModelMixin):
 
 
 class UpdateModelMixin(mixins.UpdateModelMixin):
-    """Custom update model mixin for REST."""
+    """
+    Custom update model mixin for REST. Updates are conditional (optimistic concurrency control).
+    Client has to send version of record, which it changes, in header If-Match (ETag of detail
+    response, e.g. If-Match: "3", see ConditionalGetMixin.version_etag) or in field 'version'.
+    Record is updated with one UPDATE statement only if it still has that version, otherwise
+    response is 412. Response is 428 if version is missing. If-Match: * updates any version.
+    """
+
+    def get_expected_version(self, request, instance):
+        """Returns version of record expected by client or None if client didn't send it."""
+
+        if_match = request.META.get('HTTP_IF_MATCH')
+
+        if if_match is None:
+            version = request.data.get('version') if hasattr(request.data, 'get') else None
+            try:
+                return None if version is None else int(version)
+            except (TypeError, ValueError):
+                raise PreconditionFailed(const.MSG_INVALID_VERSION)
+
+        etags = parse_etags(if_match)
+        if '*' in etags:
+            return instance.version
+
+        # ETags of compressed responses have suffix. Other ETags (e.g. of other views) don't match.
+        suffix = CompressedResponseMixin.compressed_etag_suffix
+        versions = [
+            int(etag) for etag in (etag[:-len(suffix)] if etag.endswith(suffix) else etag
+                                   for etag in etags)
+            if etag.isdigit()
+        ]
+        if not versions:
+            raise PreconditionFailed
+
+        return instance.version if instance.version in versions else versions[0]
 
     @django_exc_to_rest_exc
     def perform_update(self, serializer):
-        """Decorator converts django ValidationError to REST ValidationError."""
+        """
+        Record is saved with version sent by client. Decorator converts django ValidationError to
+        REST ValidationError.
+        """
+
+        version = self.get_expected_version(self.request, serializer.instance)
+        if version is None:
+            raise PreconditionRequired
 
-        super().perform_update(serializer)
+        try:
+            serializer.save(version=version)
+        except VersionConflict:
+            raise PreconditionFailed
 
 
 class DeactivateModelMixin(mixins.DestroyModelMixin):
@@ -34,3 +95,303 @@ class DeactivateModelMixin(mixins.DestroyModelMixin):
         """
 
         instance.deactivate()
+
+
+class ReplicaReadMixin():
+    """
+    Mixin which routes database reads of GET requests to replica database (see
+    core.db_routers.ReplicaRouter), unless client wrote recently.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(request):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ValuesListModelMixin(mixins.ListModelMixin):
+    """
+    List model mixin which serializes rows from QuerySet.values() with 'read_serializer_class'
+    (core.serializers.ValuesSerializer) instead of model instances with 'serializer_class'.
+    """
+
+    read_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.read_serializer_class(request)
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *serializer.get_values_fields()
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            with measure_serializer():
+                data = serializer.serialize(page)
+            return self.get_paginated_response(data)
+
+        with measure_serializer():
+            data = serializer.serialize(queryset)
+
+        return Response(data)
+
+
+class ValuesRetrieveModelMixin(mixins.RetrieveModelMixin):
+    """
+    Retrieve model mixin which serializes row from QuerySet.values() with 'read_serializer_class'
+    (core.serializers.ValuesSerializer) instead of model instance with 'serializer_class'.
+    """
+
+    read_serializer_class = None
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.read_serializer_class(request)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+
+        with measure_serializer():
+            data = serializer.serialize(queryset.values(*serializer.get_values_fields()))
+        if not data:
+            raise Http404
+
+        return Response(data[0])
+
+
+class CachedRetrieveModelMixin(mixins.RetrieveModelMixin):
+    """
+    Retrieve model mixin which caches serialized data in generation cache 'response_cache'
+    (core.cache.GenerationCache) of the view. Cache key contains host, because serialized data can
+    contain absolute urls, and database from which data was read, because replica may lag.
+    """
+
+    response_cache = None
+
+    def get_cache_key_parts(self):
+        """Returns parts of cache key for current request."""
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return (
+            get_read_database(), self.request.scheme, self.request.get_host(),
+            self.kwargs[lookup_url_kwarg]
+        )
+
+    def get_cached_data(self, request, *args, **kwargs):
+        """
+        Returns cached data and True if it exists. Otherwise retrieves data, caches it and returns
+        it with False.
+        """
+
+        key_parts = self.get_cache_key_parts()
+        data = self.response_cache.get(*key_parts)
+
+        if data is not None:
+            return data, True
+
+        data = super().retrieve(request, *args, **kwargs).data
+        self.response_cache.set(data, *key_parts, timeout=get_cache_timeout())
+
+        return data, False
+
+    def retrieve(self, request, *args, **kwargs):
+        """Returns cached data if it exists. Otherwise retrieves data and caches it."""
+
+        data, cache_hit = self.get_cached_data(request, *args, **kwargs)
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+
+        return response
+
+
+class ConditionalGetMixin():
+    """
+    Mixin which adds ETag and Last-Modified validators to GET responses and answers conditional
+    requests with 304. Validators are computed from the latest 'time_modified' and the number of
+    records involved in response with one aggregate query, without serializing response.
+    """
+
+    # Generation cache, which is invalidated by every change of records of view. Validators of list
+    # responses are cached in it.
+    validator_cache = None
+    # Whether ETag of detail response is version of record (field 'version'), which is increased
+    # by every update. Client can send it back in If-Match of update (see UpdateModelMixin).
+    version_etag = False
+
+    def get_validator_queryset(self):
+        """Returns queryset of records involved in response."""
+
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+        return queryset
+
+    def get_validator_values(self):
+        """Returns the latest modification time and the number of records involved in response."""
+
+        if (self.lookup_url_kwarg or self.lookup_field) not in self.kwargs:
+            return self.get_list_validator_values()
+
+        aggregate = self.get_validator_queryset().aggregate(
+            last_modified=Max('time_modified'), count=Count('pk')
+        )
+
+        return aggregate['last_modified'], aggregate['count']
+
+    def get_list_validator_values(self):
+        """
+        Validators of list are computed from all records of model, inactive ones included, so that
+        they change also when record drops out of list. Aggregate runs over whole table, so values
+        are cached in 'validator_cache' until records change.
+        """
+
+        model = self.get_queryset().model
+        key_parts = 'validators', get_read_database(), model._meta.db_table
+        values = self.validator_cache.get(*key_parts) if self.validator_cache else None
+
+        if values is None:
+            aggregate = model._default_manager.aggregate(
+                last_modified=Max('time_modified'), count=Count('pk')
+            )
+            values = aggregate['last_modified'], aggregate['count']
+            if self.validator_cache:
+                self.validator_cache.set(values, *key_parts, timeout=get_cache_timeout())
+
+        return values
+
+    def get_validators(self, request, *args, **kwargs):
+        """Returns ETag and last modification time of response or None if resource doesn't exist."""
+
+        if not hasattr(self, '_validators'):
+            lookup_url_kwarg = getattr(self, 'lookup_url_kwarg', None) or getattr(
+                self, 'lookup_field', None
+            )
+            if self.version_etag and lookup_url_kwarg in self.kwargs:
+                row = self.get_validator_queryset().values_list('version', 'time_modified').first()
+                self._validators = (None, None) if row is None else (str(row[0]), row[1])
+                return self._validators
+
+            last_modified, count = self.get_validator_values()
+
+            if not count and lookup_url_kwarg in self.kwargs:
+                self._validators = None, None
+            else:
+                version = '%s:%s:%s' % (request.get_full_path(), last_modified, count)
+                self._validators = hashlib.md5(version.encode()).hexdigest(), last_modified
+
+        return self._validators
+
+    def get_etag(self, request, *args, **kwargs):
+        return self.get_validators(request, *args, **kwargs)[0]
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return self.get_validators(request, *args, **kwargs)[1]
+
+    def get(self, request, *args, **kwargs):
+        """Returns 304 if response didn't change since the version client already has."""
+
+        conditional_get = condition(
+            etag_func=self.get_etag, last_modified_func=self.get_last_modified
+        )
+
+        return conditional_get(super().get)(request, *args, **kwargs)
+
+
+class CompressedResponseMixin():
+    """
+    Mixin which compresses successful JSON responses of GET requests with gzip, if client accepts
+    it. Compressed body of response with ETag (see ConditionalGetMixin) is cached in generation
+    cache 'compressed_response_cache' under the ETag, so that response is rendered and compressed
+    only once per version. Responses smaller than API_COMPRESSION_MIN_SIZE aren't compressed.
+    Compressed response has it's own ETag (ETag of response with suffix '-gzip'), as required for
+    different content codings.
+    """
+
+    compressed_response_cache = None
+    compressed_formats = ('json',)
+    compressed_etag_suffix = '-gzip'
+
+    def accepts_gzip(self, request):
+        return 'gzip' in parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    def get_compressed_etag(self, etag):
+        """Returns ETag of compressed response with given (quoted) ETag."""
+
+        return '%s%s"' % (etag[:-1], self.compressed_etag_suffix)
+
+    def get(self, request, *args, **kwargs):
+        """
+        ETags of compressed responses in If-None-Match are compared as ETags of uncompressed
+        responses, since content is the same. 304 then keeps ETag of compressed response.
+        """
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        self.revalidates_compressed = False
+
+        if if_none_match and self.accepts_gzip(request):
+            suffix = '%s"' % self.compressed_etag_suffix
+            self.revalidates_compressed = suffix in if_none_match
+            request.META['HTTP_IF_NONE_MATCH'] = if_none_match.replace(suffix, '"')
+
+        return super().get(request, *args, **kwargs)
+
+    def get_compressed_cache_key_parts(self, request, response):
+        """
+        Returns parts of cache key of compressed response. Host is included for absolute urls and
+        path, since ETags (e.g. versions of records) can repeat across resources.
+        """
+
+        return (
+            'gzip', request.scheme, request.get_host(), request.get_full_path(),
+            response.accepted_media_type, response['ETag']
+        )
+
+    def compress_response(self, response):
+        """Returns content type and compressed body of response or None if it isn't worth it."""
+
+        content = response.rendered_content
+        response.content = content
+        if len(content) < settings.API_COMPRESSION_MIN_SIZE:
+            return response['Content-Type'], None
+
+        compressed = gzip.compress(content)
+        return response['Content-Type'], compressed if len(compressed) < len(content) else None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if request.method == 'GET' and response.status_code == 304 and \
+                getattr(self, 'revalidates_compressed', False) and response.has_header('ETag'):
+            patch_vary_headers(response, ('Accept-Encoding',))
+            response['ETag'] = self.get_compressed_etag(response['ETag'])
+            return response
+
+        if request.method != 'GET' or response.status_code != 200 or \
+                getattr(response, 'accepted_renderer', None) is None or \
+                response.accepted_renderer.format not in self.compressed_formats:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not self.accepts_gzip(request):
+            return response
+
+        cache = self.compressed_response_cache if response.has_header('ETag') else None
+        key_parts = self.get_compressed_cache_key_parts(request, response) if cache else None
+        cached = cache.get(*key_parts) if cache else None
+
+        if cached is None:
+            cached = self.compress_response(response)
+            if cache:
+                cache.set(cached, *key_parts)
+
+        content_type, compressed = cached
+        if compressed is not None:
+            response.content = compressed
+            response['Content-Type'] = content_type
+            response['Content-Encoding'] = 'gzip'
+            response['Content-Length'] = str(len(compressed))
+            if response.has_header('ETag'):
+                response['ETag'] = self.get_compressed_etag(response['ETag'])
+
+        return response
@@ -62,7 +62,9 @@ class IntegrationBaseTest():
     def _get_sub_folder_names(self):
         """Returns a list of sub-folder names of currently selected folder."""
 
-        return [f.text for f in self._get_sub_folders()]
+        return [
+            f.find_element_by_class_name('folder-name').text for f in self._get_sub_folders()
+        ]
 
     def _click_sub_folder(self, index):
         """Performs a click action on current folder."""
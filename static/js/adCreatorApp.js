@@ -1,18 +1,108 @@
 angular.module('adCreatorApp', [])
     .constant('folderAdUrl', '/folder_ad')
-    .controller('folderAdCtrl', function ($scope, $http, $location, folderAdUrl) {
+    // Structure of folder embedded in page by server (root folder by default).
+    .constant('bootstrapFolder', (function () {
+        var element = document.getElementById('bootstrap-folder');
+        return element ? JSON.parse(element.textContent) : null;
+    })())
+    // Number of folder structures kept in memory and number of child folders prefetched at most.
+    .constant('folderCacheCapacity', 100)
+    .constant('prefetchLimit', 20)
+    .factory('folderCache', function ($cacheFactory, folderCacheCapacity) {
+        // Least recently used entries are evicted, when capacity is reached.
+        return $cacheFactory('folders', {capacity: folderCacheCapacity});
+    })
+    .factory('requestIdle', function ($rootScope, $window) {
+        // Calls callback in digest when browser is idle (or after timeout in older browsers).
+        var schedule = $window.requestIdleCallback ? $window.requestIdleCallback.bind($window) :
+            function (callback) { $window.setTimeout(callback, 200); };
+
+        return function (callback) {
+            schedule(function () {
+                $rootScope.$apply(callback);
+            });
+        };
+    })
+    .controller('folderAdCtrl', function ($scope, $http, $location, $q, folderAdUrl,
+                                          bootstrapFolder, folderCache, prefetchLimit,
+                                          requestIdle) {
         $scope.data = {};
         $scope.data.folder = {};
+        // Pk of requested folder and number of navigation, which is increased with every
+        // navigation, so that responses and prefetching of previous navigations are dropped.
+        var currentPk = null;
+        var navigation = 0;
 
-        $scope.reloadData = function (url) {
-            $http.get(url)
-                .success(function (data) {
-                    $scope.data.folder = data;
-                    $location.path(data.pk);
-                })
-                .error(function (error) {
-                    $scope.data.error = error;
+        function getFolderPk(url) {
+            var match = /(\d+)\/?$/.exec(url || '');
+            return match ? Number(match[1]) : null;
+        }
+
+        // Returns promise of folder structure. Cached structure is revalidated with its ETag (or
+        // without cache, if ETag isn't known). Service worker sends such requests to network.
+        function fetchFolder(url) {
+            var cached = folderCache.get(getFolderPk(url));
+            var headers = !cached ? {} : cached.etag ? {'If-None-Match': cached.etag} :
+                {'Cache-Control': 'no-cache'};
+
+            return $http.get(url, {headers: headers}).then(function (response) {
+                folderCache.put(response.data.pk, {
+                    folder: response.data, etag: response.headers('ETag')
+                });
+                return response.data;
+            }, function (response) {
+                return response.status === 304 ? cached.folder : $q.reject(response);
+            });
+        }
+
+        // Prefetches uncached child folders one by one, when browser is idle.
+        function prefetchChildren(folder, currentNavigation) {
+            var children = (folder.children || []).slice(0, prefetchLimit).filter(function (child) {
+                return !folderCache.get(child.pk);
+            });
+
+            (function prefetchNext() {
+                if (currentNavigation !== navigation || !children.length) {
+                    return;
+                }
+                requestIdle(function () {
+                    if (currentNavigation === navigation) {
+                        fetchFolder(children.shift().url).finally(prefetchNext);
+                    }
                 });
+            })();
+        }
+
+        function showFolder(folder) {
+            currentPk = folder.pk;
+            $scope.data.folder = folder;
+            $location.path(folder.pk);
+        }
+
+        // Shows cached folder immediately and revalidates it in background. Child folders are
+        // prefetched after folder is loaded.
+        $scope.reloadData = function (url) {
+            var cached = folderCache.get(getFolderPk(url));
+            var currentNavigation = ++navigation;
+
+            currentPk = getFolderPk(url);
+            if (cached) {
+                showFolder(cached.folder);
+            }
+
+            fetchFolder(url).then(function (folder) {
+                if (currentNavigation !== navigation) {
+                    return;
+                }
+                if (folder !== $scope.data.folder) {
+                    showFolder(folder);
+                }
+                prefetchChildren(folder, currentNavigation);
+            }, function (response) {
+                if (currentNavigation === navigation && !cached) {
+                    $scope.data.error = response.data;
+                }
+            });
         };
 
         // Checks if url pattern has correct format.
@@ -20,5 +110,27 @@ angular.module('adCreatorApp', [])
             $scope.data.error = 'Incorrect url pattern format.';
         }
 
-        $scope.reloadData(folderAdUrl + $location.path() + '/');
+        // Embedded folder is used, if url has no path or if it is the folder in url. Page served by
+        // service worker may be stale, so embedded folder is revalidated then.
+        var path = $location.path();
+        if (bootstrapFolder && (!path || path === '/' + bootstrapFolder.pk)) {
+            folderCache.put(bootstrapFolder.pk, {folder: bootstrapFolder, etag: null});
+            if (navigator.serviceWorker && navigator.serviceWorker.controller) {
+                $scope.reloadData(folderAdUrl + '/' + bootstrapFolder.pk + '/');
+            } else {
+                showFolder(bootstrapFolder);
+                prefetchChildren(bootstrapFolder, navigation);
+            }
+        } else {
+            $scope.reloadData(folderAdUrl + path + '/');
+        }
+
+        // Back and forward buttons of browser change only url, so folder in url is shown.
+        $scope.$on('$locationChangeSuccess', function () {
+            var pk = getFolderPk($location.path());
+
+            if (pk !== null && pk !== currentPk) {
+                $scope.reloadData(folderAdUrl + '/' + pk + '/');
+            }
+        });
     });